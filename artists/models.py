@@ -65,7 +65,15 @@ class ArtistSong(models.Model):
         unique_together = ('artist', 'song')
 
 @receiver(pre_save, sender=Artist)
-def set_random_number(sender, instance, **kwargs):
+def set_random_number(sender, instance, update_fields=None, **kwargs):
     # Generate a random 4-digit number only if it's a new artist or if there is a conflict
-    if instance._state.adding or Artist.objects.filter(name=instance.name, random_token=instance.random_token).exclude(pk=instance.pk).exists():
+    if instance._state.adding:
+        instance.random_token = random.randint(1000, 9999)
+        return
+
+    # A save that does not touch the name or token cannot introduce a conflict
+    if update_fields is not None and not {'name', 'random_token'} & set(update_fields):
+        return
+
+    if Artist.objects.filter(name=instance.name, random_token=instance.random_token).exclude(pk=instance.pk).exists():
         instance.random_token = random.randint(1000, 9999)
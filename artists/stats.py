@@ -0,0 +1,36 @@
+from django.db.models import Count, Avg, Sum, OuterRef, Subquery, DecimalField, IntegerField
+from django.db.models.functions import Cast, Coalesce
+
+from artists.models import Artist, ArtistSong
+
+def _grouped_subquery(aggregate, output_field):
+    """Builds a correlated subquery that aggregates the songs of the outer artist."""
+    return Subquery(
+        ArtistSong.objects.filter(artist_id=OuterRef('pk'))
+            .order_by()
+            .values('artist_id')
+            .annotate(value=aggregate)
+            .values('value'),
+        output_field=output_field
+    )
+
+def artist_stats_expressions():
+    """Returns a mapping of Artist stat field to the expression that recalculates it from the artist's songs."""
+    return {
+        'total_songs': Coalesce(_grouped_subquery(Count('song_id'), IntegerField()), 0),
+        'total_downloads': Coalesce(_grouped_subquery(Sum('song__downloads_count'), IntegerField()), 0),
+        'total_comments': Coalesce(_grouped_subquery(Sum('song__comments_count'), IntegerField()), 0),
+        'average_song_rating': Cast(
+            Coalesce(_grouped_subquery(Avg('song__average_rating'), DecimalField()), 0, output_field=DecimalField()),
+            DecimalField(max_digits=3, decimal_places=1)
+        ),
+        'cumulative_song_ratings': Coalesce(_grouped_subquery(Sum('song__cumulative_rating'), IntegerField()), 0),
+    }
+
+def refresh_artist_stats(queryset=None):
+    """Recalculates the stats of every artist in the queryset with a single UPDATE statement.
+    Returns the number of artists updated."""
+    if queryset is None:
+        queryset = Artist.objects.all()
+
+    return queryset.order_by().update(**artist_stats_expressions())
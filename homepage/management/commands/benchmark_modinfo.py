@@ -0,0 +1,58 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from uploads.mod_info import ModInfoThreadPool, get_mod_info
+
+class Command(BaseCommand):
+    help = (
+        'Compares files per second of running modinfo on one file at a time against running it on several '
+        'files at once from the modinfo thread pool. Both start one modinfo process per file, so this measures '
+        'the gain from concurrency alone.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help='Module files, or directories whose files are analyzed.')
+        parser.add_argument('--workers', type=int, help='Number of threads in the pool (defaults to UPLOAD_ANALYSIS_WORKERS).')
+        parser.add_argument('--repeat', type=int, default=1, help='Number of times every file is analyzed (default 1).')
+
+    def handle(self, *args, **options):
+        files = []
+        for path in options['paths']:
+            if os.path.isdir(path):
+                files.extend(os.path.join(path, name) for name in sorted(os.listdir(path)) if os.path.isfile(os.path.join(path, name)))
+            elif os.path.isfile(path):
+                files.append(path)
+            else:
+                raise CommandError(f"'{path}' does not exist.")
+
+        files = files * options['repeat']
+        if not files:
+            raise CommandError('No files to analyze.')
+
+        started = time.monotonic()
+        for file in files:
+            try:
+                get_mod_info(file)
+            except OSError:
+                pass
+        self.report('Sequential (one process per file)', len(files), time.monotonic() - started)
+
+        thread_pool = ModInfoThreadPool(max_workers=options['workers'])
+        try:
+            started = time.monotonic()
+            results = thread_pool.analyze(files)
+            self.report(
+                f'Thread pool ({thread_pool.max_workers} threads, one process per file)', len(files), time.monotonic() - started
+            )
+        finally:
+            thread_pool.close()
+
+        recognized = sum(1 for result in results if result.is_module)
+        failed = sum(1 for result in results if result.error)
+        self.stdout.write(f'{recognized} recognized, {len(files) - recognized - failed} unrecognized, {failed} failed.')
+
+    def report(self, label, total, elapsed):
+        rate = total / elapsed if elapsed else float('inf')
+        self.stdout.write(f'{label}: {total} files in {elapsed:.2f}s ({rate:.1f} files/second)')
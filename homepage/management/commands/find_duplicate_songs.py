@@ -0,0 +1,27 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from songs.duplicate_clusters import scan_for_duplicates
+
+class Command(BaseCommand):
+    help = ('Compares the songs added since the last scan against the whole archive by file hash, pattern hash '
+            'and similarity signature, and records the duplicates found as clusters for review.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int,
+                            help='Number of song ids indexed and compared at a time (defaults to SONG_DUPLICATE_SCAN_CHUNK_SIZE).')
+        parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                            help='Number of processes computing similarity signatures (defaults to the number of CPUs).')
+        parser.add_argument('--full', action='store_true',
+                            help='Compare every song, not only those added since the last scan.')
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1:
+            raise CommandError('--workers must be at least 1.')
+        if options['chunk_size'] is not None and options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1.')
+
+        scan = scan_for_duplicates(options['chunk_size'], options['workers'], options['full'])
+        self.stdout.write(f'Scanned songs {scan.first_song_id + 1} to {scan.last_song_id}: '
+                          f'{scan.songs_indexed} indexed, {scan.matches_found} matches, {scan.clusters_changed} clusters created or changed.')
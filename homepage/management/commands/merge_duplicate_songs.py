@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from django_q.tasks import async_task
+
+from songs.merge import merge_songs
+from songs.models import Song
+
+class Command(BaseCommand):
+    help = 'Merges songs that share the same file hash into the oldest song with that hash.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hash', type=str, help='Only merge songs with this hash.')
+        parser.add_argument('--dry-run', action='store_true', help='List the merges that would happen without performing them.')
+        parser.add_argument('--async', action='store_true', dest='run_async',
+                            help='Queue each merge as a django_q task instead of running it immediately.')
+
+    def handle(self, *args, **options):
+        duplicate_hashes = Song.objects.values('hash').annotate(total=Count('id')).filter(total__gt=1).values_list('hash', flat=True)
+
+        if options['hash']:
+            duplicate_hashes = duplicate_hashes.filter(hash=options['hash'])
+
+        merged = 0
+        for song_hash in duplicate_hashes:
+            songs = list(Song.objects.filter(hash=song_hash).order_by('id'))
+            song_to_merge_into = songs[0]
+
+            for song_to_merge_from in songs[1:]:
+                if options['dry_run']:
+                    self.stdout.write(f'Would merge {song_to_merge_from} into {song_to_merge_into}')
+                    continue
+
+                self.stdout.write(f'Merging {song_to_merge_from} into {song_to_merge_into}')
+
+                if options['run_async']:
+                    async_task('modarchive.tasks.merge_song', song_to_merge_from.pk, song_to_merge_into.pk)
+                else:
+                    merge_songs(song_to_merge_from, song_to_merge_into)
+                merged += 1
+
+        self.stdout.write(self.style.SUCCESS(f'{"Queued" if options["run_async"] else "Merged"} {merged} duplicate songs.'))
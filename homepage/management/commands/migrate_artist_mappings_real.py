@@ -7,13 +7,13 @@ from artists.models import Artist
 from homepage import legacy_models
 from interactions.models import ArtistComment
 from songs.models import Song
-from .disable_signals import DisableSignals
+from modarchive.bulk_operations import BulkOperation
 
 class Command(BaseCommand):
     help = "Migrate the legacy real artist mappings table"
 
     def handle(self, *args, **options):
-        with DisableSignals():
+        with BulkOperation() as bulk:
             # Use iterator() to avoid loading all records into memory
             mappings_queryset = legacy_models.TmaArtistMappingsReal.objects.using('legacy').all()
             total = mappings_queryset.count()
@@ -89,6 +89,8 @@ class Command(BaseCommand):
                             artist_comments_to_create,
                             artist_song_associations
                         )
+                        # Song search and stats do not depend on their artists, so only the artists are refreshed
+                        bulk.touch_artists(artist_song_associations)
                     
                     if counter % 5000 == 0 or counter == total:
                         print(f"Processed {counter} out of {total} mappings. "
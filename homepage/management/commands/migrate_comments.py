@@ -5,13 +5,14 @@ from homepage import legacy_models
 from homepage.models import Profile
 from interactions.models import Comment
 from songs.models import Song
-from .disable_signals import DisableSignals
+from modarchive.bulk_operations import BulkOperation
 
 class Command(BaseCommand):
     help = "Migrate the legacy comments table"
 
     def handle(self, *args, **options):
-        with DisableSignals():
+        # Stats of the touched songs and their artists are refreshed when the block exits
+        with BulkOperation(refresh_search=False) as bulk:
             # Use iterator() to avoid loading all records into memory
             comments_queryset = legacy_models.TmaComments.objects.using('legacy').all()
             total = comments_queryset.count()
@@ -60,6 +61,7 @@ class Command(BaseCommand):
                 if len(comments_to_create) >= batch_size or counter == total:
                     if comments_to_create:
                         self.bulk_create_batch(comments_to_create)
+                        bulk.touch_songs(comment.song_id for comment in comments_to_create)
                     
                     if counter % 5000 == 0 or counter == total:
                         print(f"Processed {counter} out of {total} comments. "
@@ -5,7 +5,7 @@ from homepage import legacy_models
 from homepage.models import Profile
 from interactions.models import Favorite
 from songs.models import Song
-from .disable_signals import DisableSignals
+from modarchive.bulk_operations import BulkOperation
 
 
 def bulk_create_batch(favorites_to_create):
@@ -67,7 +67,8 @@ class Command(BaseCommand):
     help = "Migrate the legacy favorites table"
 
     def handle(self, *args, **options):
-        with DisableSignals():
+        # Stats of the touched songs and their artists are refreshed when the block exits
+        with BulkOperation(refresh_search=False) as bulk:
             # Use iterator() to avoid loading all records into memory
             favorites_queryset = legacy_models.TmaFavourites.objects.using('legacy').all()
             total = favorites_queryset.count()
@@ -125,6 +126,7 @@ class Command(BaseCommand):
                 if len(favorites_to_create) >= batch_size or counter == total:
                     if favorites_to_create:
                         bulk_create_batch(favorites_to_create)
+                        bulk.touch_songs(favorite.song_id for favorite in favorites_to_create)
                     
                     if counter % 5000 == 0 or counter == total:
                         print(f"Processed {counter} out of {total} favorites. "
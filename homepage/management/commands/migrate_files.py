@@ -3,7 +3,7 @@ from django.db import transaction, connection
 
 from homepage import legacy_models
 from songs.models import Song
-from .disable_signals import DisableSignals
+from modarchive.bulk_operations import BulkOperation
 
 class Command(BaseCommand):
     help = "Migrate the legacy files table"
@@ -145,7 +145,8 @@ class Command(BaseCommand):
         }
 
     def handle(self, *args, **options):
-        with DisableSignals():
+        # Song stats keep their legacy values until the comments are migrated, which refreshes them
+        with BulkOperation(refresh_stats=False) as bulk:
             # Use iterator() to avoid loading all records into memory
             files_queryset = legacy_models.Files.objects.using('legacy').all().order_by('id')
             total = files_queryset.count()
@@ -168,6 +169,7 @@ class Command(BaseCommand):
                     with transaction.atomic():
                         # Bulk create songs
                         created_songs = Song.objects.bulk_create(songs_to_create)
+                    bulk.touch_songs(song.id for song in created_songs)
 
                     print(f"Generated {counter} out of {total} from the legacy files table.")
                     
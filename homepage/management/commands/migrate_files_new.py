@@ -5,7 +5,7 @@ from django.db import transaction
 from homepage import legacy_models
 from homepage.models import Profile
 from uploads.models import NewSong
-from .disable_signals import DisableSignals
+from modarchive.bulk_operations import BulkOperation
 
 class Command(BaseCommand):
     help = "Migrate the legacy files_new table"
@@ -22,7 +22,8 @@ class Command(BaseCommand):
         }
 
     def handle(self, *args, **options):
-        with DisableSignals():
+        # New songs in the screening queue feed no derived data, so no song or artist is touched
+        with BulkOperation():
             # Use iterator() to avoid loading all records into memory
             files_queryset = legacy_models.FilesNew.objects.using('legacy').all().order_by('id')
             total = files_queryset.count()
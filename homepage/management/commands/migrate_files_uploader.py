@@ -5,13 +5,13 @@ from django.db import transaction, IntegrityError
 from homepage import legacy_models
 from homepage.models import Profile
 from songs.models import Song
-from .disable_signals import DisableSignals
+from modarchive.bulk_operations import BulkOperation
 
 class Command(BaseCommand):
     help = "Migrate the legacy files_uploader table"
 
     def handle(self, *args, **options):
-        with DisableSignals():
+        with BulkOperation() as bulk:
             # Use iterator() to avoid loading all records into memory
             files_uploader_queryset = legacy_models.TmaFilesUploader.objects.using('legacy').all()
             total = files_uploader_queryset.count()
@@ -60,6 +60,7 @@ class Command(BaseCommand):
                 if len(songs_to_update) >= batch_size or counter == total:
                     if songs_to_update:
                         self.bulk_update_batch(songs_to_update)
+                        bulk.touch_songs(song.id for song in songs_to_update)
                     
                     if counter % 5000 == 0 or counter == total:
                         print(f"Processed {counter} out of {total} files_uploader records. "
@@ -5,13 +5,14 @@ from homepage import legacy_models
 from homepage.models import Profile
 from interactions.models import LegacyReview
 from songs.models import Song
-from .disable_signals import DisableSignals
+from modarchive.bulk_operations import BulkOperation
 
 class Command(BaseCommand):
     help = "Migrate the legacy reviews table from TmaReviews to LegacyReview"
 
     def handle(self, *args, **options):
-        with DisableSignals():
+        # Legacy reviews feed no song or artist stats or search data, so nothing is touched
+        with BulkOperation():
             reviews_queryset = legacy_models.TmaReviews.objects.using('legacy').all()
             total = reviews_queryset.count()
 
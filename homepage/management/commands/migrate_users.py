@@ -6,7 +6,7 @@ from django.contrib.auth.models import Group
 from homepage import legacy_models
 from homepage.models import Profile
 from artists.models import Artist
-from .disable_signals import DisableSignals
+from modarchive.bulk_operations import BulkOperation
 
 User = get_user_model()
 
@@ -25,9 +25,6 @@ User = get_user_model()
 # 10. --migrate_rejected_files
 # 11. --migrate_messages
 #
-# --update_artist_search_indexes --all
-# --update_song_search_indexes --all
-#
 # --convert_bbcode --comments
 # --convert_bbcode --artist_comments
 # --convert_bbcode --profile_blurbs
@@ -36,7 +33,7 @@ class Command(BaseCommand):
     help = "Migrates the legacy users table"
 
     def handle(self, *args, **options):
-        with DisableSignals():
+        with BulkOperation() as bulk:
             # Use iterator() to avoid loading all records into memory
             users_queryset = legacy_models.Users.objects.using('legacy').all().order_by('userid')
             total = users_queryset.count()
@@ -99,6 +96,8 @@ class Command(BaseCommand):
                             admin_user_indices, screener_user_indices, artist_user_indices,
                             admin_group, screener_group, artist_group, standard_group
                         )
+                        # Artists keep their legacy ids however they were created, so ids that failed are simply not found
+                        bulk.touch_artists(artist.id for artist in artists_to_create if artist is not None)
 
                     print(f"Generated {counter} out of {total} from the legacy users table.")
 
@@ -4,7 +4,8 @@ from django.contrib.auth.models import Group
 from django.core.management import call_command
 from django.contrib.auth import get_user_model
 from artists.models import Artist
-from .disable_signals import DisableSignals
+from modarchive.bulk_operations import BulkOperation, DerivedDataRefresh
+from songs.models import Song
 import sys
 
 class Command(BaseCommand):
@@ -23,7 +24,7 @@ class Command(BaseCommand):
             self.stdout.write(self.style.SUCCESS(f"Failed to load groups fixture"))
         
         # Disable signals to create users
-        with DisableSignals():
+        with BulkOperation():
             self.create_user('test-user', [1])
             self.create_user('superuser', [1, 2, 3, 4], True, True)
             self.create_user('test-artist', [1, 2])
@@ -46,6 +47,13 @@ class Command(BaseCommand):
             except Exception as e:
                 self.stdout.write(self.style.ERROR(f"Failed to load {fixture}: {e}"))
 
+        # Fixtures are loaded raw, so the search data, tokens and stats they leave out are filled in here
+        refresh = DerivedDataRefresh()
+        refresh.touch_songs(Song.objects.values_list('id', flat=True))
+        refresh.touch_artists(Artist.objects.values_list('id', flat=True))
+        refresh.refresh()
+        self.stdout.write(self.style.SUCCESS("Refreshed song and artist search data and stats"))
+
         self.stdout.write(self.style.SUCCESS("Local data setup complete."))
 
     def create_user(self, username: str, groups: list[int], is_staff: bool = False, is_superuser: bool = False):
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from uploads.retention import apply_retention_policies
+
+class Command(BaseCommand):
+    help = ('Deletes expired temporary rejections and their files, removes rejected files past their retention '
+            'period, deletes abandoned chunked uploads and sweeps abandoned processing directories from the '
+            'temporary upload directory.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Report what would be removed without removing anything.')
+
+    def handle(self, *args, **options):
+        report = apply_retention_policies(dry_run=options['dry_run'])
+        self.stdout.write(str(report))
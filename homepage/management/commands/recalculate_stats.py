@@ -1,60 +1,114 @@
-from django.core.management.base import BaseCommand
-from django.db.models import Count, Avg, Sum
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, time
 
-from songs.models import Song
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Min, Max
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 
+from interactions.models import Comment, Favorite
+from songs.models import Song
+from songs.stats import refresh_song_stats, get_song_stats_differences
 
 BATCH_SIZE = 1000
 
-def _bulk_save(batch):
-    Song.objects.bulk_update(batch, ['comments_count', 'favorites_count', 'average_rating', 'cumulative_rating'])
+def parse_since(value):
+    """Accepts either a date (YYYY-MM-DD) or an ISO 8601 datetime."""
+    since = parse_datetime(value)
+    if since is None:
+        since_date = parse_date(value)
+        if since_date is None:
+            raise CommandError(f"Invalid --since value '{value}'. Use YYYY-MM-DD or an ISO 8601 datetime.")
+        since = datetime.combine(since_date, time.min)
+
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since)
+
+    return since
+
+def get_id_ranges(songs, batch_size):
+    """Splits the id space of the queryset into contiguous, inclusive (start, end) ranges."""
+    bounds = songs.aggregate(min_id=Min('id'), max_id=Max('id'))
+    if bounds['min_id'] is None:
+        return []
+
+    return [
+        (start, min(start + batch_size - 1, bounds['max_id']))
+        for start in range(bounds['min_id'], bounds['max_id'] + 1, batch_size)
+    ]
 
 class Command(BaseCommand):
     help = 'Recalculate the average rating and counts of favorites and comments for each song and update the song records.'
 
     def add_arguments(self, parser):
         parser.add_argument('--song_id', type=int, help='Limit the calculation to a single song ID.')
+        parser.add_argument('--since', type=str,
+                            help='Only recalculate songs that were updated, commented on or favorited since this date (YYYY-MM-DD or ISO datetime).')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                            help=f'Number of song IDs covered by each range (default {BATCH_SIZE}).')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Number of ranges processed concurrently, each on its own database connection (default 1).')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Report the stats that would change without writing anything.')
 
     def handle(self, *args, **options):
-        song_id = options.get('song_id')
-
-        songs = Song.objects.all()
-
-        if song_id:
-            songs = songs.filter(id=song_id)
-
-        # Annotate everything in ONE query
-        songs = songs.annotate(
-            total_favorites=Count('favorite', distinct=True),
-            total_comments=Count('comment', distinct=True),
-            average_comment_score=Avg('comment__rating'),
-        )
-
-        total = songs.count()
-        print(f"Starting to recalculate stats for {total} songs.")
-
-        batch = []
-        counter = 0
-
-        for song in songs.iterator(chunk_size=BATCH_SIZE):
-            # Update the song model fields
-            song.comments_count = song.total_comments
-            song.favorites_count = song.total_favorites
-            song.average_rating = song.average_comment_score
-            song.cumulative_rating = song.comments_count * (song.average_rating or 0.0)
-
-            batch.append(song)
-
-            counter += 1
-
-            if len(batch) >= BATCH_SIZE:
-                _bulk_save(batch)
-                print(f"Recalculated stats for {counter} songs.")
-                batch = []
-
-        # Save remaining
-        if batch:
-            _bulk_save(batch)
-
-        self.stdout.write(self.style.SUCCESS('Successfully recalculated song stats.'))
-
+        batch_size = options['batch_size']
+        workers = options['workers']
+        self.dry_run = options['dry_run']
+
+        if batch_size < 1:
+            raise CommandError('--batch-size must be at least 1.')
+        if workers < 1:
+            raise CommandError('--workers must be at least 1.')
+
+        self.songs = Song.objects.all()
+
+        if options.get('song_id'):
+            self.songs = self.songs.filter(id=options['song_id'])
+
+        if options.get('since'):
+            since = parse_since(options['since'])
+            self.songs = self.songs.filter(
+                id__in=Song.objects.filter(update_date__gte=since).values('id')
+                    .union(Favorite.objects.filter(create_date__gte=since).values('song_id'))
+                    .union(Comment.objects.filter(create_date__gte=since).values('song_id'))
+            )
+
+        ranges = get_id_ranges(self.songs, batch_size)
+        self.stdout.write(f"Starting to recalculate stats across {len(ranges)} id ranges with {workers} worker(s).")
+
+        if workers == 1:
+            results = [self.process_range(id_range) for id_range in ranges]
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(self.process_range_in_worker, ranges))
+
+        total = sum(results)
+        if self.dry_run:
+            self.stdout.write(self.style.SUCCESS(f'Dry run complete. {total} stat values would change.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Successfully recalculated song stats for {total} songs.'))
+
+    def process_range_in_worker(self, id_range):
+        # Each worker thread opens its own connection, which must be released when the range is done
+        try:
+            return self.process_range(id_range)
+        finally:
+            connection.close()
+
+    def process_range(self, id_range):
+        start, end = id_range
+        songs = self.songs.filter(id__gte=start, id__lte=end)
+
+        if self.dry_run:
+            differences = get_song_stats_differences(songs)
+            for song_id, field, current, recalculated in differences:
+                self.stdout.write(f"Song {song_id}: {field} {current} -> {recalculated}")
+            return len(differences)
+
+        with transaction.atomic():
+            updated = refresh_song_stats(songs)
+
+        self.stdout.write(f"Recalculated stats for {updated} songs in id range {start}-{end}.")
+        return updated
@@ -0,0 +1,82 @@
+import os
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+from modarchive import file_repository
+from modarchive.file_repository import CompressionPolicy
+from songs.models import Song
+
+class Command(BaseCommand):
+    help = ('Recompresses the zips in the main archive with the configured compression policy, replacing each one only '
+            'if its module still matches the song hash, and reports the disk space saved.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--song_id', type=int, help='Limit the recompression to a single song ID.')
+        parser.add_argument('--method', choices=file_repository.COMPRESSION_METHODS,
+                            help='Compression method (defaults to ARCHIVE_COMPRESSION_METHOD).')
+        parser.add_argument('--level', type=int, help='Compression level (defaults to ARCHIVE_COMPRESSION_LEVEL).')
+        parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                            help='Number of zips recompressed concurrently (defaults to the number of CPUs).')
+        parser.add_argument('--force', action='store_true',
+                            help='Replace zips even when the recompressed zip is not smaller.')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Report the savings without replacing any zips.')
+        parser.add_argument('--solid', metavar='PATH',
+                            help='Also pack every verified module into one solid tar archive at PATH, for mirrors.')
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1:
+            raise CommandError('--workers must be at least 1.')
+
+        try:
+            policy = CompressionPolicy.from_settings()
+            if options['method']:
+                policy = CompressionPolicy(options['method'], options['level'])
+            elif options['level'] is not None:
+                policy = CompressionPolicy(policy.method, options['level'])
+        except ValueError as e:
+            raise CommandError(str(e)) from e
+
+        songs = Song.objects.order_by('id')
+        if options.get('song_id'):
+            songs = songs.filter(id=options['song_id'])
+
+        # Compression runs in the compression libraries with the GIL released, so threads use every core
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            results = list(executor.map(
+                lambda song: self.recompress(song, policy, options['force'], options['dry_run']),
+                songs.only('id', 'filename', 'format', 'folder', 'hash').iterator()
+            ))
+
+        recompressed = [result for _, result in results if result and result.status == file_repository.RECOMPRESSED]
+        unchanged = [result for _, result in results if result and result.status == file_repository.NOT_SMALLER]
+        failed = len(results) - len(recompressed) - len(unchanged)
+        old_size = sum(result.old_size for result in recompressed)
+        saved = old_size - sum(result.new_size for result in recompressed)
+        percentage = saved / old_size * 100 if old_size else 0
+
+        verb = 'would be recompressed' if options['dry_run'] else 'recompressed'
+        self.stdout.write(f'{len(recompressed)} {verb}, {len(unchanged)} not smaller, {failed} failed.')
+        self.stdout.write(f'Saved {saved} of {old_size} bytes ({percentage:.1f}%).')
+
+        if options['solid']:
+            verified = [
+                (song.get_archive_path(), f'{song.format.upper()}/{song.folder}/{song.filename}')
+                for song, result in results if result and result.status != file_repository.HASH_MISMATCH
+            ]
+            file_repository.write_solid_archive(verified, options['solid'], policy)
+            self.stdout.write(f"Packed {len(verified)} modules into {options['solid']} ({os.path.getsize(options['solid'])} bytes).")
+
+    def recompress(self, song, policy, force, dry_run):
+        path = song.get_archive_path()
+        try:
+            result = file_repository.recompress_zip(path, policy, song.hash, force=force, dry_run=dry_run)
+        except (OSError, IndexError, zipfile.BadZipFile) as e:
+            self.stderr.write(f'Song {song.id}: could not recompress {path}: {e}')
+            return song, None
+
+        if result.status == file_repository.HASH_MISMATCH:
+            self.stderr.write(f'Song {song.id}: the module in {path} does not match the song hash, so it was left alone.')
+        return song, result
@@ -0,0 +1,236 @@
+import datetime
+import hashlib
+import os
+import tarfile
+import tempfile
+import zipfile
+from io import StringIO
+from unittest.mock import patch
+from decimal import Decimal
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from homepage.tests.factories import UserFactory
+from interactions.factories import CommentFactory, FavoriteFactory
+from songs.factories import SongFactory
+from songs.models import Song
+
+class RecalculateStatsTests(TestCase):
+    def setUp(self):
+        self.users = [UserFactory() for _ in range(3)]
+
+    def create_song_with_interactions(self, ratings, favorites):
+        song = SongFactory()
+        for user, rating in zip(self.users, ratings):
+            CommentFactory(song=song, profile=user.profile, rating=rating)
+        for user in self.users[:favorites]:
+            FavoriteFactory(song=song, profile=user.profile)
+        # Reset the stats so the command has something to fix
+        Song.objects.filter(pk=song.pk).update(comments_count=0, favorites_count=0, average_rating=None, cumulative_rating=0)
+        return song
+
+    def test_recalculates_counts_without_multiplying_joins(self):
+        # Arrange
+        song = self.create_song_with_interactions(ratings=[10, 7, 4], favorites=3)
+        empty_song = SongFactory(favorites_count=4, comments_count=2)
+
+        # Act
+        call_command('recalculate_stats', stdout=StringIO())
+
+        # Assert
+        song.refresh_from_db()
+        self.assertEqual(3, song.comments_count)
+        self.assertEqual(3, song.favorites_count)
+        self.assertEqual(Decimal('7.0'), song.average_rating)
+        self.assertEqual(21, song.cumulative_rating)
+
+        empty_song.refresh_from_db()
+        self.assertEqual(0, empty_song.comments_count)
+        self.assertEqual(0, empty_song.favorites_count)
+        self.assertIsNone(empty_song.average_rating)
+        self.assertEqual(0, empty_song.cumulative_rating)
+
+    def test_processes_every_id_range(self):
+        # Arrange
+        songs = [self.create_song_with_interactions(ratings=[5], favorites=1) for _ in range(5)]
+
+        # Act
+        call_command('recalculate_stats', batch_size=2, stdout=StringIO())
+
+        # Assert
+        for song in songs:
+            song.refresh_from_db()
+            self.assertEqual(1, song.comments_count)
+            self.assertEqual(1, song.favorites_count)
+
+    def test_dry_run_reports_differences_without_writing(self):
+        # Arrange
+        song = self.create_song_with_interactions(ratings=[8], favorites=2)
+        out = StringIO()
+
+        # Act
+        call_command('recalculate_stats', dry_run=True, stdout=out)
+
+        # Assert
+        self.assertIn(f'Song {song.pk}: favorites_count 0 -> 2', out.getvalue())
+        self.assertIn(f'Song {song.pk}: comments_count 0 -> 1', out.getvalue())
+        song.refresh_from_db()
+        self.assertEqual(0, song.favorites_count)
+        self.assertEqual(0, song.comments_count)
+
+    def test_since_only_recalculates_recently_changed_songs(self):
+        # Arrange
+        old_song = self.create_song_with_interactions(ratings=[5], favorites=1)
+        new_song = self.create_song_with_interactions(ratings=[5], favorites=1)
+        last_week = timezone.now() - datetime.timedelta(days=7)
+        Song.objects.filter(pk=old_song.pk).update(update_date=last_week)
+        old_song.comment_set.update(create_date=last_week)
+        old_song.favorite_set.update(create_date=last_week)
+        since = (timezone.now() - datetime.timedelta(days=1)).isoformat()
+
+        # Act
+        call_command('recalculate_stats', since=since, stdout=StringIO())
+
+        # Assert
+        old_song.refresh_from_db()
+        new_song.refresh_from_db()
+        self.assertEqual(0, old_song.favorites_count)
+        self.assertEqual(1, new_song.favorites_count)
+
+class MergeDuplicateSongsTests(TestCase):
+    def test_merges_songs_with_same_hash_into_oldest(self):
+        # Arrange
+        original = SongFactory(hash='duplicate', downloads_count=1)
+        duplicate = SongFactory(hash='duplicate', downloads_count=2)
+        unrelated = SongFactory(hash='unrelated')
+
+        # Act
+        with patch('homepage.management.commands.merge_duplicate_songs.merge_songs') as merge_songs:
+            call_command('merge_duplicate_songs', stdout=StringIO())
+
+        # Assert
+        merge_songs.assert_called_once_with(duplicate, original)
+        self.assertTrue(Song.objects.filter(pk=unrelated.pk).exists())
+
+    def test_dry_run_does_not_merge(self):
+        # Arrange
+        SongFactory(hash='duplicate')
+        SongFactory(hash='duplicate')
+
+        # Act
+        with patch('homepage.management.commands.merge_duplicate_songs.merge_songs') as merge_songs:
+            call_command('merge_duplicate_songs', dry_run=True, stdout=StringIO())
+
+        # Assert
+        merge_songs.assert_not_called()
+
+class RecompressArchiveTests(TestCase):
+    module_bytes = b'SCRM' + bytes(range(256)) * 400
+
+    def create_song_with_zip(self, data=None, compression=zipfile.ZIP_STORED, **kwargs):
+        data = data or self.module_bytes
+        song = SongFactory(hash=hashlib.md5(data).hexdigest(), **kwargs)
+        path = song.get_archive_path()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with zipfile.ZipFile(path, 'w', compression) as zip_file:
+            zip_file.writestr(song.filename, data)
+        self.addCleanup(os.remove, path)
+        return song
+
+    def test_recompresses_zips_and_reports_savings(self):
+        # Arrange
+        song = self.create_song_with_zip()
+        old_size = os.path.getsize(song.get_archive_path())
+        out = StringIO()
+
+        # Act
+        call_command('recompress_archive', method='lzma', workers=2, stdout=out, stderr=StringIO())
+
+        # Assert
+        new_size = os.path.getsize(song.get_archive_path())
+        self.assertLess(new_size, old_size)
+        with zipfile.ZipFile(song.get_archive_path()) as zip_file:
+            self.assertEqual(zipfile.ZIP_LZMA, zip_file.getinfo(song.filename).compress_type)
+            self.assertEqual(self.module_bytes, zip_file.read(song.filename))
+        self.assertIn('1 recompressed, 0 not smaller, 0 failed.', out.getvalue())
+        self.assertIn(f'Saved {old_size - new_size} of {old_size} bytes', out.getvalue())
+
+    def test_invalid_level_for_method_is_rejected_before_any_zip_is_touched(self):
+        # Arrange
+        song = self.create_song_with_zip()
+        old_size = os.path.getsize(song.get_archive_path())
+
+        # Act
+        with self.assertRaisesMessage(CommandError, 'Invalid bzip2 compression level 0. Use 1 to 9.'):
+            call_command('recompress_archive', method='bzip2', level=0, stdout=StringIO(), stderr=StringIO())
+
+        # Assert
+        self.assertEqual(old_size, os.path.getsize(song.get_archive_path()))
+
+    def test_keeps_every_member_of_zip_with_several_files(self):
+        # Arrange
+        song = self.create_song_with_zip()
+        with zipfile.ZipFile(song.get_archive_path(), 'a', zipfile.ZIP_STORED) as zip_file:
+            zip_file.writestr('readme.nfo', b'Greetings to everyone ' * 100)
+            zip_file.writestr('extra.mod', self.module_bytes[::-1])
+
+        # Act
+        call_command('recompress_archive', method='lzma', stdout=StringIO(), stderr=StringIO())
+
+        # Assert
+        with zipfile.ZipFile(song.get_archive_path()) as zip_file:
+            self.assertEqual([song.filename, 'readme.nfo', 'extra.mod'], zip_file.namelist())
+            self.assertEqual(zipfile.ZIP_LZMA, zip_file.getinfo('readme.nfo').compress_type)
+            self.assertEqual(self.module_bytes, zip_file.read(song.filename))
+            self.assertEqual(b'Greetings to everyone ' * 100, zip_file.read('readme.nfo'))
+            self.assertEqual(self.module_bytes[::-1], zip_file.read('extra.mod'))
+
+    def test_leaves_zip_alone_when_module_does_not_match_song_hash(self):
+        # Arrange
+        song = self.create_song_with_zip()
+        song.hash = 'mismatch'
+        song.save()
+        with open(song.get_archive_path(), 'rb') as f:
+            original = f.read()
+        err = StringIO()
+
+        # Act
+        call_command('recompress_archive', stdout=StringIO(), stderr=err)
+
+        # Assert
+        with open(song.get_archive_path(), 'rb') as f:
+            self.assertEqual(original, f.read())
+        self.assertIn('does not match the song hash', err.getvalue())
+
+    @override_settings(ARCHIVE_COMPRESSION_METHOD='deflated', ARCHIVE_COMPRESSION_LEVEL=9)
+    def test_dry_run_does_not_replace_zips(self):
+        # Arrange
+        song = self.create_song_with_zip()
+        with open(song.get_archive_path(), 'rb') as f:
+            original = f.read()
+        out = StringIO()
+
+        # Act
+        call_command('recompress_archive', dry_run=True, stdout=out, stderr=StringIO())
+
+        # Assert
+        with open(song.get_archive_path(), 'rb') as f:
+            self.assertEqual(original, f.read())
+        self.assertIn('1 would be recompressed', out.getvalue())
+
+    def test_packs_verified_modules_into_solid_archive(self):
+        # Arrange
+        song = self.create_song_with_zip(compression=zipfile.ZIP_DEFLATED)
+        solid_path = os.path.join(tempfile.mkdtemp(), 'mirror.tar.xz')
+
+        # Act
+        call_command('recompress_archive', method='lzma', solid=solid_path, stdout=StringIO(), stderr=StringIO())
+
+        # Assert
+        with tarfile.open(solid_path) as tar_file:
+            name = f'{song.format.upper()}/{song.folder}/{song.filename}'
+            self.assertEqual([name], tar_file.getnames())
+            self.assertEqual(self.module_bytes, tar_file.extractfile(name).read())
@@ -0,0 +1,85 @@
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from artists.models import Artist, ArtistSong
+from interactions.models import Favorite
+from songs.models import Song
+from songs.stats import song_stats_expressions
+
+# Inserts the favorite unless it already exists, the song does not exist, or the profile
+# belongs to one of the song's artists. The song counter is only bumped when a row was
+# actually inserted, so repeated requests (double clicks) are harmless.
+ADD_FAVORITE_SQL = f"""
+    WITH inserted AS (
+        INSERT INTO {Favorite._meta.db_table} (profile_id, song_id, create_date)
+        SELECT %(profile_id)s, song.id, %(now)s
+        FROM {Song._meta.db_table} song
+        WHERE song.id = %(song_id)s
+        AND NOT EXISTS (
+            SELECT 1 FROM {ArtistSong._meta.db_table} artist_song
+            INNER JOIN {Artist._meta.db_table} artist ON artist.id = artist_song.artist_id
+            WHERE artist_song.song_id = song.id AND artist.profile_id = %(profile_id)s
+        )
+        ON CONFLICT (profile_id, song_id) DO NOTHING
+        RETURNING song_id
+    )
+    UPDATE {Song._meta.db_table}
+    SET favorites_count = favorites_count + 1, update_date = %(now)s
+    WHERE id IN (SELECT song_id FROM inserted)
+    RETURNING favorites_count
+"""
+
+REMOVE_FAVORITE_SQL = f"""
+    WITH deleted AS (
+        DELETE FROM {Favorite._meta.db_table}
+        WHERE profile_id = %(profile_id)s AND song_id = %(song_id)s
+        RETURNING song_id
+    )
+    UPDATE {Song._meta.db_table}
+    SET favorites_count = GREATEST(favorites_count - 1, 0), update_date = %(now)s
+    WHERE id IN (SELECT song_id FROM deleted)
+    RETURNING favorites_count
+"""
+
+def _execute(sql, profile_id, song_id):
+    with connection.cursor() as cursor:
+        cursor.execute(sql, {'profile_id': profile_id, 'song_id': song_id, 'now': timezone.now()})
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+def add_favorite(profile_id, song_id):
+    """Adds the song to the profile's favorites. Returns the song's new favorites count,
+    or None if nothing changed."""
+    return _execute(ADD_FAVORITE_SQL, profile_id, song_id)
+
+def remove_favorite(profile_id, song_id):
+    """Removes the song from the profile's favorites. Returns the song's new favorites count,
+    or None if nothing changed."""
+    return _execute(REMOVE_FAVORITE_SQL, profile_id, song_id)
+
+@transaction.atomic
+def toggle_favorite(profile_id, song_id):
+    """Removes the favorite if present, otherwise adds it. Returns a tuple of
+    (is_favorite, favorites_count), where favorites_count is None if the song does not exist."""
+    favorites_count = remove_favorite(profile_id, song_id)
+    if favorites_count is not None:
+        return False, favorites_count
+
+    favorites_count = add_favorite(profile_id, song_id)
+    if favorites_count is not None:
+        return True, favorites_count
+
+    # Nothing changed: either the song does not exist or it belongs to the profile
+    favorites_count = Song.objects.filter(pk=song_id).values_list('favorites_count', flat=True).first()
+    return False, favorites_count
+
+def reconcile_favorite_counts():
+    """Corrects any song whose favorites_count has drifted from its actual number of favorites.
+    Returns the number of songs corrected."""
+    actual_favorites = song_stats_expressions()['favorites_count']
+    return (
+        Song.objects.annotate(actual_favorites=actual_favorites)
+            .exclude(favorites_count=F('actual_favorites'))
+            .update(favorites_count=actual_favorites)
+    )
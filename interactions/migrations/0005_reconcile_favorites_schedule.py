@@ -0,0 +1,31 @@
+# Generated by Django 5.1.6 on 2026-10-19 21:50
+
+from django.db import migrations
+
+SCHEDULE_NAME = 'Reconcile favorite counts'
+
+def create_schedule(apps, schema_editor):
+    Schedule = apps.get_model('django_q', 'Schedule')
+    Schedule.objects.get_or_create(
+        name=SCHEDULE_NAME,
+        defaults={
+            'func': 'modarchive.tasks.reconcile_favorites',
+            'schedule_type': 'D',
+            'repeats': -1,
+        }
+    )
+
+def delete_schedule(apps, schema_editor):
+    Schedule = apps.get_model('django_q', 'Schedule')
+    Schedule.objects.filter(name=SCHEDULE_NAME).delete()
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interactions', '0004_legacyreview'),
+        ('django_q', '0019_alter_task_options_alter_ormq_key_alter_ormq_lock_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_schedule, delete_schedule),
+    ]
@@ -0,0 +1,35 @@
+from django.test import TestCase
+
+from homepage.tests.factories import UserFactory
+from interactions import favorites
+from interactions.factories import FavoriteFactory
+from songs.factories import SongFactory
+
+class ReconcileFavoriteCountsTests(TestCase):
+    def test_corrects_drifted_counts(self):
+        # Arrange
+        drifted_song = SongFactory(favorites_count=10)
+        correct_song = SongFactory(favorites_count=1)
+        for _ in range(2):
+            FavoriteFactory(song=drifted_song, profile=UserFactory().profile)
+        FavoriteFactory(song=correct_song, profile=UserFactory().profile)
+
+        # Act
+        corrected = favorites.reconcile_favorite_counts()
+
+        # Assert
+        self.assertEqual(1, corrected)
+        drifted_song.refresh_from_db()
+        self.assertEqual(2, drifted_song.favorites_count)
+
+    def test_remove_favorite_does_not_decrement_below_zero(self):
+        # Arrange
+        song = SongFactory(favorites_count=0)
+        user = UserFactory()
+        FavoriteFactory(song=song, profile=user.profile)
+
+        # Act
+        favorites_count = favorites.remove_favorite(user.profile.id, song.id)
+
+        # Assert
+        self.assertEqual(0, favorites_count)
@@ -43,6 +43,21 @@ class AddFavoriteTests(TestCase):
             Favorite.objects.filter(song_id=song.id, profile_id=user.profile.id).count()
         )
 
+    def test_repeated_requests_only_count_favorite_once(self):
+        # Arrange
+        song = song_factories.SongFactory(favorites_count=2)
+        user = UserFactory(permissions=[Permission.objects.get(codename='add_favorite')])
+        self.client.force_login(user)
+
+        # Act
+        self.client.get(reverse('add_favorite', kwargs = {'pk': song.id}))
+        self.client.get(reverse('add_favorite', kwargs = {'pk': song.id}))
+
+        # Assert
+        song.refresh_from_db()
+        self.assertEqual(3, song.favorites_count)
+        self.assertEqual(1, Favorite.objects.filter(song_id=song.id).count())
+
     def test_does_not_add_favorite_when_not_authenticated(self):
         # Arrange
         song = song_factories.SongFactory()
@@ -0,0 +1,76 @@
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth.models import Permission
+
+from artists.factories import ArtistFactory
+from interactions.models import Favorite
+from interactions.factories import FavoriteFactory
+from songs.factories import SongFactory
+from homepage.tests.factories import UserFactory
+
+class ToggleFavoriteTests(TestCase):
+    def setUp(self):
+        self.user = UserFactory(permissions=[
+            Permission.objects.get(codename='add_favorite'),
+            Permission.objects.get(codename='delete_favorite')
+        ])
+
+    def test_adds_favorite_when_not_favorite(self):
+        # Arrange
+        song = SongFactory(favorites_count=5)
+        self.client.force_login(self.user)
+
+        # Act
+        response = self.client.post(reverse('toggle_favorite', kwargs = {'pk': song.id}))
+
+        # Assert
+        self.assertEqual(200, response.status_code)
+        self.assertEqual({'is_favorite': True, 'favorites_count': 6}, response.json())
+        self.assertTrue(Favorite.objects.filter(song=song, profile=self.user.profile).exists())
+
+    def test_removes_favorite_when_already_favorite(self):
+        # Arrange
+        song = SongFactory(favorites_count=5)
+        FavoriteFactory(profile=self.user.profile, song=song)
+        self.client.force_login(self.user)
+
+        # Act
+        response = self.client.post(reverse('toggle_favorite', kwargs = {'pk': song.id}))
+
+        # Assert
+        self.assertEqual({'is_favorite': False, 'favorites_count': 4}, response.json())
+        self.assertFalse(Favorite.objects.filter(song=song, profile=self.user.profile).exists())
+
+    def test_does_not_favorite_own_song(self):
+        # Arrange
+        song = SongFactory(favorites_count=5)
+        ArtistFactory(user=self.user, profile=self.user.profile, songs=(song,))
+        self.client.force_login(self.user)
+
+        # Act
+        response = self.client.post(reverse('toggle_favorite', kwargs = {'pk': song.id}))
+
+        # Assert
+        self.assertEqual({'is_favorite': False, 'favorites_count': 5}, response.json())
+        self.assertFalse(Favorite.objects.filter(song=song).exists())
+
+    def test_returns_404_for_missing_song(self):
+        # Arrange
+        self.client.force_login(self.user)
+
+        # Act
+        response = self.client.post(reverse('toggle_favorite', kwargs = {'pk': 99999}))
+
+        # Assert
+        self.assertEqual(404, response.status_code)
+
+    def test_cannot_toggle_favorite_without_permission(self):
+        # Arrange
+        song = SongFactory()
+        self.client.force_login(UserFactory())
+
+        # Act
+        response = self.client.post(reverse('toggle_favorite', kwargs = {'pk': song.id}))
+
+        # Assert
+        self.assertEqual(403, response.status_code)
@@ -1,20 +1,13 @@
-from django.db.models import F
-from django.shortcuts import redirect, get_object_or_404
+from django.shortcuts import redirect
 
 from django.views.generic import View
 from django.contrib.auth.mixins import PermissionRequiredMixin
 
-from interactions.models import Favorite
-from songs.models import Song
+from interactions import favorites
 
 class RemoveFavoriteView(PermissionRequiredMixin, View):
     permission_required = 'interactions.delete_favorite'
 
     def get(self, request, *args, **kwargs):
-        if Favorite.objects.filter(profile_id=self.request.user.profile.id, song_id=kwargs['pk']).count() > 0:
-            Favorite.objects.get(profile_id=self.request.user.profile.id, song_id=kwargs['pk']).delete()
-            song = get_object_or_404(Song, pk=kwargs['pk'])
-            song.favorites_count = F('favorites_count') - 1
-            song.save()
-
+        favorites.remove_favorite(self.request.user.profile.id, kwargs['pk'])
         return redirect('view_song', kwargs['pk'])
@@ -0,0 +1,17 @@
+from django.http import Http404, JsonResponse
+
+from django.views.generic import View
+from django.contrib.auth.mixins import PermissionRequiredMixin
+
+from interactions import favorites
+
+class ToggleFavoriteView(PermissionRequiredMixin, View):
+    permission_required = ('interactions.add_favorite', 'interactions.delete_favorite')
+
+    def post(self, request, *args, **kwargs):
+        is_favorite, favorites_count = favorites.toggle_favorite(self.request.user.profile.id, kwargs['pk'])
+
+        if favorites_count is None:
+            raise Http404
+
+        return JsonResponse({'is_favorite': is_favorite, 'favorites_count': favorites_count})
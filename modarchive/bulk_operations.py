@@ -0,0 +1,137 @@
+import random
+from collections import defaultdict
+
+from django.contrib.postgres.search import SearchVector
+from django.db import transaction
+
+from artists.models import Artist, ArtistSong
+from artists.stats import refresh_artist_stats
+from homepage.management.commands.disable_signals import DisableSignals
+from songs.models import Song
+from songs.stats import refresh_song_stats
+
+REFRESH_BATCH_SIZE = 1000
+RANDOM_TOKEN_RANGE = (1000, 9999)
+
+def _chunks(ids, size=REFRESH_BATCH_SIZE):
+    ids = sorted(ids)
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+def update_song_search_vectors(queryset):
+    """Rebuilds the search vectors of every song in the queryset with a single UPDATE statement."""
+    return queryset.order_by().update(
+        title_vector=SearchVector('title'),
+        instrument_text_vector=SearchVector('instrument_text'),
+        comment_text_vector=SearchVector('comment_text')
+    )
+
+def update_artist_search_vectors(queryset):
+    """Rebuilds the search document of every artist in the queryset with a single UPDATE statement."""
+    return queryset.order_by().update(search_document=SearchVector('name'))
+
+def assign_random_tokens(queryset):
+    """Gives every artist in the queryset without a random token one that is unique for its name.
+
+    Tokens already used by artists with the same name are loaded in one query, so the
+    whole set is resolved with a single read and a single bulk update."""
+    artists = list(queryset.filter(random_token__isnull=True).only('id', 'name'))
+    if not artists:
+        return 0
+
+    used_tokens = defaultdict(set)
+    for name, token in Artist.objects.filter(
+        name__in={artist.name for artist in artists}, random_token__isnull=False
+    ).values_list('name', 'random_token'):
+        used_tokens[name].add(token)
+
+    for artist in artists:
+        token = random.randint(*RANDOM_TOKEN_RANGE)
+        while token in used_tokens[artist.name]:
+            token = random.randint(*RANDOM_TOKEN_RANGE)
+        used_tokens[artist.name].add(token)
+        artist.random_token = token
+
+    Artist.objects.bulk_update(artists, ['random_token'], batch_size=REFRESH_BATCH_SIZE)
+    return len(artists)
+
+class DerivedDataRefresh:
+    """
+    Records which songs and artists a bulk write touched and refreshes the derived data that the
+    signals would normally maintain for exactly those rows, in set-based statements:
+
+    - song search vectors, comment/favorite counters and ratings
+    - artist search documents, random tokens and totals (including artists of touched songs)
+
+    Signals are left alone, so this is safe to use in requests, where bulk writes skip the
+    signals anyway:
+
+        refresh = DerivedDataRefresh()
+        Song.objects.bulk_create(songs)
+        refresh.touch_songs(song.id for song in songs)
+        refresh.refresh()
+    """
+    def __init__(self, refresh_search=True, refresh_stats=True):
+        self.refresh_search = refresh_search
+        self.refresh_stats = refresh_stats
+        self.song_ids = set()
+        self.artist_ids = set()
+
+    def touch_songs(self, song_ids):
+        self.song_ids.update(song_id for song_id in song_ids if song_id is not None)
+
+    def touch_artists(self, artist_ids):
+        self.artist_ids.update(artist_id for artist_id in artist_ids if artist_id is not None)
+
+    def refresh(self):
+        # Song stats must be refreshed before artist totals, which are derived from them
+        for batch in _chunks(self.song_ids):
+            with transaction.atomic():
+                songs = Song.objects.filter(id__in=batch)
+                if self.refresh_search:
+                    update_song_search_vectors(songs)
+                if self.refresh_stats:
+                    refresh_song_stats(songs)
+
+            self.artist_ids.update(
+                ArtistSong.objects.filter(song_id__in=batch).values_list('artist_id', flat=True)
+            )
+
+        for batch in _chunks(self.artist_ids):
+            with transaction.atomic():
+                artists = Artist.objects.filter(id__in=batch)
+                assign_random_tokens(artists)
+                if self.refresh_search:
+                    update_artist_search_vectors(artists)
+                if self.refresh_stats:
+                    refresh_artist_stats(artists)
+
+        self.song_ids.clear()
+        self.artist_ids.clear()
+
+class BulkOperation(DisableSignals, DerivedDataRefresh):
+    """
+    Disables signals for the duration of a bulk write and refreshes the derived data of the
+    songs and artists it touched on a successful exit, as DerivedDataRefresh does. Signals are
+    disabled for the whole process, so this is only for management commands.
+
+    Usage:
+
+        with BulkOperation() as bulk:
+            Comment.objects.bulk_create(comments)
+            bulk.touch_songs(comment.song_id for comment in comments)
+    """
+    def __init__(self, disabled_signals=None, refresh_search=True, refresh_stats=True):
+        DisableSignals.__init__(self, disabled_signals)
+        DerivedDataRefresh.__init__(self, refresh_search, refresh_stats)
+
+    def __enter__(self):
+        super().__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        super().__exit__(exc_type, exc_val, exc_tb)
+
+        # Only refresh derived data if the bulk operation itself succeeded
+        if exc_type is None:
+            self.refresh()
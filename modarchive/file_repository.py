@@ -1,63 +1,488 @@
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
 import os
+import shutil
+import struct
+import tarfile
 import tempfile
+import threading
+import time
 import zipfile
-import shutil
+import zlib
 
 from django.conf import settings
+from django.core.files.move import file_move_safe
 from django.core.files.uploadedfile import UploadedFile
 
+CHUNK_SIZE = 64 * 1024
+COMPRESSED_DIR_NAME = '.compressed'
+IGNORED_ZIP_FOLDERS = ('__MACOSX/',)
+
+# The compression ratio is only checked for members large enough to matter
+MIN_SIZE_FOR_COMPRESSION_RATIO = 1024 * 1024
+
+ARCHIVE_TOO_MANY_FILES = 'too-many-files'
+ARCHIVE_TOO_LARGE = 'too-large'
+MEMBER_DUPLICATE_NAME = 'duplicate-name'
+MEMBER_SUSPICIOUS_COMPRESSION = 'suspicious-compression'
+MEMBER_UNREADABLE = 'unreadable'
+
+# Zip record layouts, as described in the PKWARE APPNOTE
+LOCAL_FILE_HEADER = struct.Struct('<4s2B4HL2L2H')
+CENTRAL_DIRECTORY_HEADER = struct.Struct('<4s4B4HL2L5H2L')
+END_OF_CENTRAL_DIRECTORY = struct.Struct('<4s4H2LH')
+DATA_DESCRIPTOR_FLAG = 0x08
+UTF8_FILENAME_FLAG = 0x800
+ZIP64_LIMIT = 0xFFFFFFFF
+
+COMPRESSION_METHODS = {
+    'stored': zipfile.ZIP_STORED,
+    'deflated': zipfile.ZIP_DEFLATED,
+    'bzip2': zipfile.ZIP_BZIP2,
+    'lzma': zipfile.ZIP_LZMA,
+}
+# The levels each method accepts; stored has none, and lzma's levels are the xz presets used
+# for solid archives, since zips are always written with lzma's default
+COMPRESSION_LEVELS = {
+    'stored': range(0),
+    'deflated': range(0, 10),
+    'bzip2': range(1, 10),
+    'lzma': range(0, 10),
+}
+SOLID_ARCHIVE_MODES = {
+    'stored': 'w',
+    'deflated': 'w:gz',
+    'bzip2': 'w:bz2',
+    'lzma': 'w:xz',
+}
+
+RECOMPRESSED = 'recompressed'
+NOT_SMALLER = 'not-smaller'
+HASH_MISMATCH = 'hash-mismatch'
+
+class CompressionPolicy:
+    """
+    How module files are compressed into their zips: the zip compression method and its level,
+    where None is the method's default level. Deflate is the only method every unzip tool can
+    read, so the others are best kept for mirrors, which can also be packed into one solid
+    archive with write_solid_archive.
+    """
+    def __init__(self, method='deflated', level=None):
+        if method not in COMPRESSION_METHODS:
+            raise ValueError(f"Unknown compression method '{method}'. Use one of: {', '.join(COMPRESSION_METHODS)}.")
+        levels = COMPRESSION_LEVELS[method]
+        if level is not None and level not in levels:
+            if not levels:
+                raise ValueError(f"The {method} compression method does not take a level.")
+            raise ValueError(f"Invalid {method} compression level {level}. Use {levels[0]} to {levels[-1]}.")
+        self.method = method
+        self.level = level
+
+    @classmethod
+    def from_settings(cls):
+        return cls(settings.ARCHIVE_COMPRESSION_METHOD, settings.ARCHIVE_COMPRESSION_LEVEL)
+
+    @property
+    def compress_type(self):
+        return COMPRESSION_METHODS[self.method]
+
+    def zip_info(self, name, date_time=None):
+        zip_info = zipfile.ZipInfo(name, date_time=date_time or time.localtime()[:6])
+        zip_info.compress_type = self.compress_type
+        # ZipFile.open reads the level of a new member from its ZipInfo
+        zip_info._compresslevel = self.level  # pylint: disable=protected-access
+        zip_info.external_attr = 0o644 << 16
+        return zip_info
+
+    def open_solid_archive(self, path):
+        if self.method == 'stored':
+            return tarfile.open(path, 'w')
+        if self.method == 'lzma':
+            return tarfile.open(path, 'w:xz', preset=self.level)
+        if self.level is None:
+            return tarfile.open(path, SOLID_ARCHIVE_MODES[self.method])
+        return tarfile.open(path, SOLID_ARCHIVE_MODES[self.method], compresslevel=self.level)
+
+class RecompressResult:
+    def __init__(self, path, status, old_size, new_size):
+        self.path = path
+        self.status = status
+        self.old_size = old_size
+        self.new_size = new_size
+
+class FileMoveJournal:
+    """
+    Moves batches of files concurrently and records every move that completed, so that if the
+    database changes that go with the batch fail, rollback() can put the files back.
+    """
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or settings.SCREENING_FILE_MOVE_WORKERS
+        self.completed = []
+        self.lock = threading.Lock()
+
+    def move_all(self, moves):
+        """Moves each (source, destination) pair, and returns the OSError of each move that
+        failed, or None for each that succeeded, in the same order. An existing destination is
+        never overwritten."""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(self.move, moves))
+
+    def move(self, move):
+        source, destination = move
+        try:
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            if os.path.exists(destination):
+                raise FileExistsError(f'{destination} already exists.')
+            shutil.move(source, destination)
+        except OSError as e:
+            return e
+
+        with self.lock:
+            self.completed.append(move)
+        return None
+
+    def rollback(self):
+        for source, destination in reversed(self.completed):
+            shutil.move(destination, source)
+        self.completed.clear()
+
+class ArchiveRejected(Exception):
+    """Raised when an uploaded zip exceeds the limits on its contents and is not extracted."""
+    def __init__(self, reason):
+        super().__init__(reason)
+        self.reason = reason
+
+def is_suspiciously_compressed(member: zipfile.ZipInfo):
+    if member.file_size < MIN_SIZE_FOR_COMPRESSION_RATIO:
+        return False
+    return member.file_size > member.compress_size * settings.UPLOAD_ZIP_MAX_COMPRESSION_RATIO
+
+class IngestedFile:
+    """
+    A single module extracted from an upload. While its bytes were written to the processing
+    directory they were also hashed and compressed, so the raw file at `path` only needs to be
+    read again by modinfo.
+    """
+    def __init__(self, path, zip_path, md5, sha256, size):
+        self.path = path
+        self.zip_path = zip_path
+        self.arcname = os.path.basename(path)
+        self.md5 = md5
+        self.sha256 = sha256
+        self.size = size
+
+    @property
+    def name(self):
+        return os.path.basename(self.path)
+
+    def rename(self, new_name):
+        new_path = os.path.join(os.path.dirname(self.path), new_name)
+        os.rename(self.path, new_path)
+        self.path = new_path
+
 class UploadProcessor:
-    def __init__(self, songfile: UploadedFile):
-        self.songfile = songfile
-        self.unique_temp_dir_path = tempfile.mkdtemp(dir=settings.TEMP_UPLOAD_DIR)
-        self.temp_file_path = os.path.join(self.unique_temp_dir_path, songfile.name)
+    def __init__(self, temp_file_path):
+        self.temp_file_path = temp_file_path
+        self.unique_temp_dir_path = os.path.dirname(temp_file_path)
+        self.compressed_dir_path = os.path.join(self.unique_temp_dir_path, COMPRESSED_DIR_NAME)
+        self.compression = CompressionPolicy.from_settings()
+        self.ingested_files = None
+        # (name, reason) for each zip member that was skipped instead of extracted
+        self.rejected_members = []
 
-        # Save the uploaded file to the temporary directory
-        with open(self.temp_file_path, 'wb') as f:
-            for chunk in songfile.chunks():
-                f.write(chunk)
+    @classmethod
+    def store(cls, songfile: UploadedFile):
+        """Stores the upload in its own processing directory, where it waits to be processed"""
+        temp_file_path = new_processing_path(songfile.name)
 
-    def get_files(self):
-        if zipfile.is_zipfile(self.temp_file_path):
-            with zipfile.ZipFile(self.temp_file_path, 'r') as zip_ref:
-                zip_ref.extractall(self.unique_temp_dir_path)
+        if hasattr(songfile, 'temporary_file_path'):
+            # Large uploads are already on disk, so they are moved rather than copied
+            file_move_safe(songfile.temporary_file_path(), temp_file_path)
+        else:
+            with open(temp_file_path, 'wb') as f:
+                for chunk in songfile.chunks():
+                    f.write(chunk)
+
+        return cls(temp_file_path)
 
+    def get_files(self, max_workers=1):
+        """Returns the uploaded modules as IngestedFile objects, in the order they appear in the
+        upload. Modules inside an uploaded zip are streamed out of it one entry at a time, never
+        fully held in memory, and up to max_workers entries are extracted concurrently."""
+        if self.ingested_files is not None:
+            return self.ingested_files
+
+        os.makedirs(self.compressed_dir_path, exist_ok=True)
+        if zipfile.is_zipfile(self.temp_file_path):
+            self.ingested_files = self.extract_zip(max_workers)
             os.remove(self.temp_file_path)
-            extracted_files = []
-            for file_name in os.listdir(self.unique_temp_dir_path):
-                file_path = os.path.join(self.unique_temp_dir_path, file_name)
-                if os.path.isfile(file_path):
-                    extracted_files.append(file_path)
-            return extracted_files
         else:
-            return [self.temp_file_path]
+            with open(self.temp_file_path, 'rb') as source:
+                self.ingested_files = [self.ingest(read_chunks(source), raw_path=None, name=os.path.basename(self.temp_file_path))]
+
+        return self.ingested_files
 
-    def move_into_new_songs(self, file):
+    def extract_zip(self, max_workers=1):
         """
-        Accepts a file and zips and moves the file from the processing directory to the new files directory
+        Streams the modules out of the uploaded zip. Files in folders are extracted under their
+        own name, while folders, hidden files and macOS resource forks are ignored. The limits on
+        member count and total size are checked against the zip's central directory before
+        anything is extracted, and zipfile never yields more than a member's declared size.
         """
+        # Names that would clash with the upload itself or the compressed copies
+        taken_names = {'', '.', '..', COMPRESSED_DIR_NAME, os.path.basename(self.temp_file_path)}
+        members = []
+        with zipfile.ZipFile(self.temp_file_path, 'r') as zip_ref:
+            for member in zip_ref.infolist():
+                path = member.filename.replace('\\', '/')
+                name = path.rsplit('/', 1)[-1]
+                if member.is_dir() or path.startswith(IGNORED_ZIP_FOLDERS) or name.startswith('.'):
+                    continue
 
-        # Create a zip file with the same name as the original file
-        zip_filename = os.path.join(settings.TEMP_UPLOAD_DIR, f"{os.path.basename(file)}.zip")
-        with zipfile.ZipFile(zip_filename, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            zip_file.write(file, arcname=os.path.basename(file))
+                if name in taken_names:
+                    self.rejected_members.append((name, MEMBER_DUPLICATE_NAME))
+                elif is_suspiciously_compressed(member):
+                    self.rejected_members.append((name, MEMBER_SUSPICIOUS_COMPRESSION))
+                else:
+                    members.append((member, name))
+                taken_names.add(name)
 
-        # Move the zip file to the new files directory
-        final_file_path = os.path.join(settings.NEW_FILE_DIR, f"{os.path.basename(file)}.zip")
-        shutil.move(zip_filename, final_file_path)
+        if len(members) > settings.UPLOAD_ZIP_MAX_FILES:
+            raise ArchiveRejected(ARCHIVE_TOO_MANY_FILES)
+        if sum(member.file_size for member, _ in members) > settings.UPLOAD_ZIP_MAX_UNCOMPRESSED_SIZE:
+            raise ArchiveRejected(ARCHIVE_TOO_LARGE)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(self.extract_member, members))
+
+        ingested_files = []
+        for (_, name), ingested_file in zip(members, results):
+            if ingested_file is None:
+                self.rejected_members.append((name, MEMBER_UNREADABLE))
+            else:
+                ingested_files.append(ingested_file)
+        return ingested_files
+
+    def extract_member(self, member_and_name):
+        member, name = member_and_name
+        try:
+            # Each worker reads through its own handle, since zip files cannot be shared across threads
+            with zipfile.ZipFile(self.temp_file_path, 'r') as zip_ref, zip_ref.open(member) as source:
+                return self.ingest(read_chunks(source), os.path.join(self.unique_temp_dir_path, name))
+        except (zipfile.BadZipFile, zlib.error, RuntimeError, NotImplementedError, EOFError):
+            # Corrupt, encrypted or unsupported members are reported without failing the others
+            return None
+
+    def ingest(self, chunks, raw_path, name=None):
+        """
+        Writes the chunks to raw_path while computing their MD5 and SHA-256 hashes and
+        compressing them into a zip named after the file, all in a single pass. If raw_path
+        is None, the chunks are read from the upload already in the processing directory.
+        """
+        name = name or os.path.basename(raw_path)
+        zip_path = os.path.join(self.compressed_dir_path, f'{name}.zip')
+        md5 = hashlib.md5()
+        sha256 = hashlib.sha256()
+        size = 0
+
+        with contextlib.ExitStack() as stack:
+            raw_file = stack.enter_context(open(raw_path, 'wb')) if raw_path else None
+            zip_file = stack.enter_context(zipfile.ZipFile(zip_path, 'w', self.compression.compress_type))
+            compressed = stack.enter_context(zip_file.open(self.compression.zip_info(name), 'w'))
+            for chunk in chunks:
+                if raw_file:
+                    raw_file.write(chunk)
+                md5.update(chunk)
+                sha256.update(chunk)
+                compressed.write(chunk)
+                size += len(chunk)
+
+        return IngestedFile(raw_path or self.temp_file_path, zip_path, md5.hexdigest(), sha256.hexdigest(), size)
+
+    def move_into_new_songs(self, ingested_file):
+        """
+        Moves the compressed copy of the file into the new files directory
+        """
+        final_file_path = os.path.join(settings.NEW_FILE_DIR, f"{ingested_file.name}.zip")
+        if ingested_file.name != ingested_file.arcname:
+            # The file was renamed after it was compressed, so only the name inside the zip changes
+            rename_zip_member(ingested_file.zip_path, final_file_path, ingested_file.name)
+        else:
+            shutil.move(ingested_file.zip_path, final_file_path)
 
     def remove_processing_directory(self):
-        if os.path.exists(self.unique_temp_dir_path):
-            self.delete_files_in_directory(self.unique_temp_dir_path)
-            os.rmdir(self.unique_temp_dir_path)
-
-    def delete_files_in_directory(self, directory_path):
-        for filename in os.listdir(directory_path):
-            file_path = os.path.join(directory_path, filename)
-            try:
-                if os.path.isfile(file_path) or os.path.islink(file_path):
-                    os.unlink(file_path)
-                elif os.path.isdir(file_path):
-                    os.rmdir(file_path)
-            except Exception as e:
-                print(f"Failed to delete {file_path}. Reason: {e}")
+        shutil.rmtree(self.unique_temp_dir_path, ignore_errors=True)
+
+def new_processing_path(name):
+    """Returns the path an upload called name is stored at while it waits to be processed, in a
+    processing directory of its own."""
+    unique_temp_dir_path = tempfile.mkdtemp(dir=settings.TEMP_UPLOAD_DIR)
+    return os.path.join(unique_temp_dir_path, os.path.basename(name))
+
+def write_chunk(path, offset, source, length, sha256):
+    """
+    Streams length bytes from source into the file at path, starting at offset, while hashing
+    them. Returns False and truncates the file back to offset if fewer bytes arrive or they do
+    not match the SHA-256 hex digest, so the chunk can be sent again.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'r+b') as f:
+        f.seek(offset)
+        remaining = length
+        while remaining and (chunk := source.read(min(CHUNK_SIZE, remaining))):
+            f.write(chunk)
+            digest.update(chunk)
+            remaining -= len(chunk)
+
+        if remaining or digest.hexdigest() != sha256.lower():
+            f.truncate(offset)
+            return False
+    return True
+
+def read_chunks(source, chunk_size=CHUNK_SIZE):
+    while chunk := source.read(chunk_size):
+        yield chunk
+
+def recompress_zip(zip_path, policy: CompressionPolicy, expected_md5, force=False, dry_run=False):
+    """
+    Recompresses every member of the zip at zip_path with the policy, streaming them from the old
+    zip into a new one beside it. The new zip replaces the old one only if the module, its first
+    member, read back from it matches expected_md5, every other member reads back unchanged, and
+    it is smaller or force is set. With dry_run the new zip is built and verified but always
+    discarded.
+    """
+    temp_zip_path = f'{zip_path}.tmp'
+    old_size = os.path.getsize(zip_path)
+    try:
+        copied_md5s = []
+        with zipfile.ZipFile(zip_path, 'r') as source_zip, zipfile.ZipFile(temp_zip_path, 'w', policy.compress_type) as new_zip:
+            members = source_zip.infolist()
+            module_name = members[0].filename
+            for member in members:
+                if member.is_dir():
+                    new_zip.writestr(zipfile.ZipInfo(member.filename, member.date_time), b'')
+                    continue
+                md5 = hashlib.md5()
+                with source_zip.open(member) as source, new_zip.open(policy.zip_info(member.filename, member.date_time), 'w') as destination:
+                    for chunk in read_chunks(source):
+                        md5.update(chunk)
+                        destination.write(chunk)
+                copied_md5s.append((member.filename, md5.hexdigest()))
+
+        with zipfile.ZipFile(temp_zip_path, 'r') as new_zip:
+            read_back_md5s = [(name, get_member_md5(new_zip, name)) for name, _ in copied_md5s]
+
+        new_size = os.path.getsize(temp_zip_path)
+        if dict(read_back_md5s).get(module_name) != expected_md5 or read_back_md5s != copied_md5s:
+            status = HASH_MISMATCH
+        elif new_size >= old_size and not force:
+            status = NOT_SMALLER
+        else:
+            status = RECOMPRESSED
+            if not dry_run:
+                os.replace(temp_zip_path, zip_path)
+        return RecompressResult(zip_path, status, old_size, new_size)
+    finally:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(temp_zip_path)
+
+def get_member_md5(zip_file, name):
+    md5 = hashlib.md5()
+    with zip_file.open(name) as member:
+        for chunk in read_chunks(member):
+            md5.update(chunk)
+    return md5.hexdigest()
+
+def write_solid_archive(entries, path, policy: CompressionPolicy):
+    """
+    Packs modules into a single tar archive compressed as one stream with the policy's method,
+    which compresses far better than a zip per file because similar modules share one
+    dictionary. entries is an iterable of (zip path, name in the tar) pairs. Each module is
+    streamed out of its zip, so memory use does not depend on the size of the archive.
+    """
+    with policy.open_solid_archive(path) as tar_file:
+        for zip_path, name in entries:
+            with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+                member = zip_ref.infolist()[0]
+                tar_info = tarfile.TarInfo(name)
+                tar_info.size = member.file_size
+                tar_info.mtime = time.mktime(member.date_time + (0, 0, -1))
+                tar_info.mode = 0o644
+                with zip_ref.open(member) as module:
+                    tar_file.addfile(tar_info, module)
+
+def rename_zip_member(zip_path, new_zip_path, new_name):
+    """
+    Writes a copy of the zip at zip_path to new_zip_path with its first member renamed to
+    new_name. Only the names in the headers are rewritten: the compressed bytes of every member
+    are copied verbatim in chunks, so nothing is decompressed or recompressed and memory use does
+    not depend on the size of the file. The original zip is left in place for the caller to
+    remove. Extra fields are not copied.
+    """
+    temp_zip_path = f'{new_zip_path}.tmp'
+    try:
+        with zipfile.ZipFile(zip_path, 'r') as zip_ref, open(zip_path, 'rb') as source, open(temp_zip_path, 'wb') as destination:
+            central_directory = []
+            for index, member in enumerate(zip_ref.infolist()):
+                name = new_name if index == 0 else member.filename
+                central_directory.append(copy_zip_member(source, destination, member, name))
+            write_central_directory(destination, central_directory, zip_ref.comment)
+        os.replace(temp_zip_path, new_zip_path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(temp_zip_path)
+        raise
+
+def copy_zip_member(source, destination, member: zipfile.ZipInfo, name):
+    """Copies a member's compressed data into destination under a new local header, and returns
+    its central directory record."""
+    offset = destination.tell()
+    if max(member.compress_size, member.file_size, member.header_offset, offset) >= ZIP64_LIMIT:
+        raise ValueError(f'{member.filename} is too large to be renamed in place.')
+
+    try:
+        encoded_name = name.encode('ascii')
+        flag_bits = member.flag_bits & ~UTF8_FILENAME_FLAG
+    except UnicodeEncodeError:
+        encoded_name = name.encode('utf-8')
+        flag_bits = member.flag_bits | UTF8_FILENAME_FLAG
+    # Sizes and CRC are written in the local header, so no data descriptor follows the data
+    flag_bits &= ~DATA_DESCRIPTOR_FLAG
+    dos_time = member.date_time[3] << 11 | member.date_time[4] << 5 | member.date_time[5] // 2
+    dos_date = (member.date_time[0] - 1980) << 9 | member.date_time[1] << 5 | member.date_time[2]
+
+    # The member's data starts after its local header, whose name and extra field vary in length
+    source.seek(member.header_offset)
+    local_header = LOCAL_FILE_HEADER.unpack(source.read(LOCAL_FILE_HEADER.size))
+    if local_header[0] != b'PK\x03\x04':
+        raise zipfile.BadZipFile(f'Bad local header for {member.filename}.')
+    source.seek(local_header[10] + local_header[11], os.SEEK_CUR)
+
+    destination.write(LOCAL_FILE_HEADER.pack(
+        b'PK\x03\x04', member.extract_version, 0, flag_bits, member.compress_type, dos_time, dos_date,
+        member.CRC, member.compress_size, member.file_size, len(encoded_name), 0
+    ))
+    destination.write(encoded_name)
+
+    remaining = member.compress_size
+    while remaining:
+        chunk = source.read(min(CHUNK_SIZE, remaining))
+        if not chunk:
+            raise zipfile.BadZipFile(f'{member.filename} is truncated.')
+        destination.write(chunk)
+        remaining -= len(chunk)
+
+    return CENTRAL_DIRECTORY_HEADER.pack(
+        b'PK\x01\x02', member.create_version, member.create_system, member.extract_version, member.reserved,
+        flag_bits, member.compress_type, dos_time, dos_date, member.CRC, member.compress_size, member.file_size,
+        len(encoded_name), 0, len(member.comment), 0, member.internal_attr, member.external_attr, offset
+    ) + encoded_name + member.comment
+
+def write_central_directory(destination, records, comment=b''):
+    offset = destination.tell()
+    for record in records:
+        destination.write(record)
+    size = destination.tell() - offset
+    destination.write(END_OF_CENTRAL_DIRECTORY.pack(b'PK\x05\x06', 0, 0, len(records), len(records), size, offset, len(comment)))
+    destination.write(comment)
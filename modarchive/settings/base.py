@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
 from pathlib import Path
+import math
 import os
 
 from django.conf.global_settings import SESSION_COOKIE_AGE
@@ -167,14 +168,87 @@ CRISPY_TEMPLATE_PACK = "bootstrap5"
 MAXIMUM_UPLOAD_SIZE = 10000000
 MAXIMUM_UPLOAD_FILENAME_LENGTH = 59
 UNSUPPORTED_FORMATS = []
+# Uploads sent in chunks: the largest chunk accepted in one request, and how long an unfinished
+# upload is kept after its last chunk before it is removed
+CHUNKED_UPLOAD_MAX_CHUNK_SIZE = 8 * 1024 * 1024
+CHUNKED_UPLOAD_EXPIRY_HOURS = 24
+# Limits on the contents of uploaded zips, checked before anything is extracted
+UPLOAD_ZIP_MAX_FILES = 200
+UPLOAD_ZIP_MAX_UNCOMPRESSED_SIZE = 200000000
+UPLOAD_ZIP_MAX_COMPRESSION_RATIO = 100
+# Number of files in an upload that are extracted and analyzed concurrently
+UPLOAD_ANALYSIS_WORKERS = int(os.getenv('UPLOAD_ANALYSIS_WORKERS', '4'))
+# Seconds modinfo may spend on a single file before it is killed
+MODINFO_TIMEOUT = 30
+# Seconds a worker may spend processing one upload: every file of the largest upload analyzed for
+# the full MODINFO_TIMEOUT, UPLOAD_ANALYSIS_WORKERS at a time, with time to spare for the rest
+UPLOAD_PROCESSING_TIMEOUT = math.ceil(UPLOAD_ZIP_MAX_FILES / UPLOAD_ANALYSIS_WORKERS) * MODINFO_TIMEOUT + 5 * 60
+# Upload jobs still processing this many seconds after they started lost their worker, and are
+# marked failed
+UPLOAD_PROCESSING_STALE_AFTER = UPLOAD_PROCESSING_TIMEOUT + 15 * 60
+# Keep an in-process Bloom filter of known hashes to skip duplicate queries for new files
+UPLOAD_DUPLICATE_BLOOM_FILTER = False
+UPLOAD_DUPLICATE_BLOOM_FILTER_CAPACITY = 1000000
+# Seconds a transaction adding songs may stay open: rows are re-read for this long after they
+# could first have been seen, so one that commits late is still added to the Bloom filter
+UPLOAD_DUPLICATE_BLOOM_FILTER_REFRESH_OVERLAP = 15 * 60
+# Near duplicates of an upload: the least estimated similarity of title and instrument text that
+# counts as a match, the most matches kept, and the closest match at which the upload is flagged
+UPLOAD_SIMILARITY_THRESHOLD = 0.5
+UPLOAD_SIMILARITY_MAX_MATCHES = 10
+UPLOAD_DUPLICATE_FLAG_THRESHOLD = 0.8
+# Archive-wide duplicate scan: songs indexed and compared per chunk of ids, the least estimated
+# similarity that puts two songs in a cluster, and the most songs a pattern hash may be shared by
+# before it is ignored as too common to mean anything
+SONG_DUPLICATE_SCAN_CHUNK_SIZE = 1000
+SONG_DUPLICATE_SIMILARITY_THRESHOLD = 0.8
+SONG_DUPLICATE_MAX_PATTERN_HASH_GROUP = 50
+# Chunks the scheduled duplicate scan compares per run, and the seconds its schedule lets a run
+# take. Computing the signatures of a chunk takes about 12 seconds, so a run fits with room to
+# spare, and the next run carries on where it stopped.
+SONG_DUPLICATE_SCAN_CHUNKS_PER_RUN = 5
+SONG_DUPLICATE_SCAN_TIMEOUT = 10 * 60
+# How module files are compressed into their zips: 'deflated' (the only method every unzip tool
+# reads), 'bzip2', 'lzma' or 'stored', and the method's level (None for its default)
+ARCHIVE_COMPRESSION_METHOD = 'deflated'
+ARCHIVE_COMPRESSION_LEVEL = None
+# Claims on songs in the screening queue are released after this many hours without action
+SCREENING_CLAIM_EXPIRY_HOURS = 48
+# How long the song counts of the screening queue filters are cached, in seconds
+SCREENING_QUEUE_STATS_CACHE_TIMEOUT = 30
+# Approvals of more songs than this run in a worker, with a report page for the results
+SCREENING_BATCH_ASYNC_THRESHOLD = 20
+# Number of files moved concurrently when a batch of songs is approved or rejected
+SCREENING_FILE_MOVE_WORKERS = 8
+# Live updates of open screening pages: how often each stream checks for queue changes and how
+# long it stays open before the browser reconnects, in seconds, how long the browser waits
+# before reconnecting, in milliseconds, and how long queue changes are kept, in hours
+SCREENING_STREAM_POLL_INTERVAL = 1
+SCREENING_STREAM_MAX_DURATION = 300
+SCREENING_STREAM_RETRY_MILLISECONDS = 3000
+SCREENING_QUEUE_CHANGE_RETENTION_HOURS = 24
+# Retention of files nobody needs any more: temporary rejections are deleted along with their
+# files after REJECTED_TEMPORARY_RETENTION_DAYS, the files of other rejections are removed after
+# REJECTED_FILE_RETENTION_DAYS (None keeps them), and processing directories in TEMP_UPLOAD_DIR
+# that no upload uses are removed once untouched for TEMP_UPLOAD_RETENTION_HOURS. Rejections are
+# purged RETENTION_BATCH_SIZE at a time.
+REJECTED_TEMPORARY_RETENTION_DAYS = 30
+REJECTED_FILE_RETENTION_DAYS = None
+TEMP_UPLOAD_RETENTION_HOURS = 24
+RETENTION_BATCH_SIZE = 500
 
 MESSAGE_STORAGE = 'django.contrib.messages.storage.session.SessionStorage'
 
+# How long the viewer-independent fragments of the song page are cached, in seconds
+SONG_PAGE_CACHE_TIMEOUT = 60 * 60
+
 Q_CLUSTER = {
     'name': 'modarchive',
     'workers': 1,
     'timeout': 60,
-    'retry': 120,
+    # Unacknowledged tasks are handed to another worker after this many seconds, so it must
+    # outlast the longest timeout given to a task
+    'retry': max(UPLOAD_PROCESSING_TIMEOUT, SONG_DUPLICATE_SCAN_TIMEOUT) + 60,
     'queue_limit': 50,
     'bulk': 10,
     'orm': 'default',
@@ -15,3 +15,6 @@ NEW_FILE_DIR = tempfile.mkdtemp(prefix='new_files_')
 MAIN_ARCHIVE_DIR = tempfile.mkdtemp(prefix='main_archive_')
 REJECTED_FILE_DIR = tempfile.mkdtemp(prefix='rejected_files_')
 REMOVED_FILE_DIR = tempfile.mkdtemp(prefix='removed_files_')
+
+# Run queued tasks inline so that tests see their results immediately
+Q_CLUSTER = {**Q_CLUSTER, 'sync': True}
@@ -1,12 +1,29 @@
 import logging
-from django.db.models import Sum, Avg
-from artists.models import Artist
+from django.conf import settings
+from artists.stats import refresh_artist_stats
+from interactions.favorites import reconcile_favorite_counts
+from songs.duplicate_clusters import scan_for_duplicates
+from songs.merge import merge_songs
+from songs.models import Song
+from uploads.claims import expire_stale_claims
+from uploads.bulk_screening import run_screening_batch as run_batch
+from uploads.models import ScreeningBatch, UploadJob
+from uploads.processing import fail_stale_upload_jobs, process_upload_job
+from uploads.retention import apply_retention_policies
+from uploads.screening_stream import prune_queue_changes
 
 logger = logging.getLogger(__name__)
 
 def daily_heartbeat():
     logger.info("Daily scheduled job ran successfully.")
 
+def reconcile_favorites():
+    """
+    Fix any song whose favorites_count has drifted from its actual number of favorites.
+    """
+    corrected_count = reconcile_favorite_counts()
+    logger.info(f"Corrected favorites count for {corrected_count} songs.")
+
 def update_artist_stats():
     """
     Update stats for all artists:
@@ -16,40 +33,67 @@ def update_artist_stats():
     - average_song_rating: Average of ratings from all songs by the artist
     - cumulative_song_ratings: Cumulative ratings from all songs by the artist
     """
-    artists = Artist.objects.all()
-    updated_count = 0
+    updated_count = refresh_artist_stats()
 
-    for artist in artists:
-        # Get all songs for this artist
-        songs = artist.songs.all()
+    logger.info(f"Updated stats for {updated_count} artists.")
 
-        # Calculate total songs
-        total_songs = songs.count()
+def merge_song(song_to_merge_from_id, song_to_merge_into_id):
+    """
+    Merge one song into another, for merges queued outside of a request.
+    """
+    song_to_merge_from = Song.objects.get(pk=song_to_merge_from_id)
+    song_to_merge_into = Song.objects.get(pk=song_to_merge_into_id)
+    merge_songs(song_to_merge_from, song_to_merge_into)
+    logger.info(f"Merged song {song_to_merge_from_id} into song {song_to_merge_into_id}.")
 
-        # Calculate total downloads
-        total_downloads_result = songs.aggregate(total=Sum('downloads_count'))
-        total_downloads = total_downloads_result['total'] or 0
+def process_upload(upload_job_id):
+    """
+    Process a stored upload: extract, analyze and check each module, recording the results on the job.
+    """
+    job = UploadJob.objects.get(pk=upload_job_id)
+    process_upload_job(job)
+    logger.info(f"Processed upload job {upload_job_id} with {job.files.count()} files.")
 
-        # Calculate total comments
-        total_comments_result = songs.aggregate(total=Sum('comments_count'))
-        total_comments = total_comments_result['total'] or 0
+def fail_stale_uploads():
+    """
+    Mark upload jobs whose worker was killed while processing them as failed.
+    """
+    failed_count = fail_stale_upload_jobs()
+    logger.info(f"Marked {failed_count} stale upload jobs as failed.")
 
-        # Calculate average rating
-        average_rating_result = songs.aggregate(avg=Avg('average_rating'))
-        average_rating = average_rating_result['avg'] or 0
+def purge_expired_files():
+    """
+    Remove expired temporary rejections, expired rejected files, abandoned chunked uploads and abandoned processing directories.
+    """
+    report = apply_retention_policies()
+    logger.info(str(report))
 
-        # Calculate cumulative song ratings
-        total_ratings_result = songs.aggregate(total=Sum('cumulative_rating'))
-        cumulative_song_ratings = total_ratings_result['total'] or 0
+def expire_screening_claims():
+    """
+    Release claims on songs in the screening queue that have gone without action for too long.
+    """
+    expired_count = expire_stale_claims()
+    logger.info(f"Released {expired_count} expired screening claims.")
 
-        # Update the artist
-        artist.total_songs = total_songs
-        artist.total_downloads = total_downloads
-        artist.total_comments = total_comments
-        artist.cumulative_song_ratings = cumulative_song_ratings
-        artist.average_song_rating = average_rating
-        artist.save()
+def prune_screening_queue_changes():
+    """
+    Remove the screening queue changes that are too old for any open screening page to need.
+    """
+    pruned_count = prune_queue_changes()
+    logger.info(f"Pruned {pruned_count} screening queue changes.")
 
-        updated_count += 1
+def run_screening_batch(screening_batch_id):
+    """
+    Run a bulk screening action queued by a screener, recording the outcome for each song on the batch.
+    """
+    batch = ScreeningBatch.objects.get(pk=screening_batch_id)
+    run_batch(batch)
+    logger.info(f"Ran screening batch {screening_batch_id} for {len(batch.new_song_ids)} songs.")
 
-    logger.info(f"Updated stats for {updated_count} artists.")
+def find_duplicate_songs():
+    """
+    Compare the songs added since the last scan against the archive, a few chunks at a time, and record duplicate clusters.
+    """
+    # Worker processes cannot start processes of their own, so the signatures are computed here
+    scan = scan_for_duplicates(workers=1, max_chunks=settings.SONG_DUPLICATE_SCAN_CHUNKS_PER_RUN)
+    logger.info(f"Duplicate scan reached song {scan.last_song_id}, finding {scan.matches_found} matches and changing {scan.clusters_changed} clusters so far.")
@@ -1,6 +1,27 @@
-from django.test import TestCase
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import zipfile
+from decimal import Decimal
 
+from django.core.files.uploadedfile import SimpleUploadedFile, TemporaryUploadedFile
+from django.test import TestCase, override_settings
+
+from artists.factories import ArtistFactory
+from artists.models import Artist
+from homepage.tests.factories import UserFactory
+from interactions.factories import CommentFactory
+from interactions.models import Comment, Favorite
+from modarchive.bulk_operations import BulkOperation
+from modarchive.file_repository import (
+    ARCHIVE_TOO_LARGE, ARCHIVE_TOO_MANY_FILES, MEMBER_DUPLICATE_NAME, MEMBER_SUSPICIOUS_COMPRESSION,
+    ArchiveRejected, UploadProcessor, rename_zip_member
+)
 from modarchive.hashers import LegacyModArchivePasswordHasher
+from songs.factories import SongFactory
+from songs.models import Song
 
 class LegacyModArchivePasswordHasherTests(TestCase):
     algorithm = 'hmac'
@@ -44,4 +65,298 @@ class LegacyModArchivePasswordHasherTests(TestCase):
         legacy_hasher = LegacyModArchivePasswordHasher()
 
         # Act and Assert
-        self.assertFalse(legacy_hasher.verify('incorrect password', self.encoded), "Expected password to fail validation but it passed")
\ No newline at end of file
+        self.assertFalse(legacy_hasher.verify('incorrect password', self.encoded), "Expected password to fail validation but it passed")
+
+class BulkOperationTests(TestCase):
+    def test_refreshes_derived_data_of_touched_songs_and_artists_on_exit(self):
+        # Arrange
+        song = SongFactory(title='Nightfall')
+        artist = ArtistFactory(songs=(song,))
+        untouched_song = SongFactory(title='Daybreak')
+        profile = UserFactory().profile
+
+        # Act
+        with BulkOperation() as bulk:
+            Comment.objects.bulk_create([Comment(song=song, profile=profile, text='Great', rating=8)])
+            Favorite.objects.bulk_create([Favorite(song=song, profile=profile)])
+            Song.objects.filter(pk__in=[song.pk, untouched_song.pk]).update(title_vector=None)
+            bulk.touch_songs([song.pk])
+
+        # Assert
+        song.refresh_from_db()
+        self.assertEqual(1, song.comments_count)
+        self.assertEqual(1, song.favorites_count)
+        self.assertEqual(Decimal('8.0'), song.average_rating)
+        self.assertIsNotNone(song.title_vector)
+
+        untouched_song.refresh_from_db()
+        self.assertIsNone(untouched_song.title_vector)
+
+        artist.refresh_from_db()
+        self.assertEqual(1, artist.total_songs)
+        self.assertEqual(1, artist.total_comments)
+        self.assertEqual(8, artist.cumulative_song_ratings)
+
+    def test_disables_signals_inside_block(self):
+        # Arrange
+        song = SongFactory()
+
+        # Act
+        with BulkOperation():
+            CommentFactory(song=song, rating=3)
+            song.refresh_from_db()
+
+            # Assert
+            self.assertEqual(0, song.comments_count)
+
+    def test_does_not_refresh_when_block_raises(self):
+        # Arrange
+        song = SongFactory()
+
+        # Act
+        with self.assertRaises(ValueError):
+            with BulkOperation() as bulk:
+                CommentFactory(song=song, rating=3)
+                bulk.touch_songs([song.pk])
+                raise ValueError()
+
+        # Assert
+        song.refresh_from_db()
+        self.assertEqual(0, song.comments_count)
+
+    def test_assigns_unique_random_tokens_to_artists_without_one(self):
+        # Arrange
+        artists = [ArtistFactory(name='Duplicate') for _ in range(3)]
+        Artist.objects.filter(pk__in=[artist.pk for artist in artists]).update(random_token=None)
+
+        # Act
+        with BulkOperation() as bulk:
+            bulk.touch_artists([artist.pk for artist in artists])
+
+        # Assert
+        tokens = set(Artist.objects.filter(name='Duplicate').values_list('random_token', flat=True))
+        self.assertEqual(3, len(tokens))
+        self.assertNotIn(None, tokens)
+
+class UploadProcessorTests(TestCase):
+    song_bytes = b'M.K.' * 5000
+
+    def create_temporary_upload(self, name, data):
+        upload = TemporaryUploadedFile(name, 'application/octet-stream', len(data), None)
+        upload.write(data)
+        upload.seek(0)
+        return upload
+
+    def assert_ingested(self, ingested_file, name, data):
+        self.assertEqual(name, ingested_file.name)
+        self.assertEqual(hashlib.md5(data).hexdigest(), ingested_file.md5)
+        self.assertEqual(hashlib.sha256(data).hexdigest(), ingested_file.sha256)
+        self.assertEqual(len(data), ingested_file.size)
+        with open(ingested_file.path, 'rb') as f:
+            self.assertEqual(data, f.read())
+        with zipfile.ZipFile(ingested_file.zip_path) as zip_file:
+            self.assertEqual([name], zip_file.namelist())
+            self.assertEqual(data, zip_file.read(name))
+
+    def test_moves_temporary_upload_instead_of_copying(self):
+        # Arrange
+        upload = self.create_temporary_upload('song.mod', self.song_bytes)
+        temporary_path = upload.temporary_file_path()
+
+        # Act
+        processor = UploadProcessor.store(upload)
+        files = processor.get_files()
+
+        # Assert
+        self.assertFalse(os.path.exists(temporary_path))
+        self.assertEqual(1, len(files))
+        self.assert_ingested(files[0], 'song.mod', self.song_bytes)
+        upload.close()
+        processor.remove_processing_directory()
+
+    def test_hashes_and_compresses_in_memory_upload(self):
+        # Arrange
+        upload = SimpleUploadedFile('song.mod', self.song_bytes)
+
+        # Act
+        processor = UploadProcessor.store(upload)
+        files = processor.get_files()
+
+        # Assert
+        self.assertEqual(1, len(files))
+        self.assert_ingested(files[0], 'song.mod', self.song_bytes)
+        processor.remove_processing_directory()
+
+    def create_zip_upload(self, entries, compression=zipfile.ZIP_STORED):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', compression) as zip_file:
+            for name, data in entries:
+                zip_file.writestr(name, data)
+        return self.create_temporary_upload('pack.zip', buffer.getvalue())
+
+    def test_streams_zip_entries_including_nested_ones(self):
+        # Arrange
+        other_bytes = b'SCRM' * 100
+        nested_bytes = b'IMPM' * 100
+        upload = self.create_zip_upload([
+            ('song.mod', self.song_bytes),
+            ('other.s3m', other_bytes),
+            ('nested/folder/deep.it', nested_bytes),
+            ('__MACOSX/._song.mod', b'resource fork'),
+            ('.hidden', b'hidden'),
+        ])
+
+        # Act
+        processor = UploadProcessor.store(upload)
+        files = processor.get_files()
+
+        # Assert
+        self.assertEqual(['song.mod', 'other.s3m', 'deep.it'], [ingested_file.name for ingested_file in files])
+        self.assert_ingested(files[0], 'song.mod', self.song_bytes)
+        self.assert_ingested(files[1], 'other.s3m', other_bytes)
+        self.assert_ingested(files[2], 'deep.it', nested_bytes)
+        self.assertEqual([], processor.rejected_members)
+        self.assertFalse(os.path.exists(processor.temp_file_path))
+        upload.close()
+        processor.remove_processing_directory()
+
+    def test_rejects_members_with_duplicate_names(self):
+        # Arrange
+        upload = self.create_zip_upload([('song.mod', self.song_bytes), ('folder/song.mod', b'other')])
+
+        # Act
+        processor = UploadProcessor.store(upload)
+        files = processor.get_files()
+
+        # Assert
+        self.assertEqual(1, len(files))
+        self.assert_ingested(files[0], 'song.mod', self.song_bytes)
+        self.assertEqual([('song.mod', MEMBER_DUPLICATE_NAME)], processor.rejected_members)
+        upload.close()
+        processor.remove_processing_directory()
+
+    @override_settings(UPLOAD_ZIP_MAX_COMPRESSION_RATIO=10)
+    def test_rejects_members_with_suspicious_compression_ratio(self):
+        # Arrange
+        upload = self.create_zip_upload([('bomb.mod', bytes(2 * 1024 * 1024)), ('song.mod', self.song_bytes)], zipfile.ZIP_DEFLATED)
+
+        # Act
+        processor = UploadProcessor.store(upload)
+        files = processor.get_files()
+
+        # Assert
+        self.assertEqual(['song.mod'], [ingested_file.name for ingested_file in files])
+        self.assertEqual([('bomb.mod', MEMBER_SUSPICIOUS_COMPRESSION)], processor.rejected_members)
+        self.assertFalse(os.path.exists(os.path.join(processor.unique_temp_dir_path, 'bomb.mod')))
+        upload.close()
+        processor.remove_processing_directory()
+
+    @override_settings(UPLOAD_ZIP_MAX_FILES=1)
+    def test_rejects_zip_with_too_many_members_before_extracting(self):
+        # Arrange
+        upload = self.create_zip_upload([('song.mod', self.song_bytes), ('other.mod', self.song_bytes)])
+
+        # Act
+        processor = UploadProcessor.store(upload)
+        with self.assertRaises(ArchiveRejected) as context:
+            processor.get_files()
+
+        # Assert
+        self.assertEqual(ARCHIVE_TOO_MANY_FILES, context.exception.reason)
+        self.assertFalse(os.path.exists(os.path.join(processor.unique_temp_dir_path, 'song.mod')))
+        upload.close()
+        processor.remove_processing_directory()
+
+    @override_settings(UPLOAD_ZIP_MAX_UNCOMPRESSED_SIZE=1000)
+    def test_rejects_zip_with_too_much_content_before_extracting(self):
+        # Arrange
+        upload = self.create_zip_upload([('song.mod', self.song_bytes)])
+
+        # Act
+        processor = UploadProcessor.store(upload)
+        with self.assertRaises(ArchiveRejected) as context:
+            processor.get_files()
+
+        # Assert
+        self.assertEqual(ARCHIVE_TOO_LARGE, context.exception.reason)
+        upload.close()
+        processor.remove_processing_directory()
+
+class RenameZipMemberTests(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+
+    def test_renames_member_without_recompressing(self):
+        # Arrange
+        data = os.urandom(1000) + b'M.K.' * 50000
+        zip_path = os.path.join(self.temp_dir, 'old.mod.zip')
+        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+            zip_file.writestr('old.mod', data)
+        with zipfile.ZipFile(zip_path) as zip_file:
+            old_info = zip_file.getinfo('old.mod')
+        new_zip_path = os.path.join(self.temp_dir, 'new.mod.zip')
+
+        # Act
+        rename_zip_member(zip_path, new_zip_path, 'new.mod')
+
+        # Assert
+        self.assertTrue(os.path.exists(zip_path))
+        with zipfile.ZipFile(new_zip_path) as zip_file:
+            self.assertIsNone(zip_file.testzip())
+            self.assertEqual(['new.mod'], zip_file.namelist())
+            new_info = zip_file.getinfo('new.mod')
+            self.assertEqual(data, zip_file.read('new.mod'))
+        self.assertEqual(zipfile.ZIP_DEFLATED, new_info.compress_type)
+        self.assertEqual(old_info.compress_size, new_info.compress_size)
+        self.assertEqual(old_info.CRC, new_info.CRC)
+        self.assertEqual(old_info.date_time, new_info.date_time)
+
+    def test_renames_member_written_with_data_descriptor_to_non_ascii_name(self):
+        # Arrange
+        data = b'IMPM' * 1000
+        buffer = io.BytesIO()
+        # Writing to a stream that cannot seek puts the sizes in a data descriptor
+        with zipfile.ZipFile(UnseekableStream(buffer), 'w', zipfile.ZIP_DEFLATED) as zip_file:
+            zip_file.writestr('old.it', data)
+        zip_path = os.path.join(self.temp_dir, 'old.it.zip')
+        with open(zip_path, 'wb') as f:
+            f.write(buffer.getvalue())
+        new_zip_path = os.path.join(self.temp_dir, 'sång.it.zip')
+
+        # Act
+        rename_zip_member(zip_path, new_zip_path, 'sång.it')
+
+        # Assert
+        with zipfile.ZipFile(new_zip_path) as zip_file:
+            self.assertEqual(['sång.it'], zip_file.namelist())
+            self.assertEqual(data, zip_file.read('sång.it'))
+
+    def test_leaves_no_partial_file_when_zip_is_corrupt(self):
+        # Arrange
+        zip_path = os.path.join(self.temp_dir, 'old.mod.zip')
+        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+            zip_file.writestr('old.mod', b'M.K.' * 1000)
+        with zipfile.ZipFile(zip_path) as zip_file:
+            header_offset = zip_file.getinfo('old.mod').header_offset
+        with open(zip_path, 'r+b') as f:
+            f.seek(header_offset)
+            f.write(b'XXXX')
+        new_zip_path = os.path.join(self.temp_dir, 'new.mod.zip')
+
+        # Act
+        with self.assertRaises(zipfile.BadZipFile):
+            rename_zip_member(zip_path, new_zip_path, 'new.mod')
+
+        # Assert
+        self.assertEqual(['old.mod.zip'], os.listdir(self.temp_dir))
+
+class UnseekableStream:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, data):
+        return self.stream.write(data)
+
+    def flush(self):
+        self.stream.flush()
@@ -0,0 +1,8 @@
+from django.utils import timezone
+
+from songs.models import Song
+
+def invalidate_song_page(song_id):
+    """Discards the song page's cached fragments. They are keyed on the song's update_date, which
+    lives in the database, so moving it on discards them in every process at once."""
+    Song.objects.filter(pk=song_id).update(update_date=timezone.now())
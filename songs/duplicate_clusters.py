@@ -0,0 +1,220 @@
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from songs import similarity
+from songs.models import DuplicateCluster, DuplicateClusterMember, DuplicateScan, Song
+
+# The strongest kind of match a song is kept with when it matched several songs
+MATCH_STRENGTH = {
+    DuplicateClusterMember.MatchTypes.HASH: 2,
+    DuplicateClusterMember.MatchTypes.PATTERN_HASH: 1,
+    DuplicateClusterMember.MatchTypes.SIMILAR_TEXT: 0,
+}
+
+def get_id_ranges(first_id, last_id, chunk_size):
+    """Splits the ids after first_id up to and including last_id into (low, high) ranges, high exclusive."""
+    return [(low, min(low + chunk_size, last_id + 1)) for low in range(first_id + 1, last_id + 1, chunk_size)]
+
+def compute_signatures(rows):
+    """Computes the signature of each (id, title, instrument_text) row. Runs in a worker process."""
+    return [(song_id, *similarity.get_signature(title, instrument_text)) for song_id, title, instrument_text in rows]
+
+def index_signatures(id_ranges, workers=1):
+    """
+    Computes the missing similarity signatures of the songs in the id ranges, chunk by chunk. With
+    more than one worker the signatures are computed in separate processes, since MinHash is pure
+    Python, while the reads and writes stay in this process. Returns the number of songs indexed.
+    """
+    def load(id_range):
+        return list(
+            Song.objects.filter(pk__gte=id_range[0], pk__lt=id_range[1], similarity_signature__isnull=True)
+            .values_list('pk', 'title', 'instrument_text')
+        )
+
+    def save(signatures):
+        Song.objects.bulk_update([
+            Song(pk=song_id, similarity_signature=minhash, similarity_bands=bands)
+            for song_id, minhash, bands in signatures if minhash
+        ], ['similarity_signature', 'similarity_bands'])
+        return len(signatures)
+
+    if workers < 2:
+        return sum(save(compute_signatures(load(id_range))) for id_range in id_ranges)
+
+    indexed = 0
+    ranges = iter(id_ranges)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Only a few chunks are held in memory at a time
+        while window := list(islice(ranges, workers * 2)):
+            for signatures in executor.map(compute_signatures, [load(id_range) for id_range in window]):
+                indexed += save(signatures)
+    return indexed
+
+def find_matches(id_range):
+    """
+    Returns (song_id, other_song_id, match_type, similarity) for every song in the id range and
+    each older song in the archive with the same hash or pattern hash, or an estimated similarity
+    of at least SONG_DUPLICATE_SIMILARITY_THRESHOLD. The candidates for the whole chunk come from
+    one indexed query, and only they are compared.
+    """
+    fields = ('pk', 'hash', 'pattern_hash', 'similarity_signature', 'similarity_bands')
+    songs = list(Song.objects.filter(pk__gte=id_range[0], pk__lt=id_range[1]).values_list(*fields))
+    if not songs:
+        return []
+
+    hashes = {song[1] for song in songs}
+    pattern_hashes = {song[2] for song in songs if song[2]}
+    # A pattern hash shared by very many songs, such as that of an empty module, says nothing
+    pattern_hashes -= set(
+        Song.objects.filter(pattern_hash__in=pattern_hashes).values('pattern_hash').annotate(count=Count('pk'))
+        .filter(count__gt=settings.SONG_DUPLICATE_MAX_PATTERN_HASH_GROUP).values_list('pattern_hash', flat=True)
+    )
+    bands = {band for song in songs for band in song[4] or []}
+
+    condition = Q(hash__in=hashes) | Q(pattern_hash__in=pattern_hashes)
+    if bands:
+        condition |= Q(similarity_bands__overlap=list(bands))
+
+    by_key = {}
+    for candidate in Song.objects.filter(condition).values_list(*fields):
+        keys = [('hash', candidate[1])]
+        if candidate[2] in pattern_hashes:
+            keys.append(('pattern_hash', candidate[2]))
+        keys.extend(('band', band) for band in candidate[4] or [])
+        for key in keys:
+            by_key.setdefault(key, {})[candidate[0]] = candidate
+
+    matches = []
+    for song_id, file_hash, pattern_hash, minhash, song_bands in songs:
+        keys = [('hash', file_hash), ('pattern_hash', pattern_hash)] + [('band', band) for band in song_bands or []]
+        candidates = {}
+        for key in keys:
+            candidates.update(by_key.get(key, {}))
+        # Each pair is recorded once, from the newer song, which is compared in this run or a later one
+        candidates = {other_id: candidate for other_id, candidate in candidates.items() if other_id < song_id}
+
+        for other_id, other_hash, other_pattern_hash, other_minhash, _ in candidates.values():
+            if other_hash == file_hash:
+                matches.append((song_id, other_id, DuplicateClusterMember.MatchTypes.HASH, 1.0))
+            elif pattern_hash and other_pattern_hash == pattern_hash and pattern_hash in pattern_hashes:
+                matches.append((song_id, other_id, DuplicateClusterMember.MatchTypes.PATTERN_HASH, 1.0))
+            else:
+                score = similarity.estimate_similarity(minhash, other_minhash)
+                if score >= settings.SONG_DUPLICATE_SIMILARITY_THRESHOLD:
+                    matches.append((song_id, other_id, DuplicateClusterMember.MatchTypes.SIMILAR_TEXT, score))
+    return matches
+
+class DisjointSet:
+    def __init__(self):
+        self.parents = {}
+
+    def find(self, item):
+        self.parents.setdefault(item, item)
+        root = item
+        while self.parents[root] != root:
+            root = self.parents[root]
+        # Point the path straight at the root, so later finds are quick
+        while self.parents[item] != root:
+            self.parents[item], item = root, self.parents[item]
+        return root
+
+    def union(self, item, other):
+        self.parents[self.find(item)] = self.find(other)
+
+    def groups(self):
+        groups = {}
+        for item in list(self.parents):
+            groups.setdefault(self.find(item), []).append(item)
+        return list(groups.values())
+
+@transaction.atomic
+def update_clusters(matches):
+    """
+    Groups the matched songs into clusters together with the existing clusters they touch. A
+    group that touches no cluster becomes a new one, and one that touches several merges them into
+    the oldest. A cluster that gains songs goes back to pending review. Returns the number of
+    clusters created or changed.
+    """
+    best_matches = {}
+    songs = DisjointSet()
+    for song_id, other_id, match_type, score in matches:
+        songs.union(song_id, other_id)
+        for matched_id in (song_id, other_id):
+            best = best_matches.get(matched_id)
+            if best is None or (MATCH_STRENGTH[match_type], score) > (MATCH_STRENGTH[best[0]], best[1]):
+                best_matches[matched_id] = (match_type, score)
+
+    existing = DuplicateClusterMember.objects.filter(
+        cluster__members__song_id__in=best_matches
+    ).values_list('song_id', 'cluster_id').distinct()
+    cluster_ids = {}
+    for song_id, cluster_id in existing:
+        cluster_ids[song_id] = cluster_id
+        songs.union(song_id, ('cluster', cluster_id))
+
+    changed = 0
+    for group in songs.groups():
+        group_cluster_ids = sorted({item[1] for item in group if isinstance(item, tuple)})
+        new_song_ids = [item for item in group if not isinstance(item, tuple) and item not in cluster_ids]
+        merged_cluster_ids = group_cluster_ids[1:]
+        if not new_song_ids and not merged_cluster_ids:
+            continue
+
+        if group_cluster_ids:
+            cluster = DuplicateCluster.objects.get(pk=group_cluster_ids[0])
+            DuplicateClusterMember.objects.filter(cluster_id__in=merged_cluster_ids).update(cluster=cluster)
+            DuplicateCluster.objects.filter(pk__in=merged_cluster_ids).delete()
+            cluster.status = DuplicateCluster.Statuses.PENDING
+            cluster.reviewed_by = None
+            cluster.save()
+        else:
+            cluster = DuplicateCluster.objects.create()
+
+        DuplicateClusterMember.objects.bulk_create([
+            DuplicateClusterMember(cluster=cluster, song_id=song_id, match_type=best_matches[song_id][0], similarity=best_matches[song_id][1])
+            for song_id in new_song_ids
+        ])
+        changed += 1
+    return changed
+
+def scan_for_duplicates(chunk_size=None, workers=1, full=False, max_chunks=None):
+    """
+    Compares the songs added since the last completed scan, or every song if full is set, against
+    the whole archive, and records the duplicates found as clusters for review. Songs are indexed
+    and compared in chunks of chunk_size ids, and the scan's last_song_id is saved with the
+    clusters of each chunk. A run that stops after max_chunks chunks, or is killed, is resumed by
+    the next one. Returns the DuplicateScan recording the run.
+    """
+    chunk_size = chunk_size or settings.SONG_DUPLICATE_SCAN_CHUNK_SIZE
+    previous = DuplicateScan.objects.order_by('-pk').first()
+    if previous is not None and previous.complete_date is None and not full:
+        scan = previous
+    else:
+        first_song_id = 0 if full or previous is None else previous.last_song_id
+        scan = DuplicateScan.objects.create(first_song_id=first_song_id, last_song_id=first_song_id)
+
+    # A song is only compared with the songs before it, so each chunk can be compared as soon as
+    # it is indexed. Chunks are indexed a few at a time to keep the worker processes busy.
+    id_ranges = get_id_ranges(scan.last_song_id, Song.objects.aggregate(last_id=Max('pk'))['last_id'] or 0, chunk_size)
+    to_scan = id_ranges[:max_chunks] if max_chunks is not None else id_ranges
+    batch_size = workers * 2 if workers > 1 else 1
+    for start in range(0, len(to_scan), batch_size):
+        batch = to_scan[start:start + batch_size]
+        scan.songs_indexed += index_signatures(batch, workers)
+        for id_range in batch:
+            matches = find_matches(id_range)
+            with transaction.atomic():
+                scan.matches_found += len(matches)
+                scan.clusters_changed += update_clusters(matches)
+                scan.last_song_id = id_range[1] - 1
+                scan.save()
+
+    if len(to_scan) == len(id_ranges):
+        scan.complete_date = timezone.now()
+        scan.save()
+    return scan
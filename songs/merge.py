@@ -0,0 +1,134 @@
+import os
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from artists.models import Artist, ArtistSong
+from artists.stats import refresh_artist_stats
+from interactions.models import Comment, Favorite
+from songs.models import Song, SongRedirect
+from songs.stats import refresh_song_stats
+from uploads.models import ArchivedScreeningEvent, RejectedSong
+
+# A profile "owns" the target song if it belongs to one of its artists. Artists are merged
+# first, so this also covers artists that came from the source song.
+_OWNS_TARGET_SONG = f"""
+    EXISTS (
+        SELECT 1 FROM {ArtistSong._meta.db_table} artist_song
+        INNER JOIN {Artist._meta.db_table} artist ON artist.id = artist_song.artist_id
+        WHERE artist_song.song_id = %(into_id)s AND artist.profile_id = moved.profile_id
+    )
+"""
+
+MERGE_ARTISTS_SQL = f"""
+    INSERT INTO {ArtistSong._meta.db_table} (artist_id, song_id)
+    SELECT artist_id, %(into_id)s FROM {ArtistSong._meta.db_table} WHERE song_id = %(from_id)s
+    ON CONFLICT (artist_id, song_id) DO NOTHING
+"""
+
+MERGE_FAVORITES_SQL = f"""
+    UPDATE {Favorite._meta.db_table} moved SET song_id = %(into_id)s
+    WHERE moved.song_id = %(from_id)s
+    AND NOT {_OWNS_TARGET_SONG}
+    AND NOT EXISTS (
+        SELECT 1 FROM {Favorite._meta.db_table} existing
+        WHERE existing.song_id = %(into_id)s AND existing.profile_id = moved.profile_id
+    )
+"""
+
+# Anonymous comments cannot belong to an artist or conflict with another comment, so they always move
+MERGE_COMMENTS_SQL = f"""
+    UPDATE {Comment._meta.db_table} moved SET song_id = %(into_id)s
+    WHERE moved.song_id = %(from_id)s
+    AND (moved.profile_id IS NULL OR (
+        NOT {_OWNS_TARGET_SONG}
+        AND NOT EXISTS (
+            SELECT 1 FROM {Comment._meta.db_table} existing
+            WHERE existing.song_id = %(into_id)s AND existing.profile_id = moved.profile_id
+        )
+    ))
+"""
+
+# Whatever was not moved is discarded in bulk, bypassing the per-comment stats signals
+DELETE_LEFTOVERS_SQL = [
+    f"DELETE FROM {Favorite._meta.db_table} WHERE song_id = %(from_id)s",
+    f"DELETE FROM {Comment._meta.db_table} WHERE song_id = %(from_id)s",
+]
+
+def should_merge_featured(song_to_merge_from, song_to_merge_into):
+    return song_to_merge_from.is_featured and (
+        song_to_merge_into.featured_date is None or song_to_merge_from.featured_date < song_to_merge_into.featured_date
+    )
+
+@transaction.atomic
+def merge_songs(song_to_merge_from: Song, song_to_merge_into: Song):
+    """
+    Merges one song into another in a single transaction: artists, favorites, comments,
+    downloads, featured state and existing redirects move to the target song, the source
+    song is recorded as a rejected duplicate and removed, and its file is moved into the
+    removed files folder. The number of statements does not depend on how many favorites
+    or comments either song has.
+    """
+    params = {'from_id': song_to_merge_from.pk, 'into_id': song_to_merge_into.pk}
+
+    with connection.cursor() as cursor:
+        cursor.execute(MERGE_ARTISTS_SQL, params)
+        cursor.execute(MERGE_FAVORITES_SQL, params)
+        cursor.execute(MERGE_COMMENTS_SQL, params)
+        for sql in DELETE_LEFTOVERS_SQL:
+            cursor.execute(sql, params)
+
+    target_updates = {'downloads_count': F('downloads_count') + song_to_merge_from.downloads_count}
+    if should_merge_featured(song_to_merge_from, song_to_merge_into):
+        target_updates.update(
+            is_featured=True,
+            featured_date=song_to_merge_from.featured_date,
+            featured_by_id=song_to_merge_from.featured_by_id
+        )
+    target = Song.objects.filter(pk=song_to_merge_into.pk)
+    target.update(update_date=timezone.now(), **target_updates)
+    refresh_song_stats(target)
+    refresh_artist_stats(Artist.objects.filter(artistsong__song_id=song_to_merge_into.pk))
+
+    # Songs that were previously merged into the source song now point at the target
+    SongRedirect.objects.filter(song_id=song_to_merge_from.pk).update(song_id=song_to_merge_into.pk)
+    SongRedirect.objects.create(
+        old_song_id=song_to_merge_from.id,
+        song_id=song_to_merge_into.id
+    )
+
+    rejected_song = RejectedSong.objects.create(
+        reason=RejectedSong.Reasons.ALREADY_EXISTS,
+        message=f'TIDY-UP MERGED. {song_to_merge_from.filename} already exists as {song_to_merge_into.filename} on the archive.',
+        hash=song_to_merge_from.hash,
+        pattern_hash=song_to_merge_from.pattern_hash,
+        similarity_signature=song_to_merge_from.similarity_signature,
+        similarity_bands=song_to_merge_from.similarity_bands,
+        filename=song_to_merge_from.filename,
+        filename_unzipped=song_to_merge_from.filename_unzipped,
+        title=song_to_merge_from.title,
+        format=song_to_merge_from.format,
+        file_size=song_to_merge_from.file_size,
+        channels=song_to_merge_from.channels,
+        comment_text=song_to_merge_from.comment_text,
+        instrument_text=song_to_merge_from.instrument_text,
+        uploader_profile_id=song_to_merge_from.uploaded_by_id,
+        is_by_uploader=False,
+        rejected_date=timezone.now(),
+        create_date=song_to_merge_from.create_date
+    )
+
+    # The source song's screening history stays with the rejection that replaces it
+    ArchivedScreeningEvent.objects.filter(song_id=song_to_merge_from.pk).update(song=None, rejected_song=rejected_song)
+
+    song_to_merge_from.delete()
+
+    # Moving the file is the last step, so a failure here rolls back every database change
+    source_path = song_to_merge_from.get_archive_path()
+    destination_path = os.path.join(settings.REMOVED_FILE_DIR, f'{song_to_merge_from.filename}.zip')
+    os.rename(source_path, destination_path)
+
+    song_to_merge_into.refresh_from_db()
+    return song_to_merge_into
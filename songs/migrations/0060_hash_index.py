@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-19 17:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('songs', '0059_alter_song_cumulative_rating'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='song',
+            name='hash',
+            field=models.CharField(db_index=True, max_length=33),
+        ),
+    ]
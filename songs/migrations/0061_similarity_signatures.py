@@ -0,0 +1,35 @@
+# Generated by Django 5.1.6 on 2026-10-19 17:40
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('homepage', '0019_message_thread_starter'),
+        ('songs', '0060_hash_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='song',
+            name='similarity_bands',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), blank=True, null=True, size=None),
+        ),
+        migrations.AddField(
+            model_name='song',
+            name='similarity_signature',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), blank=True, null=True, size=None),
+        ),
+        migrations.AlterField(
+            model_name='song',
+            name='pattern_hash',
+            field=models.CharField(blank=True, db_index=True, max_length=16, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='song',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['similarity_bands'], name='song_similarity_bands_idx'),
+        ),
+    ]
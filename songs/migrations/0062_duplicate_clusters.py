@@ -0,0 +1,58 @@
+# Generated by Django 5.1.6 on 2026-10-19 17:44
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('homepage', '0019_message_thread_starter'),
+        ('songs', '0061_similarity_signatures'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DuplicateScan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_song_id', models.PositiveIntegerField(default=0)),
+                ('last_song_id', models.PositiveIntegerField(default=0)),
+                ('songs_indexed', models.PositiveIntegerField(default=0)),
+                ('matches_found', models.PositiveIntegerField(default=0)),
+                ('clusters_changed', models.PositiveIntegerField(default=0)),
+                ('start_date', models.DateTimeField(default=django.utils.timezone.now)),
+                ('complete_date', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'songs_duplicate_scan',
+            },
+        ),
+        migrations.CreateModel(
+            name='DuplicateCluster',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending review'), ('confirmed', 'Confirmed duplicates'), ('dismissed', 'Not duplicates')], db_index=True, default='pending', max_length=16)),
+                ('create_date', models.DateTimeField(default=django.utils.timezone.now)),
+                ('update_date', models.DateTimeField(auto_now=True)),
+                ('reviewed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reviewed_duplicate_clusters', to='homepage.profile')),
+            ],
+            options={
+                'db_table': 'songs_duplicate_cluster',
+            },
+        ),
+        migrations.CreateModel(
+            name='DuplicateClusterMember',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('match_type', models.CharField(choices=[('hash', 'Identical file'), ('pattern-hash', 'Identical patterns'), ('similar-text', 'Similar title and instruments')], max_length=16)),
+                ('similarity', models.FloatField()),
+                ('cluster', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='members', to='songs.duplicatecluster')),
+                ('song', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='duplicate_cluster_member', to='songs.song')),
+            ],
+            options={
+                'db_table': 'songs_duplicate_cluster_member',
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.6 on 2026-10-19 21:30
+
+from django.db import migrations
+
+SCHEDULE_NAME = 'Find duplicate songs'
+
+def run_hourly(apps, schema_editor):
+    Schedule = apps.get_model('django_q', 'Schedule')
+    Schedule.objects.filter(name=SCHEDULE_NAME).update(schedule_type='H')
+
+def run_daily(apps, schema_editor):
+    Schedule = apps.get_model('django_q', 'Schedule')
+    Schedule.objects.filter(name=SCHEDULE_NAME).update(schedule_type='D')
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('songs', '0063_duplicate_scan_schedule'),
+        ('django_q', '0019_alter_task_options_alter_ormq_key_alter_ormq_lock_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_hourly, run_daily),
+    ]
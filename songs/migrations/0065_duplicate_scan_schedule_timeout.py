@@ -0,0 +1,28 @@
+# Generated by Django 5.1.6 on 2026-10-19 22:40
+
+from django.conf import settings
+from django.db import migrations
+
+SCHEDULE_NAME = 'Find duplicate songs'
+
+def set_timeout(apps, schema_editor):
+    # The scheduler queues each run with these options, overriding the cluster's 60 second timeout
+    Schedule = apps.get_model('django_q', 'Schedule')
+    Schedule.objects.filter(name=SCHEDULE_NAME).update(
+        kwargs=f"q_options={{'timeout': {settings.SONG_DUPLICATE_SCAN_TIMEOUT}}}"
+    )
+
+def clear_timeout(apps, schema_editor):
+    Schedule = apps.get_model('django_q', 'Schedule')
+    Schedule.objects.filter(name=SCHEDULE_NAME).update(kwargs=None)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('songs', '0064_hourly_duplicate_scan_schedule'),
+        ('django_q', '0019_alter_task_options_alter_ormq_key_alter_ormq_lock_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(set_timeout, clear_timeout),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
+from django.contrib.postgres.fields import ArrayField
 from django.contrib.postgres.search import SearchVectorField
 from django.contrib.postgres.indexes import GinIndex
 from django.core.exceptions import ValidationError
@@ -147,8 +148,11 @@ class Song(models.Model):
     channels=models.PositiveSmallIntegerField()
     instrument_text=models.TextField(max_length=64000, blank=True, null=True)
     comment_text=models.TextField(max_length=64000, blank=True, null=True)
-    hash=models.CharField(max_length=33)
-    pattern_hash=models.CharField(max_length=16, null=True, blank=True)
+    hash=models.CharField(max_length=33, db_index=True)
+    pattern_hash=models.CharField(max_length=16, null=True, blank=True, db_index=True)
+    # MinHash signature of the title and instrument text, and its LSH bands (see songs.similarity)
+    similarity_signature=ArrayField(models.BigIntegerField(), null=True, blank=True)
+    similarity_bands=ArrayField(models.BigIntegerField(), null=True, blank=True)
     license=models.CharField(max_length=16, choices=Licenses.choices, null=True, blank=True)
     genre=models.CharField(choices=Genres.choices, null=True, blank=True, db_index=True, max_length=32)
     is_featured=models.BooleanField(null=True, blank=True, db_index=True)
@@ -200,7 +204,8 @@ class Song(models.Model):
 
     class Meta:
         indexes = [
-            GinIndex(fields=['title_vector', 'instrument_text_vector', 'comment_text_vector'])
+            GinIndex(fields=['title_vector', 'instrument_text_vector', 'comment_text_vector']),
+            GinIndex(fields=['similarity_bands'], name='song_similarity_bands_idx'),
         ]
 
     def __str__(self) -> str:
@@ -224,3 +229,52 @@ class SongRedirect(models.Model):
     def save(self, *args, **kwargs):
         self.full_clean()
         super().save(*args, **kwargs)
+
+class DuplicateCluster(models.Model):
+    """A group of songs in the archive that the duplicate scan found to be copies or near copies
+    of each other, for a screener to review."""
+    class Meta:
+        db_table = 'songs_duplicate_cluster'
+
+    class Statuses(models.TextChoices):
+        PENDING = 'pending', _('Pending review')
+        CONFIRMED = 'confirmed', _('Confirmed duplicates')
+        DISMISSED = 'dismissed', _('Not duplicates')
+
+    status=models.CharField(max_length=16, choices=Statuses.choices, default=Statuses.PENDING, db_index=True)
+    reviewed_by=models.ForeignKey(Profile, on_delete=models.SET_NULL, null=True, blank=True, related_name='reviewed_duplicate_clusters')
+    create_date=models.DateTimeField(default=timezone.now)
+    update_date=models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"Duplicate cluster {self.pk}"
+
+class DuplicateClusterMember(models.Model):
+    """A song in a duplicate cluster, with the strongest match that put it there."""
+    class Meta:
+        db_table = 'songs_duplicate_cluster_member'
+
+    class MatchTypes(models.TextChoices):
+        HASH = 'hash', _('Identical file')
+        PATTERN_HASH = 'pattern-hash', _('Identical patterns')
+        SIMILAR_TEXT = 'similar-text', _('Similar title and instruments')
+
+    cluster=models.ForeignKey(DuplicateCluster, on_delete=models.CASCADE, related_name='members')
+    song=models.OneToOneField(Song, on_delete=models.CASCADE, related_name='duplicate_cluster_member')
+    match_type=models.CharField(max_length=16, choices=MatchTypes.choices)
+    similarity=models.FloatField()
+
+class DuplicateScan(models.Model):
+    """A run of the duplicate scan. Songs up to last_song_id were compared against the archive,
+    so the next run only compares the songs added since. A scan without a complete_date stopped
+    partway, and the next run carries it on from last_song_id."""
+    class Meta:
+        db_table = 'songs_duplicate_scan'
+
+    first_song_id=models.PositiveIntegerField(default=0)
+    last_song_id=models.PositiveIntegerField(default=0)
+    songs_indexed=models.PositiveIntegerField(default=0)
+    matches_found=models.PositiveIntegerField(default=0)
+    clusters_changed=models.PositiveIntegerField(default=0)
+    start_date=models.DateTimeField(default=timezone.now)
+    complete_date=models.DateTimeField(null=True, blank=True)
@@ -1,7 +1,9 @@
 from django.dispatch import receiver
 from django.db.models.signals import post_save, post_delete
 
-from interactions.models import Comment
+from artists.models import ArtistSong
+from interactions.models import ArtistComment, Comment, Favorite, LegacyReview
+from songs.caching import invalidate_song_page
 from songs.models import Song
 
 @receiver(post_save, sender=Comment)
@@ -12,6 +14,20 @@ def update_song_stats_after_save(_sender=None, instance=None, **kwargs):
 def update_song_stats_after_delete(_sender=None, instance=None, **kwargs):
     update_song_stats(instance.song)
 
+# Changes to anything rendered in the song page's cached fragments discard them
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+@receiver(post_save, sender=ArtistSong)
+@receiver(post_delete, sender=ArtistSong)
+@receiver(post_save, sender=ArtistComment)
+@receiver(post_delete, sender=ArtistComment)
+@receiver(post_save, sender=LegacyReview)
+@receiver(post_delete, sender=LegacyReview)
+def invalidate_song_page_after_change(_sender=None, instance=None, **kwargs):
+    invalidate_song_page(instance.song_id)
+
 def update_song_stats(song):
     if not Song.objects.filter(pk=song.pk).exists():
         return
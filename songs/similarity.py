@@ -0,0 +1,73 @@
+import hashlib
+import random
+import re
+
+# MinHash signatures have PERMUTATIONS values. For locality-sensitive hashing they are cut into
+# BANDS bands of ROWS_PER_BAND values, and two songs become candidates if any band is identical.
+# With 16 bands of 4 rows, songs with a similarity of 0.5 are found about 64% of the time and
+# songs with a similarity of 0.8 more than 99% of the time.
+PERMUTATIONS = 64
+BANDS = 16
+ROWS_PER_BAND = PERMUTATIONS // BANDS
+
+SHINGLE_LENGTH = 5
+# Below this many shingles the text says too little about a song to compare it
+MIN_SHINGLES = 8
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+# The permutations must never change, or stored signatures could not be compared to new ones
+_generator = random.Random(20240601)
+PERMUTATION_PARAMETERS = [
+    (_generator.randrange(1, MERSENNE_PRIME), _generator.randrange(0, MERSENNE_PRIME))
+    for _ in range(PERMUTATIONS)
+]
+
+def normalize_text(text):
+    return ' '.join(re.findall(r'[a-z0-9]+', (text or '').lower()))
+
+def get_shingles(title, instrument_text):
+    """Returns the set of overlapping character sequences in the normalized title and
+    instrument text, which is what the similarity of two songs is measured over."""
+    text = ' '.join(part for part in (normalize_text(title), normalize_text(instrument_text)) if part)
+    return {text[i:i + SHINGLE_LENGTH] for i in range(len(text) - SHINGLE_LENGTH + 1)}
+
+def hash_shingle(shingle):
+    return int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=4).digest(), 'little')
+
+def get_minhash(shingles):
+    hashes = [hash_shingle(shingle) for shingle in shingles]
+    return [
+        min(((a * value + b) % MERSENNE_PRIME) & MAX_HASH for value in hashes)
+        for a, b in PERMUTATION_PARAMETERS
+    ]
+
+def get_bands(minhash):
+    """Returns one value per band of the signature. The band number is part of each value, so
+    the values of all bands can be stored in a single indexed array and matched by overlap."""
+    bands = []
+    for band in range(BANDS):
+        rows = minhash[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(repr((band, rows)).encode(), digest_size=8).digest()
+        bands.append(int.from_bytes(digest, 'little', signed=True))
+    return bands
+
+def get_signature(title, instrument_text):
+    """Returns the MinHash signature and LSH bands of a song's text, or (None, None) if there is
+    too little text to compare."""
+    shingles = get_shingles(title, instrument_text)
+    if len(shingles) < MIN_SHINGLES:
+        return None, None
+    minhash = get_minhash(shingles)
+    return minhash, get_bands(minhash)
+
+def estimate_similarity(minhash, other_minhash):
+    """Estimates the Jaccard similarity of the shingles of two songs from their signatures."""
+    if not minhash or not other_minhash:
+        return 0.0
+    return sum(1 for value, other_value in zip(minhash, other_minhash) if value == other_value) / PERMUTATIONS
+
+def set_signature(song):
+    """Sets the similarity fields of a Song, NewSong or RejectedSong from its text, without saving it."""
+    song.similarity_signature, song.similarity_bands = get_signature(song.title, song.instrument_text)
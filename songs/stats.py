@@ -0,0 +1,58 @@
+from django.db.models import Count, Avg, Sum, OuterRef, Subquery, DecimalField, IntegerField
+from django.db.models.functions import Cast, Coalesce
+
+from interactions.models import Comment, Favorite
+from songs.models import Song
+
+STAT_FIELDS = ['comments_count', 'favorites_count', 'average_rating', 'cumulative_rating']
+
+def _grouped_subquery(model, aggregate, output_field):
+    """Builds a correlated subquery that aggregates a single relation of the outer song.
+
+    Each relation is aggregated on its own, so favorites and comments are never joined
+    against each other."""
+    return Subquery(
+        model.objects.filter(song_id=OuterRef('pk'))
+            .order_by()
+            .values('song_id')
+            .annotate(value=aggregate)
+            .values('value'),
+        output_field=output_field
+    )
+
+def song_stats_expressions():
+    """Returns a mapping of Song stat field to the expression that recalculates it."""
+    return {
+        'comments_count': Coalesce(_grouped_subquery(Comment, Count('pk'), IntegerField()), 0),
+        'favorites_count': Coalesce(_grouped_subquery(Favorite, Count('pk'), IntegerField()), 0),
+        'average_rating': Cast(
+            _grouped_subquery(Comment, Avg('rating'), DecimalField()),
+            DecimalField(max_digits=3, decimal_places=1)
+        ),
+        'cumulative_rating': Coalesce(_grouped_subquery(Comment, Sum('rating'), IntegerField()), 0),
+    }
+
+def refresh_song_stats(queryset=None):
+    """Recalculates the stats of every song in the queryset with a single UPDATE statement.
+    Returns the number of songs updated."""
+    if queryset is None:
+        queryset = Song.objects.all()
+
+    return queryset.order_by().update(**song_stats_expressions())
+
+def get_song_stats_differences(queryset=None):
+    """Returns a list of (song_id, field, current value, recalculated value) for every stat
+    that is out of date, without writing anything."""
+    if queryset is None:
+        queryset = Song.objects.all()
+
+    expressions = song_stats_expressions()
+    annotations = {f'new_{field}': expression for field, expression in expressions.items()}
+    rows = queryset.order_by('pk').annotate(**annotations).values('pk', *STAT_FIELDS, *annotations)
+
+    differences = []
+    for row in rows:
+        for field in STAT_FIELDS:
+            if row[field] != row[f'new_{field}']:
+                differences.append((row['pk'], field, row[field], row[f'new_{field}']))
+    return differences
@@ -0,0 +1,168 @@
+import ast
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from django_q.models import Schedule
+
+from songs import similarity
+from songs.duplicate_clusters import scan_for_duplicates
+from songs.factories import SongFactory
+from songs.models import DuplicateCluster, DuplicateClusterMember, DuplicateScan, Song
+
+INSTRUMENTS = '\n'.join([
+    'composed by someone in 1994', 'bassdrum', 'snare 808', 'hihat closed', 'hihat open',
+    'strings slow attack', 'lead synth square', 'pad warm', 'greetings to everyone on the board',
+])
+
+class ScanForDuplicatesTests(TestCase):
+    def make_song(self, title='Unrelated song', instrument_text='', pattern_hash='', file_hash=None):
+        # Each song gets a file and text of its own unless told otherwise
+        return SongFactory(
+            title=title,
+            instrument_text=instrument_text or f'{title} sample list',
+            pattern_hash=pattern_hash,
+            hash=file_hash or f'{title} {Song.objects.count()}'
+        )
+
+    def get_clusters(self):
+        return [
+            sorted(cluster.members.values_list('song_id', flat=True))
+            for cluster in DuplicateCluster.objects.order_by('pk')
+        ]
+
+    def test_clusters_songs_by_hash_pattern_hash_and_similar_text(self):
+        # Arrange
+        original = self.make_song('Space Trip', INSTRUMENTS)
+        copy = self.make_song('Space Trip (remix)', INSTRUMENTS.replace('1994', '1995'))
+        same_file = self.make_song('First upload', file_hash='samehash')
+        same_file_again = self.make_song('Second upload', file_hash='samehash')
+        same_patterns = self.make_song('Patterns one', pattern_hash='0123456789abcdef')
+        same_patterns_again = self.make_song('Patterns two', pattern_hash='0123456789abcdef')
+        self.make_song('Chip Tune', 'kick\nsnare\nbass\nthanks for listening to this little chiptune')
+
+        # Act
+        scan = scan_for_duplicates(chunk_size=2)
+
+        # Assert
+        self.assertEqual(
+            [[original.id, copy.id], [same_file.id, same_file_again.id], [same_patterns.id, same_patterns_again.id]],
+            self.get_clusters()
+        )
+        self.assertEqual(3, scan.matches_found)
+        self.assertEqual(
+            DuplicateClusterMember.MatchTypes.SIMILAR_TEXT,
+            DuplicateClusterMember.objects.get(song=copy).match_type
+        )
+        self.assertEqual(
+            DuplicateClusterMember.MatchTypes.HASH,
+            DuplicateClusterMember.objects.get(song=same_file_again).match_type
+        )
+        self.assertIsNotNone(Song.objects.get(pk=original.pk).similarity_signature)
+
+    def test_next_scan_only_compares_songs_added_since(self):
+        # Arrange
+        original = self.make_song('Space Trip', INSTRUMENTS)
+        copy = self.make_song('Space Trip', INSTRUMENTS)
+        scan_for_duplicates()
+        cluster = DuplicateCluster.objects.get()
+        cluster.status = DuplicateCluster.Statuses.DISMISSED
+        cluster.save()
+        another_copy = self.make_song('Space Trip', INSTRUMENTS)
+
+        # Act
+        scan = scan_for_duplicates()
+
+        # Assert
+        self.assertEqual(copy.id, scan.first_song_id)
+        self.assertEqual(1, scan.songs_indexed)
+        self.assertEqual([[original.id, copy.id, another_copy.id]], self.get_clusters())
+        self.assertEqual(DuplicateCluster.Statuses.PENDING, DuplicateCluster.objects.get().status)
+
+    def test_rescan_without_new_songs_keeps_review(self):
+        # Arrange
+        self.make_song('Space Trip', INSTRUMENTS)
+        self.make_song('Space Trip', INSTRUMENTS)
+        scan_for_duplicates()
+        DuplicateCluster.objects.update(status=DuplicateCluster.Statuses.DISMISSED)
+
+        # Act
+        scan = scan_for_duplicates(full=True)
+
+        # Assert
+        self.assertEqual(0, scan.clusters_changed)
+        self.assertEqual(DuplicateCluster.Statuses.DISMISSED, DuplicateCluster.objects.get().status)
+
+    def test_song_matching_two_clusters_merges_them(self):
+        # Arrange
+        first = self.make_song('First upload', file_hash='firsthash')
+        first_copy = self.make_song('First copy', file_hash='firsthash')
+        second = self.make_song('Second upload', pattern_hash='0123456789abcdef')
+        second_copy = self.make_song('Second copy', pattern_hash='0123456789abcdef')
+        scan_for_duplicates()
+        first_cluster = DuplicateCluster.objects.order_by('pk').first()
+        bridge = self.make_song('Bridge', file_hash='firsthash', pattern_hash='0123456789abcdef')
+
+        # Act
+        scan_for_duplicates()
+
+        # Assert
+        self.assertEqual([[first.id, first_copy.id, second.id, second_copy.id, bridge.id]], self.get_clusters())
+        self.assertEqual(first_cluster.pk, DuplicateCluster.objects.get().pk)
+
+    def test_run_stopped_after_max_chunks_is_resumed_by_next_run(self):
+        # Arrange
+        original = self.make_song('Space Trip', INSTRUMENTS)
+        self.make_song('Chip Tune')
+        self.make_song('Another Tune')
+        copy = self.make_song('Space Trip', INSTRUMENTS)
+        DuplicateScan.objects.create(last_song_id=original.id - 1, complete_date=timezone.now())
+
+        # Act
+        stopped_scan = scan_for_duplicates(chunk_size=1, max_chunks=2)
+        stopped_clusters = self.get_clusters()
+        resumed_scan = scan_for_duplicates(chunk_size=1, max_chunks=2)
+
+        # Assert
+        self.assertIsNone(stopped_scan.complete_date)
+        self.assertEqual(original.id + 1, stopped_scan.last_song_id)
+        self.assertEqual([], stopped_clusters)
+        self.assertEqual(stopped_scan.pk, resumed_scan.pk)
+        self.assertEqual(copy.id, resumed_scan.last_song_id)
+        self.assertIsNotNone(resumed_scan.complete_date)
+        self.assertEqual(4, resumed_scan.songs_indexed)
+        self.assertEqual([[original.id, copy.id]], self.get_clusters())
+
+    def test_command_computes_signatures_in_worker_processes(self):
+        # Arrange
+        original = self.make_song('Space Trip', INSTRUMENTS)
+        copy = self.make_song('Space Trip', INSTRUMENTS)
+        out = StringIO()
+
+        # Act
+        call_command('find_duplicate_songs', '--workers', '2', '--chunk-size', '1', stdout=out)
+
+        # Assert
+        self.assertEqual([[original.id, copy.id]], self.get_clusters())
+        self.assertEqual(
+            similarity.get_signature('Space Trip', INSTRUMENTS)[0],
+            Song.objects.get(pk=original.pk).similarity_signature
+        )
+        self.assertIn('1 matches', out.getvalue())
+        self.assertTrue(DuplicateScan.objects.get().complete_date)
+
+class DuplicateScanScheduleTests(TestCase):
+    def test_schedule_queues_runs_with_its_own_timeout(self):
+        # Arrange
+        schedule = Schedule.objects.get(name='Find duplicate songs')
+
+        # Act
+        # The scheduler reads the schedule's kwargs as the keyword arguments of a call
+        keywords = ast.parse(f'f({schedule.kwargs})').body[0].value.keywords
+        kwargs = {keyword.arg: ast.literal_eval(keyword.value) for keyword in keywords}
+
+        # Assert
+        self.assertEqual(Schedule.HOURLY, schedule.schedule_type)
+        self.assertEqual({'q_options': {'timeout': settings.SONG_DUPLICATE_SCAN_TIMEOUT}}, kwargs)
@@ -0,0 +1,89 @@
+import os
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from homepage.tests.factories import UserFactory
+from interactions.factories import FavoriteFactory, CommentFactory
+from interactions.models import Favorite
+from songs.factories import SongFactory, SongRedirectFactory
+from songs.merge import merge_songs
+from songs.models import Song, SongRedirect
+from uploads.models import ArchivedScreeningEvent, RejectedSong, ScreeningEvent
+
+class MergeSongsTests(TestCase):
+    def tearDown(self):
+        for filename in os.listdir(settings.REMOVED_FILE_DIR):
+            file_path = os.path.join(settings.REMOVED_FILE_DIR, filename)
+            if os.path.isfile(file_path):
+                os.remove(file_path)
+
+    def create_song_with_file(self, **kwargs):
+        song = SongFactory(folder='M', **kwargs)
+        os.makedirs(os.path.dirname(song.get_archive_path()), exist_ok=True)
+        with open(song.get_archive_path(), 'w', encoding='utf-8') as file:
+            file.write('test')
+        return song
+
+    def merge_and_count_queries(self, interactions):
+        song_to_merge_from = self.create_song_with_file()
+        song_to_merge_into = SongFactory()
+        for _ in range(interactions):
+            profile = UserFactory().profile
+            FavoriteFactory(song=song_to_merge_from, profile=profile)
+            CommentFactory(song=song_to_merge_from, profile=profile)
+
+        with CaptureQueriesContext(connection) as queries:
+            merge_songs(song_to_merge_from, song_to_merge_into)
+
+        song_to_merge_into.refresh_from_db()
+        self.assertEqual(interactions, song_to_merge_into.favorites_count)
+        self.assertEqual(interactions, song_to_merge_into.comments_count)
+        return len(queries)
+
+    def test_query_count_does_not_depend_on_number_of_interactions(self):
+        self.assertEqual(self.merge_and_count_queries(1), self.merge_and_count_queries(10))
+
+    def test_existing_redirects_point_to_merged_song(self):
+        # Arrange
+        song_to_merge_from = self.create_song_with_file()
+        song_to_merge_into = SongFactory()
+        SongRedirectFactory(song=song_to_merge_from, old_song_id=12345)
+
+        # Act
+        merge_songs(song_to_merge_from, song_to_merge_into)
+
+        # Assert
+        self.assertEqual(song_to_merge_into.pk, SongRedirect.objects.get(old_song_id=12345).song_id)
+
+    def test_screening_history_moves_to_the_rejection(self):
+        # Arrange
+        song_to_merge_from = self.create_song_with_file()
+        song_to_merge_into = SongFactory()
+        event = ArchivedScreeningEvent.objects.create(song=song_to_merge_from, type=ScreeningEvent.Types.APPROVE, content='Approved')
+
+        # Act
+        merge_songs(song_to_merge_from, song_to_merge_into)
+
+        # Assert
+        event.refresh_from_db()
+        self.assertIsNone(event.song)
+        self.assertEqual(RejectedSong.objects.get(filename=song_to_merge_from.filename), event.rejected_song)
+
+    def test_rolls_back_when_file_cannot_be_moved(self):
+        # Arrange
+        song_to_merge_from = SongFactory(folder='M', filename='missing_file.mod')
+        song_to_merge_into = SongFactory(downloads_count=5)
+        song_to_merge_from_id = song_to_merge_from.pk
+        FavoriteFactory(song=song_to_merge_from, profile=UserFactory().profile)
+
+        # Act
+        with self.assertRaises(OSError):
+            merge_songs(song_to_merge_from, song_to_merge_into)
+
+        # Assert
+        self.assertTrue(Song.objects.filter(pk=song_to_merge_from_id).exists())
+        self.assertEqual(1, Favorite.objects.filter(song_id=song_to_merge_from_id).count())
+        song_to_merge_into.refresh_from_db()
+        self.assertEqual(5, song_to_merge_into.downloads_count)
@@ -24,6 +24,18 @@ class DownloadTests(TestCase):
         # Assert
         self.assertEqual(101, song.downloads_count)
 
+    def test_download_does_not_change_update_date(self):
+        # Arrange
+        song = song_factories.SongFactory(legacy_id=12345)
+        update_date = song.update_date
+
+        # Act
+        self.client.get(f"/songs/{song.id}/download")
+        song.refresh_from_db()
+
+        # Assert
+        self.assertEqual(update_date, song.update_date)
+
     def test_returns_404_if_song_id_is_missing(self):
         # Act
         response = self.client.get("/songs/1000/download")
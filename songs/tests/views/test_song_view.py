@@ -1,7 +1,9 @@
+from django.contrib.auth.models import Permission
 from django.test import TestCase
 from django.urls import reverse
 
 from songs.factories import SongFactory, SongRedirectFactory
+from uploads.models import ArchivedScreeningEvent, ScreeningEvent
 from artists.factories import ArtistFactory
 from interactions.factories import CommentFactory, FavoriteFactory, ArtistCommentFactory
 from homepage.tests import factories
@@ -193,3 +195,87 @@ class ViewSongTests(TestCase):
 
         # Assert
         self.assertRedirects(response, reverse('view_song', kwargs = {'pk': song.id}), status_code=301)
+
+    def test_new_favorite_is_shown_after_page_was_cached(self):
+        # Arrange
+        song = SongFactory()
+        user = factories.UserFactory()
+        self.client.get(reverse('view_song', kwargs = {'pk': song.id}))
+
+        # Act
+        FavoriteFactory(profile=user.profile, song=song)
+        response = self.client.get(reverse('view_song', kwargs = {'pk': song.id}))
+
+        # Assert
+        self.assertContains(response, user.profile.display_name)
+
+    def test_new_favorite_moves_update_date_that_fragments_are_keyed_on(self):
+        # Arrange
+        song = SongFactory()
+        user = factories.UserFactory()
+        self.client.get(reverse('view_song', kwargs = {'pk': song.id}))
+        cached_update_date = song.update_date
+
+        # Act
+        FavoriteFactory(profile=user.profile, song=song)
+        song.refresh_from_db()
+
+        # Assert
+        self.assertGreater(song.update_date, cached_update_date)
+
+    def test_viewer_specific_links_are_rendered_outside_cached_fragments(self):
+        # Arrange
+        user = factories.UserFactory(permissions=[Permission.objects.get(codename='add_artistcomment')])
+        song = SongFactory()
+        ArtistFactory(songs=[song], user=user, profile=user.profile)
+        ArtistCommentFactory(song=song, profile=user.profile, text="hi")
+        self.client.get(reverse('view_song', kwargs = {'pk': song.id}))
+        self.client.force_login(user)
+
+        # Act
+        response = self.client.get(reverse('view_song', kwargs = {'pk': song.id}))
+
+        # Assert
+        self.assertContains(response, 'Update your comment')
+        self.assertContains(response, 'Edit details')
+
+class SongScreeningHistoryTests(TestCase):
+    def setUp(self):
+        self.song = SongFactory()
+        ArchivedScreeningEvent.objects.create(song=self.song, type=ScreeningEvent.Types.APPROVE, content='Approved by a screener')
+
+    def test_screener_sees_screening_history(self):
+        # Arrange
+        user = factories.UserFactory()
+        user.user_permissions.add(Permission.objects.get(codename='can_approve_songs'))
+        self.client.force_login(user)
+
+        # Act
+        response = self.client.get(reverse('view_song', kwargs={'pk': self.song.id}))
+
+        # Assert
+        self.assertContains(response, 'Approved by a screener')
+
+    def test_other_users_do_not_see_screening_history(self):
+        # Arrange
+        self.client.force_login(factories.UserFactory())
+
+        # Act
+        response = self.client.get(reverse('view_song', kwargs={'pk': self.song.id}))
+
+        # Assert
+        self.assertNotContains(response, 'Approved by a screener')
+
+    def test_artist_who_commented_can_update_comment_without_comment_permission(self):
+        # Arrange
+        user = factories.UserFactory()
+        song = SongFactory()
+        ArtistFactory(songs=[song], user=user, profile=user.profile)
+        ArtistCommentFactory(song=song, profile=user.profile, text="hi")
+        self.client.force_login(user)
+
+        # Act
+        response = self.client.get(reverse('view_song', kwargs = {'pk': song.id}))
+
+        # Assert
+        self.assertContains(response, 'Update your comment')
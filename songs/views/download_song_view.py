@@ -16,7 +16,7 @@ class DownloadSongView(View):
         # Obviously this will not remain in place for the final version of the site, but for now it this is how we download
         download_path = f"https://api.modarchive.org/downloads.php?moduleid={song.legacy_id}#{song.filename}"
 
-        song.downloads_count = F('downloads_count') + 1
-        song.save()
+        # Counting a download is not an edit: update() leaves update_date, and the page fragments keyed on it, alone
+        Song.objects.filter(pk=song.pk).update(downloads_count=F('downloads_count') + 1)
 
         return redirect(download_path)
@@ -1,4 +1,5 @@
 from django.views.generic import DetailView
+from django.conf import settings
 from django.http import Http404
 from django.shortcuts import redirect
 from songs.models import Song, SongRedirect
@@ -24,7 +25,15 @@ class SongView(DetailView):
             context['is_own_song'] = context['song'].is_own_song(self.request.user.profile.id)
             context['can_comment'] = context['song'].can_user_leave_comment(self.request.user.profile.id)
             context['is_favorite'] = self.request.user.profile.favorite_set.filter(song_id=context['song'].id).count() > 0
-            context['artist_can_comment'] = context['is_own_song'] and not context['song'].has_artist_commented(self.request.user.profile.id)
+            context['has_artist_commented'] = context['is_own_song'] and context['song'].has_artist_commented(self.request.user.profile.id)
+            context['artist_can_comment'] = context['is_own_song'] and not context['has_artist_commented']
+
+        # Viewer-independent fragments are cached on the song's update_date
+        context['song_page_cache_timeout'] = settings.SONG_PAGE_CACHE_TIMEOUT
+
+        # Screeners can see how the song went through the screening queue
+        if self.request.user.has_perm('uploads.can_approve_songs'):
+            context['screening_history'] = context['song'].screening_history.select_related('profile')
 
         # Filter legacy reviews to only show non-pending ones
         context['legacy_reviews'] = context['song'].legacyreview_set.filter(pending=False)
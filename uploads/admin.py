@@ -1,3 +1,36 @@
 from django.contrib import admin
 
-# Register your models here.
+from uploads import models
+
+class ScreeningHistoryInline(admin.TabularInline):
+    """The screening events of a song from when it was in the queue."""
+    model = models.ArchivedScreeningEvent
+    extra = 0
+    fields = ('create_date', 'type', 'profile', 'content')
+    readonly_fields = ('create_date', 'type', 'profile', 'content')
+    can_delete = False
+    verbose_name_plural = 'Screening history'
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+@admin.register(models.RejectedSong)
+class RejectedSongAdmin(admin.ModelAdmin):
+    list_display = ("pk", "filename", "reason", "is_temporary", "rejected_by", "rejected_date")
+    list_filter = ("reason", "is_temporary")
+    search_fields = ("filename__startswith",)
+    fields = ('filename', 'title', 'format', 'reason', 'message', 'is_temporary', 'rejected_by', 'rejected_date', 'uploader_profile')
+    readonly_fields = ('rejected_by', 'rejected_date', 'uploader_profile')
+    inlines = [ScreeningHistoryInline]
+
+@admin.register(models.ArchivedScreeningEvent)
+class ArchivedScreeningEventAdmin(admin.ModelAdmin):
+    list_display = ("create_date", "type", "profile", "song", "rejected_song", "content")
+    list_filter = ("type",)
+    list_select_related = ("profile", "song", "rejected_song")
+    search_fields = ("song__filename__startswith", "rejected_song__filename__startswith", "content")
+    readonly_fields = ('song', 'rejected_song', 'profile', 'type', 'content', 'create_date')
+    date_hierarchy = 'create_date'
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,262 @@
+import logging
+import os
+from datetime import date
+
+from django.conf import settings
+from django.db import transaction, Error
+from django.utils import timezone
+
+from artists.models import Artist, ArtistSong
+from modarchive.bulk_operations import DerivedDataRefresh
+from modarchive.file_repository import FileMoveJournal
+from songs.models import Song
+from uploads import constants
+from uploads.models import ArchivedScreeningEvent, NewSong, RejectedSong, ScreeningBatch, ScreeningEvent, ScreeningQueueChange
+from uploads.queue_stats import invalidate_queue_stats
+from uploads.screening_stream import publish_changes
+
+logger = logging.getLogger(__name__)
+
+class SongOutcome:
+    """What happened to one song in a bulk screening action. song_id is the id of the song in
+    the archive once approved, and error is set if nothing was done to the song."""
+    def __init__(self, new_song_id, filename=None, song_id=None, error=None):
+        self.new_song_id = new_song_id
+        self.filename = filename
+        self.song_id = song_id
+        self.error = error
+
+    def to_dict(self):
+        return {'new_song_id': self.new_song_id, 'filename': self.filename, 'song_id': self.song_id, 'error': self.error}
+
+def build_song(approved_song: NewSong, feature=False, approver=None):
+    # Folder is the capitalized first character of the filename. If it's a number, use '0_9'
+    if approved_song.filename[0].isdigit():
+        folder = '0_9'
+    else:
+        folder = approved_song.filename[0].upper()
+
+    if approved_song.title.strip():
+        title = approved_song.title
+    else:
+        title = approved_song.filename
+
+    return Song(
+        filename=approved_song.filename,
+        filename_unzipped=approved_song.filename_unzipped,
+        title=title,
+        title_from_file=approved_song.title,
+        format=approved_song.format.upper(),
+        file_size=approved_song.file_size,
+        channels=approved_song.channels,
+        instrument_text=approved_song.instrument_text,
+        comment_text=approved_song.comment_text,
+        hash=approved_song.hash,
+        pattern_hash=approved_song.pattern_hash,
+        similarity_signature=approved_song.similarity_signature,
+        similarity_bands=approved_song.similarity_bands,
+        folder=folder,
+        uploaded_by=approved_song.uploader_profile,
+        featured_by=approver if feature else None,
+        featured_date=timezone.now() if feature else None,
+    )
+
+def screen_songs(new_song_ids, get_destination, save_songs):
+    """
+    Moves the files of the new songs concurrently and applies the database changes for the
+    moved songs as one unit, returning a SongOutcome for each id, in the same order.
+    get_destination(new_song) gives the path a new song's file is moved to, and
+    save_songs(new_songs) makes the database changes for the songs whose file was moved,
+    returning the id of the archive song for each new song id, if there is one. A song whose
+    file cannot be moved is left in the queue. If the database changes fail, every moved file
+    is moved back and no song is changed; any other error is raised again once the files are
+    back.
+    """
+    journal = FileMoveJournal()
+    outcomes = {new_song_id: SongOutcome(new_song_id, error=constants.MESSAGE_SONG_NOT_IN_QUEUE) for new_song_id in new_song_ids}
+
+    try:
+        with transaction.atomic():
+            new_songs = list(
+                NewSong.objects.filter(pk__in=new_song_ids)
+                .select_related('uploader_profile__user')
+                .select_for_update(of=('self',))
+                .order_by('id')
+            )
+
+            errors = journal.move_all([
+                (os.path.join(settings.NEW_FILE_DIR, f'{new_song.filename}.zip'), get_destination(new_song))
+                for new_song in new_songs
+            ])
+            moved = []
+            for new_song, error in zip(new_songs, errors):
+                outcomes[new_song.id] = SongOutcome(new_song.id, new_song.filename, error=constants.MESSAGE_FILE_MOVE_FAILED if error else None)
+                if error is None:
+                    moved.append(new_song)
+
+            song_ids = save_songs(moved)
+            NewSong.objects.filter(pk__in=[new_song.id for new_song in moved]).delete()
+
+            for new_song in moved:
+                outcomes[new_song.id].song_id = song_ids.get(new_song.id)
+    except Exception as e:
+        logger.exception('Bulk screening action failed; moving files back.')
+        journal.rollback()
+        if not isinstance(e, Error):
+            raise
+        for outcome in outcomes.values():
+            if outcome.error is None:
+                outcome.song_id = None
+                outcome.error = constants.MESSAGE_SCREENING_BATCH_FAILED
+
+    return [outcomes[new_song_id] for new_song_id in new_song_ids]
+
+def approve_songs(new_song_ids, approver, feature=False):
+    """
+    Adds the new songs to the archive as one unit. Validation is left to the caller. The songs,
+    any missing uploader artists and their artist links are bulk created, with search and stats
+    refreshed once for the batch.
+    """
+    songs = {}
+
+    def get_destination(new_song):
+        songs[new_song.id] = build_song(new_song, feature, approver)
+        return songs[new_song.id].get_archive_path()
+
+    def save_songs(approved):
+        refresh = DerivedDataRefresh()
+        Song.objects.bulk_create([songs[new_song.id] for new_song in approved])
+        refresh.touch_songs(songs[new_song.id].id for new_song in approved)
+        refresh.touch_artists(add_songs_to_uploader_artists(approved, songs))
+        refresh.refresh()
+        archive_screening_events(
+            {new_song.id: songs[new_song.id] for new_song in approved},
+            ScreeningEvent.Types.APPROVE, approver, f'Approved by {approver.display_name}'
+        )
+        publish_changes(ScreeningQueueChange.Types.APPROVE, approved, approver)
+        return {new_song.id: songs[new_song.id].id for new_song in approved}
+
+    return screen_songs(new_song_ids, get_destination, save_songs)
+
+def add_songs_to_uploader_artists(approved_songs, songs):
+    """Links each song uploaded by its artist to the uploader's artist, creating artists for
+    uploaders who have none yet. Returns the ids of the artists linked."""
+    by_uploader = [
+        new_song for new_song in approved_songs
+        if new_song.is_by_uploader and new_song.uploader_profile and new_song.uploader_profile.user
+    ]
+    profiles = {new_song.uploader_profile_id: new_song.uploader_profile for new_song in by_uploader}
+    artists = {artist.profile_id: artist for artist in Artist.objects.filter(profile_id__in=profiles)}
+
+    # Random tokens for the new artists are assigned when derived data is refreshed
+    new_artists = Artist.objects.bulk_create([
+        Artist(user=profile.user, profile=profile, name=profile.user.username)
+        for profile_id, profile in profiles.items() if profile_id not in artists
+    ])
+    artists.update({artist.profile_id: artist for artist in new_artists})
+
+    ArtistSong.objects.bulk_create([
+        ArtistSong(artist=artists[new_song.uploader_profile_id], song=songs[new_song.id])
+        for new_song in by_uploader
+    ])
+    return [artist.id for artist in artists.values()]
+
+def build_rejected_song(new_song: NewSong, reason, message, is_temporary, rejecter=None):
+    return RejectedSong(
+        reason=reason,
+        message=message,
+        is_temporary=is_temporary,
+        rejected_by=rejecter,
+        rejected_date=timezone.now(),
+        filename=new_song.filename,
+        filename_unzipped=new_song.filename_unzipped,
+        title=new_song.title,
+        format=new_song.format,
+        file_size=new_song.file_size,
+        channels=new_song.channels,
+        instrument_text=new_song.instrument_text,
+        comment_text=new_song.comment_text,
+        hash=new_song.hash,
+        pattern_hash=new_song.pattern_hash,
+        similarity_signature=new_song.similarity_signature,
+        similarity_bands=new_song.similarity_bands,
+        artist_from_file=new_song.artist_from_file,
+        uploader_profile=new_song.uploader_profile,
+        uploader_ip_address=new_song.uploader_ip_address,
+        is_by_uploader=new_song.is_by_uploader,
+    )
+
+def get_rejected_file_path(filename, rejection_date: date):
+    """Returns where the file of a song rejected on rejection_date is kept."""
+    return os.path.join(settings.REJECTED_FILE_DIR, f'{rejection_date.strftime("%Y%m%d")}-{filename}.zip')
+
+def get_rejected_path(new_song: NewSong):
+    # Dated like rejected_date, so the file can be found again from the RejectedSong
+    return get_rejected_file_path(new_song.filename, timezone.localdate())
+
+def reject_songs(new_song_ids, rejecter, reason, message='', is_temporary=False):
+    """
+    Removes the new songs from the queue as one unit, recording a RejectedSong for each one.
+    Validation is left to the caller. A rejected file is never overwritten, so a song whose
+    file was already rejected under the same name today is left in the queue.
+    """
+    def save_songs(rejected):
+        rejected_songs = RejectedSong.objects.bulk_create([
+            build_rejected_song(new_song, reason, message, is_temporary, rejecter) for new_song in rejected
+        ])
+        archive_screening_events(
+            {new_song.id: rejected_song for new_song, rejected_song in zip(rejected, rejected_songs)},
+            ScreeningEvent.Types.REJECT, rejecter, f'Rejected by {rejecter.display_name} ({RejectedSong.Reasons(reason).label})'
+        )
+        publish_changes(ScreeningQueueChange.Types.REJECT, rejected, rejecter)
+        return {}
+
+    return screen_songs(new_song_ids, get_rejected_path, save_songs)
+
+def archive_screening_events(destinations, event_type, profile, content):
+    """
+    Copies the screening events of new songs leaving the queue to the archive, ending with an
+    event of event_type for leaving it, before the new songs and their live events are deleted.
+    destinations maps each new song id to the Song or RejectedSong the new song became.
+    """
+    def archived_event(destination, **fields):
+        field = 'song' if isinstance(destination, Song) else 'rejected_song'
+        return ArchivedScreeningEvent(**{field: destination}, **fields)
+
+    events = ScreeningEvent.objects.filter(new_song_id__in=destinations).order_by('create_date', 'id')
+    archived_events = [
+        archived_event(destinations[event.new_song_id], profile_id=event.profile_id, type=event.type, content=event.content, create_date=event.create_date)
+        for event in events
+    ]
+    now = timezone.now()
+    archived_events.extend(
+        archived_event(destination, profile=profile, type=event_type, content=content, create_date=now)
+        for destination in destinations.values()
+    )
+    ArchivedScreeningEvent.objects.bulk_create(archived_events)
+
+def run_screening_batch(batch: ScreeningBatch):
+    batch.status = ScreeningBatch.Statuses.PROCESSING
+    batch.save(update_fields=['status'])
+
+    try:
+        if batch.action == ScreeningBatch.Actions.APPROVE:
+            outcomes = approve_songs(batch.new_song_ids, batch.profile, feature=batch.options.get('feature', False))
+        elif batch.action == ScreeningBatch.Actions.REJECT:
+            outcomes = reject_songs(
+                batch.new_song_ids,
+                batch.profile,
+                batch.options['reason'],
+                batch.options.get('message', ''),
+                batch.options.get('is_temporary', False)
+            )
+        batch.results = [outcome.to_dict() for outcome in outcomes]
+        batch.status = ScreeningBatch.Statuses.COMPLETE
+    except Exception:
+        logger.exception(f"Screening batch {batch.id} failed.")
+        batch.status = ScreeningBatch.Statuses.FAILED
+        raise
+    finally:
+        batch.complete_date = timezone.now()
+        batch.save(update_fields=['status', 'results', 'complete_date'])
+        invalidate_queue_stats()
@@ -0,0 +1,42 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from uploads.models import NewSong, ScreeningEvent, ScreeningQueueChange
+from uploads.queue_stats import invalidate_queue_stats
+from uploads.screening_stream import publish_changes
+
+def expire_stale_claims():
+    """
+    Releases claims made more than SCREENING_CLAIM_EXPIRY_HOURS ago, recording an unclaim
+    screening event for each song. Songs locked by a screener acting on them right now are
+    skipped until the next run. Returns the number of claims released.
+    """
+    hours = settings.SCREENING_CLAIM_EXPIRY_HOURS
+    cutoff = timezone.now() - timedelta(hours=hours)
+
+    with transaction.atomic():
+        stale_songs = list(
+            NewSong.objects.filter(claimed_by__isnull=False, claim_date__lte=cutoff)
+            .select_related('claimed_by')
+            .select_for_update(skip_locked=True, of=('self',))
+        )
+        if not stale_songs:
+            return 0
+
+        NewSong.objects.filter(pk__in=[song.pk for song in stale_songs]).update(claimed_by=None, claim_date=None)
+        ScreeningEvent.objects.bulk_create([
+            ScreeningEvent(
+                new_song=song,
+                profile=None,
+                type=ScreeningEvent.Types.UNCLAIM,
+                content=f'Claim by {song.claimed_by.display_name} expired after {hours} hours'
+            )
+            for song in stale_songs
+        ])
+        publish_changes(ScreeningQueueChange.Types.UNCLAIM, stale_songs)
+
+    invalidate_queue_stats()
+    return len(stale_songs)
@@ -82,6 +82,9 @@ MESSAGE_ALL_SONGS_MUST_HAVE_UNIQUE_HASH_FOR_BULK_APPROVAL = 'All songs must have
 MESSAGE_ALL_SONGS_MUST_NOT_BE_CLAIMED_BY_OTHERS_FOR_BULK_APPROVAL = 'You cannot bulk approve if any song is claimed by somebody else.'
 MESSAGE_SONGS_APPROVED = '%s songs approved.'
 MESSAGE_NO_SONGS_SELECTED = 'No songs selected.'
+MESSAGE_SONG_NOT_IN_QUEUE = 'The song is no longer in the screening queue.'
+MESSAGE_FILE_MOVE_FAILED = 'The song\'s file could not be moved.'
+MESSAGE_SCREENING_BATCH_FAILED = 'Something went wrong while saving the batch, so none of its songs were changed.'
 
 FLAG_MESSAGE_SECOND_OPINION = 'Another screener would like a second opinion on this song.'
 FLAG_MESSAGE_POSSIBLE_DUPLICATE = 'This song may be a duplicate of another song in the database. Please verify.'
@@ -107,3 +110,16 @@ UPLOAD_UNSUPPORTED_FORMAT = 'This format is not currently supported.'
 UPLOAD_DUPLICATE_SONG_IN_ARCHIVE = 'An identical song was already found in the archive.'
 UPLOAD_DUPLICATE_SONG_IN_PROCESSING_QUEUE = 'An identical song was already found in the upload processing queue.'
 UPLOAD_SONG_PREVIOUSLY_REJECTED = 'This song was previously rejected by screeners.'
+UPLOAD_PROCESSING_FAILED = 'Something went wrong while processing this file. Please try again later.'
+UPLOAD_ZIP_TOO_MANY_FILES = 'The zip file contained more than the maximum of %s files.'
+UPLOAD_ZIP_TOO_LARGE = 'The contents of the zip file were above the maximum allowed size of %s bytes.'
+UPLOAD_ZIP_DUPLICATE_FILENAME = 'Another file in the zip file has the same name.'
+UPLOAD_ZIP_SUSPICIOUS_COMPRESSION = 'The file was compressed too well to be a module.'
+UPLOAD_ZIP_UNREADABLE = 'The file could not be read from the zip file. It may be corrupted or encrypted.'
+CHUNKED_UPLOAD_INVALID_FILENAME = 'The filename must name a file.'
+CHUNKED_UPLOAD_INVALID_HEADERS = 'Each chunk must be sent with Content-Length, Upload-Offset and Upload-Checksum ("sha256 <hex digest>") headers.'
+CHUNKED_UPLOAD_OFFSET_MISMATCH = 'The chunk does not start where the data received so far ends.'
+CHUNKED_UPLOAD_CHUNK_TOO_LARGE = 'The chunk was above the maximum allowed size of %s bytes, or went past the end of the file.'
+CHUNKED_UPLOAD_CHECKSUM_MISMATCH = 'The chunk did not match its checksum. Please send it again.'
+CHUNKED_UPLOAD_INCOMPLETE = 'Only %s of %s bytes have been received.'
+CHUNKED_UPLOAD_ALREADY_FINALIZED = 'This upload has already been finalized.'
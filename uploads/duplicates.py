@@ -0,0 +1,214 @@
+import hashlib
+import math
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.db.models import Value
+
+from songs import similarity
+from songs.models import Song
+from uploads import constants
+from uploads.models import DuplicateCandidate, NewSong, RejectedSong, ScreeningEvent
+
+IN_ARCHIVE = 'archive'
+IN_PROCESSING_QUEUE = 'queue'
+PREVIOUSLY_REJECTED = 'rejected'
+
+# When a hash is found in more than one place, the first reason in this order is reported
+DUPLICATE_REASONS = {
+    IN_ARCHIVE: constants.UPLOAD_DUPLICATE_SONG_IN_ARCHIVE,
+    IN_PROCESSING_QUEUE: constants.UPLOAD_DUPLICATE_SONG_IN_PROCESSING_QUEUE,
+    PREVIOUSLY_REJECTED: constants.UPLOAD_SONG_PREVIOUSLY_REJECTED,
+}
+
+def find_duplicates(hashes):
+    """
+    Returns a dict mapping each hash that already exists in the archive, the upload processing
+    queue, or the permanent rejections to the upload failure reason for it. All hashes are
+    resolved with a single query across the three tables.
+    """
+    hashes = set(hashes)
+    if not hashes:
+        return {}
+
+    query = Song.objects.filter(hash__in=hashes).annotate(source=Value(IN_ARCHIVE)).values_list('hash', 'source').order_by().union(
+        NewSong.objects.filter(hash__in=hashes).annotate(source=Value(IN_PROCESSING_QUEUE)).values_list('hash', 'source').order_by(),
+        RejectedSong.objects.filter(hash__in=hashes, is_temporary=False).annotate(source=Value(PREVIOUSLY_REJECTED)).values_list('hash', 'source').order_by(),
+        all=True
+    )
+
+    found = {}
+    for file_hash, source in query:
+        found.setdefault(file_hash, set()).add(source)
+
+    return {
+        file_hash: next(reason for source, reason in DUPLICATE_REASONS.items() if source in sources)
+        for file_hash, sources in found.items()
+    }
+
+class HashBloomFilter:
+    """A Bloom filter over strings: `in` is never wrong for added values, and wrong for other
+    values with a probability of about false_positive_rate while under capacity."""
+    def __init__(self, capacity, false_positive_rate=0.01):
+        self.size = max(8, int(-capacity * math.log(false_positive_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def positions(self, value):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little')
+        return ((first + i * second) % self.size for i in range(self.hash_count))
+
+    def add(self, value):
+        for position in self.positions(value):
+            self.bits[position // 8] |= 1 << (position % 8)
+
+    def __contains__(self, value):
+        return all(self.bits[position // 8] & (1 << (position % 8)) for position in self.positions(value))
+
+class DuplicateChecker:
+    """
+    Keeps a Bloom filter of every hash in the archive, the processing queue and the rejections,
+    so hashes that are definitely new are answered without querying those tables. Before each
+    check, rows added since the last check (by any process) are loaded by primary key, so
+    recently added hashes are not missed. Hashes the filter reports as possibly known are
+    confirmed with find_duplicates.
+
+    Ids are assigned before commit, so a row committed late can have a lower id than rows already
+    loaded. Each refresh therefore re-reads every id above the highest id seen by a refresh at
+    least UPLOAD_DUPLICATE_BLOOM_FILTER_REFRESH_OVERLAP seconds earlier: those ids were assigned
+    that long ago, and every transaction that took one has committed since.
+    """
+    models = (Song, NewSong, RejectedSong)
+
+    def __init__(self, capacity=None):
+        self.lock = threading.Lock()
+        self.reset(capacity or settings.UPLOAD_DUPLICATE_BLOOM_FILTER_CAPACITY)
+
+    def reset(self, capacity):
+        self.capacity = capacity
+        self.bloom_filter = HashBloomFilter(capacity)
+        self.last_ids = {model: 0 for model in self.models}
+        # Every row with an id up to these has been loaded
+        self.settled_ids = {model: 0 for model in self.models}
+        # The highest ids each refresh saw, with when it finished, waiting to become settled
+        self.refreshes = deque()
+        self.count = 0
+
+    def refresh(self):
+        started = time.monotonic()
+        for model in self.models:
+            new_rows = model.objects.filter(pk__gt=self.settled_ids[model])
+            for pk, file_hash in new_rows.order_by('pk').values_list('pk', 'hash').iterator():
+                self.bloom_filter.add(file_hash)
+                if pk > self.last_ids[model]:
+                    self.last_ids[model] = pk
+                    self.count += 1
+        self.refreshes.append((time.monotonic(), dict(self.last_ids)))
+
+        settled_before = started - settings.UPLOAD_DUPLICATE_BLOOM_FILTER_REFRESH_OVERLAP
+        while self.refreshes and self.refreshes[0][0] <= settled_before:
+            _, self.settled_ids = self.refreshes.popleft()
+
+        # An overfull filter loses its benefit, so it is rebuilt with room to grow
+        if self.count > self.capacity:
+            self.reset(self.count * 2)
+            self.refresh()
+
+    def find_duplicates(self, hashes):
+        with self.lock:
+            self.refresh()
+            possible_duplicates = {file_hash for file_hash in hashes if file_hash in self.bloom_filter}
+
+        return find_duplicates(possible_duplicates)
+
+_checker = None
+_checker_lock = threading.Lock()
+
+def find_upload_duplicates(hashes):
+    """Finds duplicates with the Bloom filter if UPLOAD_DUPLICATE_BLOOM_FILTER is enabled,
+    otherwise with a single find_duplicates query."""
+    global _checker
+    if not settings.UPLOAD_DUPLICATE_BLOOM_FILTER:
+        return find_duplicates(hashes)
+
+    with _checker_lock:
+        if _checker is None:
+            _checker = DuplicateChecker()
+    return _checker.find_duplicates(hashes)
+
+# Each model a near duplicate can be found in, with the DuplicateCandidate field that points to it
+SIMILAR_SONG_SOURCES = {
+    IN_ARCHIVE: (Song, 'song'),
+    IN_PROCESSING_QUEUE: (NewSong, 'queued_song'),
+    PREVIOUSLY_REJECTED: (RejectedSong, 'rejected_song'),
+}
+
+def find_similar_songs(new_song: NewSong):
+    """
+    Returns unsaved DuplicateCandidates for the songs in the archive, the screening queue and the
+    rejections that have the same pattern hash as new_song, followed by those that share an LSH
+    band with it and are estimated to be at least UPLOAD_SIMILARITY_THRESHOLD similar, closest
+    first. Both lookups go through indexes, so only the candidates are compared, in a single query
+    across the three tables.
+    """
+    if not new_song.pattern_hash and not new_song.similarity_bands:
+        return []
+
+    limit = settings.UPLOAD_SIMILARITY_MAX_MATCHES
+    queries = []
+    for source, (model, _) in SIMILAR_SONG_SOURCES.items():
+        songs = model.objects.exclude(pk=new_song.pk) if model is NewSong else model.objects.all()
+        songs = songs.annotate(source=Value(source)).values_list('pk', 'pattern_hash', 'similarity_signature', 'source').order_by('-pk')
+        # Pattern hash matches are queried on their own, so band candidates cannot crowd them out.
+        # Every one of them scores 1, so no more than limit from a table can be kept.
+        if new_song.pattern_hash:
+            queries.append(songs.filter(pattern_hash=new_song.pattern_hash)[:limit])
+            songs = songs.exclude(pattern_hash=new_song.pattern_hash)
+        # A band shared by many songs must not flood the results
+        if new_song.similarity_bands:
+            queries.append(songs.filter(similarity_bands__overlap=new_song.similarity_bands)[:limit * 10])
+
+    pattern_hash_matches, similar_songs = [], []
+    for pk, pattern_hash, signature, source in queries[0].union(*queries[1:], all=True):
+        field = SIMILAR_SONG_SOURCES[source][1]
+        if new_song.pattern_hash and pattern_hash == new_song.pattern_hash:
+            pattern_hash_matches.append(DuplicateCandidate(
+                new_song=new_song, match_type=DuplicateCandidate.MatchTypes.PATTERN_HASH, similarity=1.0, **{f'{field}_id': pk}
+            ))
+            continue
+
+        score = similarity.estimate_similarity(new_song.similarity_signature, signature)
+        if score >= settings.UPLOAD_SIMILARITY_THRESHOLD:
+            similar_songs.append(DuplicateCandidate(
+                new_song=new_song, match_type=DuplicateCandidate.MatchTypes.SIMILAR_TEXT, similarity=score, **{f'{field}_id': pk}
+            ))
+
+    # Identical patterns are the stronger evidence, so they come before equally scored similar songs
+    similar_songs.sort(key=lambda candidate: -candidate.similarity)
+    return (pattern_hash_matches + similar_songs)[:limit]
+
+def record_similar_songs(new_song: NewSong):
+    """
+    Stores the likely duplicates of a newly uploaded song and its closest match's similarity as
+    its duplicate score. A song whose score reaches UPLOAD_DUPLICATE_FLAG_THRESHOLD is flagged as
+    a possible duplicate. Returns the candidates stored.
+    """
+    candidates = DuplicateCandidate.objects.bulk_create(find_similar_songs(new_song))
+    if not candidates:
+        return candidates
+
+    new_song.duplicate_score = candidates[0].similarity
+    update_fields = ['duplicate_score']
+    if new_song.flag is None and new_song.duplicate_score >= settings.UPLOAD_DUPLICATE_FLAG_THRESHOLD:
+        new_song.flag = NewSong.Flags.POSSIBLE_DUPLICATE
+        update_fields.append('flag')
+        ScreeningEvent.objects.create(
+            new_song=new_song,
+            type=ScreeningEvent.Types.APPLY_FLAG,
+            content=f'Flag set to {NewSong.Flags.POSSIBLE_DUPLICATE} automatically ({len(candidates)} similar songs found)'
+        )
+    new_song.save(update_fields=update_fields)
+    return candidates
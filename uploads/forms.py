@@ -15,6 +15,18 @@ class UploadForm(forms.Form):
     class Meta:
         required_css_class = None
 
+class ChunkedUploadForm(forms.Form):
+    written_by_me = forms.ChoiceField(choices=UploadForm.CHOICES, required=True)
+    filename = forms.CharField(max_length=255, required=True)
+    size = forms.IntegerField(min_value=1, required=True)
+
+    def clean_filename(self):
+        # Only the final component is kept, and it must name a file rather than a directory
+        filename = os.path.basename(self.cleaned_data['filename'])
+        if filename in ('', '.', '..'):
+            raise forms.ValidationError(constants.CHUNKED_UPLOAD_INVALID_FILENAME)
+        return filename
+
 class ScreeningQueueFilterForm(forms.Form):
     FILTER_CHOICES = (
         (constants.UNCLAIMED_GROUP, (
@@ -46,6 +58,15 @@ class ScreeningQueueFilterForm(forms.Form):
     class Meta:
         required_css_class = None
 
+    def __init__(self, *args, filter_stats=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if filter_stats:
+            # Show how many songs each filter holds next to its name
+            self.fields['filter'].choices = [
+                (group, [(value, f"{label} ({filter_stats[value]['count']})") for value, label in choices])
+                for group, choices in self.FILTER_CHOICES
+            ]
+
 class RejectionForm(forms.Form):
     is_temporary = forms.BooleanField(required=False, label='Temporary rejection?', widget=forms.CheckboxInput())
     rejection_reason = forms.ChoiceField(choices=models.RejectedSong.Reasons.choices, required=True, label='Rejection reason')
@@ -0,0 +1,52 @@
+# Generated by Django 5.1.6 on 2026-10-19 17:06
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('homepage', '0019_message_thread_starter'),
+        ('uploads', '0005_alter_screeningevent_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('uploader_ip_address', models.CharField(default='0.0.0.0', max_length=32)),
+                ('is_by_uploader', models.BooleanField()),
+                ('filename', models.CharField(max_length=255)),
+                ('file_path', models.CharField(blank=True, max_length=500)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('complete', 'Complete'), ('failed', 'Failed')], db_index=True, default='pending', max_length=16)),
+                ('create_date', models.DateTimeField(default=django.utils.timezone.now)),
+                ('start_date', models.DateTimeField(blank=True, null=True)),
+                ('complete_date', models.DateTimeField(blank=True, null=True)),
+                ('uploader_profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_jobs', to='homepage.profile')),
+            ],
+            options={
+                'db_table': 'uploads_upload_job',
+            },
+        ),
+        migrations.CreateModel(
+            name='UploadJobFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('filename', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('success', 'Success'), ('failed', 'Failed')], max_length=16)),
+                ('reason', models.CharField(blank=True, max_length=500)),
+                ('title', models.CharField(blank=True, max_length=120)),
+                ('format', models.CharField(blank=True, choices=[('669', '669: Composer 669 / UNIS 669'), ('AHX', "AHX: Abyss' Highest eXperience, formerly THX"), ('AMF', 'AMF: ASYLUM / DSMI'), ('AMS', "AMS: Extreme's Tracker / Velvet Studio"), ('C67', 'C67: CDFM / Composer 670'), ('DBM', 'DBM: Digi Booster Pro'), ('DIGI', 'DIGI: Digi Booster'), ('DMF', 'DMF: X-Tracker'), ('DSM', 'DSM: DSIK'), ('DSYM', 'DSYM: Digital Symphony'), ('DTM', 'DTM: Digital Tracker / Digital Home Studio'), ('FAR', 'FAR: Farandole Composer'), ('FMT', 'FMT: FM Tracker'), ('GDM', 'GDM: BWSB Sound System'), ('HVL', 'HVL: HivelyTracker'), ('IMF', 'IMF: Imago Orpheus'), ('IT', 'IT: Impulse Tracker'), ('J2B', 'J2B: Galaxy Sound System'), ('MED', 'MED: Octamed'), ('MDL', 'MDL: Digitrakker'), ('MO3', 'MO3: Compressed Module'), ('MOD', 'MOD: Protracker, Generic MOD'), ('MPTM', 'MPTM: OpenMPT'), ('MT2', 'MT2: MadTracker 2'), ('MTM', 'MTM: Multi Tracker'), ('OKT', 'OKT: Oktalyzer'), ('PLM', 'PLM: Disorder Tracker 2'), ('PSM', 'PSM: Epic MegaGames MASI'), ('PTM', 'PTM: PolyTracker'), ('S3M', 'S3M: Scream Tracker 3'), ('SFX', 'SFX: SoundFX / MultiMedia Sound'), ('STM', 'STM: Scream Tracker'), ('STP', 'STP: SoundTracker Pro II'), ('STX', 'STX: Scream Tracker Music Interface Kit'), ('SymMOD', 'SymMOD: Symphonie / Symphonie Pro'), ('ULT', 'ULT: UltraTracker'), ('UMX', 'UMX: Unreal Music'), ('XM', 'XM: FastTracker 2')], max_length=6)),
+                ('create_date', models.DateTimeField(default=django.utils.timezone.now)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='files', to='uploads.uploadjob')),
+                ('new_song', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='upload_job_files', to='uploads.newsong')),
+            ],
+            options={
+                'db_table': 'uploads_upload_job_file',
+                'ordering': ['id'],
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.1.6 on 2026-10-19 17:12
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('uploads', '0006_uploadjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModuleMetadata',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hash', models.CharField(max_length=33, unique=True)),
+                ('info', models.JSONField(blank=True, null=True)),
+                ('create_date', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'db_table': 'uploads_module_metadata',
+            },
+        ),
+    ]
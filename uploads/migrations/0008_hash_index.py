@@ -0,0 +1,23 @@
+# Generated by Django 5.1.6 on 2026-10-19 17:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('uploads', '0007_modulemetadata'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='newsong',
+            name='hash',
+            field=models.CharField(db_index=True, max_length=33),
+        ),
+        migrations.AlterField(
+            model_name='rejectedsong',
+            name='hash',
+            field=models.CharField(db_index=True, max_length=33),
+        ),
+    ]
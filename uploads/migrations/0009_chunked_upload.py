@@ -0,0 +1,35 @@
+# Generated by Django 5.1.6 on 2026-10-19 17:25
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('homepage', '0019_message_thread_starter'),
+        ('uploads', '0008_hash_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChunkedUpload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('uploader_ip_address', models.CharField(default='0.0.0.0', max_length=32)),
+                ('is_by_uploader', models.BooleanField()),
+                ('filename', models.CharField(max_length=255)),
+                ('file_path', models.CharField(max_length=500)),
+                ('size', models.BigIntegerField()),
+                ('offset', models.BigIntegerField(default=0)),
+                ('create_date', models.DateTimeField(default=django.utils.timezone.now)),
+                ('update_date', models.DateTimeField(default=django.utils.timezone.now)),
+                ('job', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='chunked_upload', to='uploads.uploadjob')),
+                ('uploader_profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunked_uploads', to='homepage.profile')),
+            ],
+            options={
+                'db_table': 'uploads_chunked_upload',
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-19 17:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('homepage', '0019_message_thread_starter'),
+        ('uploads', '0009_chunked_upload'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='newsong',
+            index=models.Index(condition=models.Q(('claimed_by__isnull', False)), fields=['claim_date'], name='newsong_active_claim_idx'),
+        ),
+    ]
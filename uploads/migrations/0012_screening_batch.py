@@ -0,0 +1,33 @@
+# Generated by Django 5.1.6 on 2026-10-19 17:33
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('homepage', '0019_message_thread_starter'),
+        ('uploads', '0011_schedule_claim_expiry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScreeningBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(choices=[('approve', 'Approve')], max_length=16)),
+                ('new_song_ids', models.JSONField(default=list)),
+                ('options', models.JSONField(blank=True, default=dict)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('complete', 'Complete'), ('failed', 'Failed')], default='pending', max_length=16)),
+                ('results', models.JSONField(blank=True, default=list)),
+                ('create_date', models.DateTimeField(default=django.utils.timezone.now)),
+                ('complete_date', models.DateTimeField(blank=True, null=True)),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='screening_batches', to='homepage.profile')),
+            ],
+            options={
+                'db_table': 'uploads_screening_batch',
+            },
+        ),
+    ]
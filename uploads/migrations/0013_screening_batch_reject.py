@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-19 17:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('uploads', '0012_screening_batch'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='screeningbatch',
+            name='action',
+            field=models.CharField(choices=[('approve', 'Approve'), ('reject', 'Reject')], max_length=16),
+        ),
+    ]
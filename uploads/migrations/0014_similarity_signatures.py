@@ -0,0 +1,93 @@
+# Generated by Django 5.1.6 on 2026-10-19 17:40
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('homepage', '0019_message_thread_starter'),
+        ('songs', '0061_similarity_signatures'),
+        ('uploads', '0013_screening_batch_reject'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DuplicateCandidate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('match_type', models.CharField(choices=[('pattern-hash', 'Identical patterns'), ('similar-text', 'Similar title and instruments')], max_length=16)),
+                ('similarity', models.FloatField()),
+            ],
+            options={
+                'db_table': 'uploads_duplicate_candidate',
+                'ordering': ['-similarity'],
+            },
+        ),
+        migrations.AddField(
+            model_name='newsong',
+            name='duplicate_score',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='newsong',
+            name='similarity_bands',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), blank=True, null=True, size=None),
+        ),
+        migrations.AddField(
+            model_name='newsong',
+            name='similarity_signature',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), blank=True, null=True, size=None),
+        ),
+        migrations.AddField(
+            model_name='rejectedsong',
+            name='similarity_bands',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), blank=True, null=True, size=None),
+        ),
+        migrations.AddField(
+            model_name='rejectedsong',
+            name='similarity_signature',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), blank=True, null=True, size=None),
+        ),
+        migrations.AlterField(
+            model_name='newsong',
+            name='pattern_hash',
+            field=models.CharField(blank=True, db_index=True, max_length=16, null=True),
+        ),
+        migrations.AlterField(
+            model_name='rejectedsong',
+            name='pattern_hash',
+            field=models.CharField(blank=True, db_index=True, max_length=16),
+        ),
+        migrations.AddIndex(
+            model_name='newsong',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['similarity_bands'], name='newsong_similarity_bands_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rejectedsong',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['similarity_bands'], name='rejectedsong_similarity_idx'),
+        ),
+        migrations.AddField(
+            model_name='duplicatecandidate',
+            name='new_song',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='duplicate_candidates', to='uploads.newsong'),
+        ),
+        migrations.AddField(
+            model_name='duplicatecandidate',
+            name='queued_song',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='uploads.newsong'),
+        ),
+        migrations.AddField(
+            model_name='duplicatecandidate',
+            name='rejected_song',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='uploads.rejectedsong'),
+        ),
+        migrations.AddField(
+            model_name='duplicatecandidate',
+            name='song',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='songs.song'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.6 on 2026-10-19 17:52
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('homepage', '0019_message_thread_starter'),
+        ('uploads', '0014_similarity_signatures'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScreeningQueueChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('new_song_id', models.IntegerField()),
+                ('type', models.CharField(choices=[('upload', 'Upload'), ('claim', 'Claim'), ('unclaim', 'Unclaim'), ('apply_flag', 'Apply Flag'), ('clear_flag', 'Clear Flag'), ('rename', 'Rename'), ('approve', 'Approve'), ('reject', 'Reject')], max_length=16)),
+                ('filename', models.CharField(max_length=120)),
+                ('flag', models.CharField(blank=True, choices=[('pre-screened', 'Pre-screened'), ('pre-screened+', 'Pre-screened and recommend featured'), ('needs-second-opinion', 'Needs second opinion'), ('possible-duplicate', 'Possible duplicate'), ('under-investigation', 'Under investigation (do not approve)')], max_length=32, null=True)),
+                ('screener_name', models.CharField(blank=True, max_length=255)),
+                ('create_date', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('profile', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='homepage.profile')),
+            ],
+            options={
+                'db_table': 'uploads_screening_queue_change',
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.6 on 2026-10-19 17:53
+
+from django.db import migrations
+
+SCHEDULE_NAME = 'Prune screening queue changes'
+
+def create_schedule(apps, schema_editor):
+    Schedule = apps.get_model('django_q', 'Schedule')
+    Schedule.objects.get_or_create(
+        name=SCHEDULE_NAME,
+        defaults={
+            'func': 'modarchive.tasks.prune_screening_queue_changes',
+            'schedule_type': 'H',
+            'repeats': -1,
+        }
+    )
+
+def delete_schedule(apps, schema_editor):
+    Schedule = apps.get_model('django_q', 'Schedule')
+    Schedule.objects.filter(name=SCHEDULE_NAME).delete()
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('uploads', '0015_screening_queue_change'),
+        ('django_q', '0019_alter_task_options_alter_ormq_key_alter_ormq_lock_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_schedule, delete_schedule),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.6 on 2026-10-19 18:01
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('homepage', '0019_message_thread_starter'),
+        ('songs', '0063_duplicate_scan_schedule'),
+        ('uploads', '0017_retention_schedule'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='screeningevent',
+            name='type',
+            field=models.CharField(choices=[('claim', 'Claim'), ('unclaim', 'Unclaim'), ('apply_flag', 'Apply Flag'), ('clear_flag', 'Clear Flag'), ('rename', 'Rename'), ('approve', 'Approve'), ('reject', 'Reject')], max_length=32),
+        ),
+        migrations.CreateModel(
+            name='ArchivedScreeningEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(choices=[('claim', 'Claim'), ('unclaim', 'Unclaim'), ('apply_flag', 'Apply Flag'), ('clear_flag', 'Clear Flag'), ('rename', 'Rename'), ('approve', 'Approve'), ('reject', 'Reject')], max_length=32)),
+                ('content', models.CharField(max_length=500)),
+                ('create_date', models.DateTimeField(default=django.utils.timezone.now)),
+                ('profile', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='homepage.profile')),
+                ('rejected_song', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='screening_history', to='uploads.rejectedsong')),
+                ('song', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='screening_history', to='songs.song')),
+            ],
+            options={
+                'db_table': 'uploads_archived_screening_event',
+                'ordering': ['create_date', 'id'],
+            },
+        ),
+    ]
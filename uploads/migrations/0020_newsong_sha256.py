@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-19 21:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('uploads', '0019_stale_upload_job_schedule'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='newsong',
+            name='sha256',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+    ]
@@ -1,11 +1,101 @@
-import subprocess
 import json
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-def get_mod_info(file):
+from django.conf import settings
+
+def get_mod_info(file, timeout=None):
+    """Runs modinfo on the file and returns its parsed metadata, or None if modinfo does not
+    recognize the file. Raises subprocess.TimeoutExpired if modinfo runs longer than timeout
+    seconds, in which case the modinfo process is killed."""
     # Execute modinfo on the file to gather metadata
     modinfo_command = ['modinfo', '--json', file]
     try:
-        modinfo_output = subprocess.check_output(modinfo_command)
+        modinfo_output = subprocess.run(modinfo_command, capture_output=True, check=True, timeout=timeout).stdout
         return json.loads(modinfo_output)
-    except subprocess.CalledProcessError:
+    except (subprocess.CalledProcessError, json.JSONDecodeError):
         return None
+
+class ModInfoResult:
+    """
+    The outcome of analyzing one file: `info` holds the parsed modinfo output, or None if the
+    file is not a recognized module. `error` is set instead if the analysis itself failed, for
+    example because modinfo timed out or crashed. `cached` is True if the info came from the
+    metadata cache rather than from running modinfo.
+    """
+    def __init__(self, file, info=None, error=None, duration=0.0, cached=False):
+        self.file = file
+        self.info = info
+        self.error = error
+        self.duration = duration
+        self.cached = cached
+
+    @property
+    def is_module(self):
+        return self.info is not None
+
+class ModInfoThreadPool:
+    """
+    Runs modinfo over batches of modules on a pool of threads that is kept for the life of the
+    process. Each thread still starts one modinfo process per file, since modinfo takes a single
+    file per invocation; the pool only runs up to max_workers of those processes at once. Every
+    file is bounded by a timeout, and a failure analyzing one file is reported in its result
+    without affecting the rest of the batch.
+    """
+    def __init__(self, max_workers=None, timeout=None):
+        self.max_workers = max_workers or settings.UPLOAD_ANALYSIS_WORKERS
+        self.timeout = timeout or settings.MODINFO_TIMEOUT
+        self.executor = None
+        self.executor_pid = None
+        self.lock = threading.Lock()
+
+    def analyze(self, files):
+        """Analyzes each file, given as a path or as the module's bytes. Returns one ModInfoResult
+        per file, in the same order."""
+        return list(self.get_executor().map(self.analyze_file, files))
+
+    def analyze_file(self, file):
+        started = time.monotonic()
+        try:
+            if isinstance(file, (bytes, bytearray, memoryview)):
+                info = self.analyze_bytes(file)
+            else:
+                info = get_mod_info(os.fspath(file), timeout=self.timeout)
+            return ModInfoResult(file, info=info, duration=time.monotonic() - started)
+        except Exception as e:
+            return ModInfoResult(file, error=e, duration=time.monotonic() - started)
+
+    def analyze_bytes(self, data):
+        with tempfile.NamedTemporaryFile(dir=settings.TEMP_UPLOAD_DIR) as temp_file:
+            temp_file.write(data)
+            temp_file.flush()
+            return get_mod_info(temp_file.name, timeout=self.timeout)
+
+    def get_executor(self):
+        with self.lock:
+            # Threads do not survive a fork, so a pool inherited from a parent process is replaced
+            if self.executor is None or self.executor_pid != os.getpid():
+                self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='modinfo')
+                self.executor_pid = os.getpid()
+            return self.executor
+
+    def close(self):
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown()
+                self.executor = None
+
+_thread_pool = None
+_thread_pool_lock = threading.Lock()
+
+def get_thread_pool():
+    """Returns the modinfo thread pool shared by everything running in this process."""
+    global _thread_pool
+    with _thread_pool_lock:
+        if _thread_pool is None:
+            _thread_pool = ModInfoThreadPool()
+        return _thread_pool
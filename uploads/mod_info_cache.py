@@ -0,0 +1,34 @@
+from uploads.mod_info import ModInfoResult, get_thread_pool
+from uploads.models import ModuleMetadata
+
+def analyze(hashed_files, analyzer=None):
+    """
+    Returns a ModInfoResult for each (hash, file) pair, in the same order. Results are read
+    from the metadata cache where possible; only files whose hash has never been analyzed are
+    passed to the analyzer, once per distinct hash, and their results are added to the cache.
+    Analyzer errors such as timeouts are not cached.
+    """
+    analyzer = analyzer or get_thread_pool()
+    cached = dict(
+        ModuleMetadata.objects.filter(hash__in={file_hash for file_hash, _ in hashed_files}).values_list('hash', 'info')
+    )
+
+    misses = {}
+    for file_hash, file in hashed_files:
+        if file_hash not in cached:
+            misses.setdefault(file_hash, file)
+
+    analyzed = dict(zip(misses, analyzer.analyze(list(misses.values()))))
+    ModuleMetadata.objects.bulk_create(
+        [ModuleMetadata(hash=file_hash, info=result.info) for file_hash, result in analyzed.items() if result.error is None],
+        ignore_conflicts=True
+    )
+
+    results = []
+    for file_hash, file in hashed_files:
+        if file_hash in cached:
+            results.append(ModInfoResult(file, info=cached[file_hash], cached=True))
+        else:
+            result = analyzed[file_hash]
+            results.append(ModInfoResult(file, info=result.info, error=result.error, duration=result.duration))
+    return results
@@ -1,3 +1,5 @@
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
@@ -13,6 +15,11 @@ class NewSong(models.Model):
         )
         db_table = 'uploads_newsong'
         app_label = 'uploads'
+        indexes = [
+            # Only claimed songs have a claim date, and stale claims are found by it
+            models.Index(fields=['claim_date'], name='newsong_active_claim_idx', condition=models.Q(claimed_by__isnull=False)),
+            GinIndex(fields=['similarity_bands'], name='newsong_similarity_bands_idx'),
+        ]
 
     class Flags(models.TextChoices):
         PRE_SCREENED = 'pre-screened', _('Pre-screened')
@@ -29,8 +36,14 @@ class NewSong(models.Model):
     channels=models.PositiveSmallIntegerField()
     instrument_text=models.TextField(max_length=64000, blank=True, null=True)
     comment_text=models.TextField(max_length=64000, blank=True, null=True)
-    hash=models.CharField(max_length=33)
-    pattern_hash=models.CharField(max_length=16, null=True, blank=True)
+    hash=models.CharField(max_length=33, db_index=True)
+    # SHA-256 of the file, computed in the same pass as the MD5; null for songs uploaded before it was recorded
+    sha256=models.CharField(max_length=64, null=True, blank=True)
+    pattern_hash=models.CharField(max_length=16, null=True, blank=True, db_index=True)
+    similarity_signature=ArrayField(models.BigIntegerField(), null=True, blank=True)
+    similarity_bands=ArrayField(models.BigIntegerField(), null=True, blank=True)
+    # Similarity of the closest match found when the song was uploaded, 1 for an identical pattern hash
+    duplicate_score=models.FloatField(null=True, blank=True)
     artist_from_file=models.CharField(max_length=120, null=True, blank=True)
     uploader_profile = models.ForeignKey(Profile, on_delete=models.SET_NULL, null=True, blank=True)
     uploader_ip_address = models.CharField(max_length=32, default='0.0.0.0')
@@ -54,6 +67,9 @@ class RejectedSong(models.Model):
     class Meta:
         db_table = 'uploads_rejectedsong'
         app_label = 'uploads'
+        indexes = [
+            GinIndex(fields=['similarity_bands'], name='rejectedsong_similarity_idx'),
+        ]
 
     class Reasons(models.TextChoices):
         POOR_QUALITY = 'poor-quality', _('Poor quality')
@@ -88,8 +104,10 @@ class RejectedSong(models.Model):
     channels=models.PositiveSmallIntegerField(blank=True, null=True)
     instrument_text=models.TextField(max_length=64000, blank=True)
     comment_text=models.TextField(max_length=64000, blank=True)
-    hash=models.CharField(max_length=33)
-    pattern_hash=models.CharField(max_length=16, blank=True)
+    hash=models.CharField(max_length=33, db_index=True)
+    pattern_hash=models.CharField(max_length=16, blank=True, db_index=True)
+    similarity_signature=ArrayField(models.BigIntegerField(), null=True, blank=True)
+    similarity_bands=ArrayField(models.BigIntegerField(), null=True, blank=True)
     artist_from_file=models.CharField(max_length=120, blank=True)
     uploader_profile = models.ForeignKey(Profile, on_delete=models.SET_NULL, null=True, blank=True, related_name='rejected_uploads')
     uploader_ip_address = models.CharField(max_length=32, default='0.0.0.0', blank=True)
@@ -97,6 +115,27 @@ class RejectedSong(models.Model):
     create_date=models.DateTimeField(default=timezone.now)
     update_date=models.DateTimeField(auto_now=True)
 
+    def __str__(self) -> str:
+        return self.filename
+
+class DuplicateCandidate(models.Model):
+    """A song in the archive, the screening queue or the rejections that an upload may duplicate,
+    found when the upload was processed. Exactly one of song, queued_song and rejected_song is set."""
+    class Meta:
+        db_table = 'uploads_duplicate_candidate'
+        ordering = ['-similarity']
+
+    class MatchTypes(models.TextChoices):
+        PATTERN_HASH = 'pattern-hash', _('Identical patterns')
+        SIMILAR_TEXT = 'similar-text', _('Similar title and instruments')
+
+    new_song = models.ForeignKey(NewSong, on_delete=models.CASCADE, related_name='duplicate_candidates')
+    song = models.ForeignKey(Song, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    queued_song = models.ForeignKey(NewSong, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    rejected_song = models.ForeignKey(RejectedSong, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    match_type = models.CharField(max_length=16, choices=MatchTypes.choices)
+    similarity = models.FloatField()
+
 class ScreeningEvent(models.Model):
     class Meta:
         db_table = 'uploads_screening_event'
@@ -107,9 +146,149 @@ class ScreeningEvent(models.Model):
         APPLY_FLAG = 'apply_flag', _('Apply Flag')
         CLEAR_FLAG = 'clear_flag', _('Clear Flag')
         RENAME = 'rename', _('Rename')
+        APPROVE = 'approve', _('Approve')
+        REJECT = 'reject', _('Reject')
 
     new_song = models.ForeignKey(NewSong, on_delete=models.CASCADE, related_name='screening_events')
     profile = models.ForeignKey(Profile, on_delete=models.SET_NULL, null=True, blank=True, related_name='screening_events')
     type = models.CharField(max_length=32, choices=Types.choices)
     content = models.CharField(max_length=500)
     create_date = models.DateTimeField(default=timezone.now)
+
+class ArchivedScreeningEvent(models.Model):
+    """A screening event of a song that has left the queue, kept with the song it was approved as
+    or the rejection it became, so the live events only cover the queue. Exactly one of song and
+    rejected_song is set."""
+    class Meta:
+        db_table = 'uploads_archived_screening_event'
+        ordering = ['create_date', 'id']
+
+    song = models.ForeignKey(Song, on_delete=models.CASCADE, null=True, blank=True, related_name='screening_history')
+    rejected_song = models.ForeignKey(RejectedSong, on_delete=models.CASCADE, null=True, blank=True, related_name='screening_history')
+    profile = models.ForeignKey(Profile, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    type = models.CharField(max_length=32, choices=ScreeningEvent.Types.choices)
+    content = models.CharField(max_length=500)
+    create_date = models.DateTimeField(default=timezone.now)
+
+class ScreeningQueueChange(models.Model):
+    """A change to the screening queue, streamed to open screening pages. Changes outlive the
+    songs they are about, so the song is referenced by id only."""
+    class Meta:
+        db_table = 'uploads_screening_queue_change'
+
+    class Types(models.TextChoices):
+        UPLOAD = 'upload', _('Upload')
+        CLAIM = 'claim', _('Claim')
+        UNCLAIM = 'unclaim', _('Unclaim')
+        APPLY_FLAG = 'apply_flag', _('Apply Flag')
+        CLEAR_FLAG = 'clear_flag', _('Clear Flag')
+        RENAME = 'rename', _('Rename')
+        APPROVE = 'approve', _('Approve')
+        REJECT = 'reject', _('Reject')
+
+    new_song_id = models.IntegerField()
+    type = models.CharField(max_length=16, choices=Types.choices)
+    filename = models.CharField(max_length=120)
+    flag = models.CharField(max_length=32, choices=NewSong.Flags.choices, blank=True, null=True)
+    profile = models.ForeignKey(Profile, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    screener_name = models.CharField(max_length=255, blank=True)
+    create_date = models.DateTimeField(default=timezone.now, db_index=True)
+
+class UploadJob(models.Model):
+    class Meta:
+        db_table = 'uploads_upload_job'
+
+    class Statuses(models.TextChoices):
+        PENDING = 'pending', _('Pending')
+        PROCESSING = 'processing', _('Processing')
+        COMPLETE = 'complete', _('Complete')
+        FAILED = 'failed', _('Failed')
+
+    uploader_profile = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name='upload_jobs')
+    uploader_ip_address = models.CharField(max_length=32, default='0.0.0.0')
+    is_by_uploader = models.BooleanField()
+    filename = models.CharField(max_length=255)
+    file_path = models.CharField(max_length=500, blank=True)
+    status = models.CharField(max_length=16, choices=Statuses.choices, default=Statuses.PENDING, db_index=True)
+    create_date = models.DateTimeField(default=timezone.now)
+    start_date = models.DateTimeField(null=True, blank=True)
+    complete_date = models.DateTimeField(null=True, blank=True)
+
+    def is_finished(self):
+        return self.status in (self.Statuses.COMPLETE, self.Statuses.FAILED)
+
+class UploadJobFile(models.Model):
+    class Meta:
+        db_table = 'uploads_upload_job_file'
+        ordering = ['id']
+
+    class Statuses(models.TextChoices):
+        SUCCESS = 'success', _('Success')
+        FAILED = 'failed', _('Failed')
+
+    job = models.ForeignKey(UploadJob, on_delete=models.CASCADE, related_name='files')
+    filename = models.CharField(max_length=255)
+    status = models.CharField(max_length=16, choices=Statuses.choices)
+    reason = models.CharField(max_length=500, blank=True)
+    title = models.CharField(max_length=120, blank=True)
+    format = models.CharField(max_length=6, choices=Song.Formats.choices, blank=True)
+    new_song = models.ForeignKey(NewSong, on_delete=models.SET_NULL, null=True, blank=True, related_name='upload_job_files')
+    create_date = models.DateTimeField(default=timezone.now)
+
+class ScreeningBatch(models.Model):
+    """A bulk screening action that runs in a worker. results holds the outcome for each song."""
+    class Meta:
+        db_table = 'uploads_screening_batch'
+
+    class Actions(models.TextChoices):
+        APPROVE = 'approve', _('Approve')
+        REJECT = 'reject', _('Reject')
+
+    class Statuses(models.TextChoices):
+        PENDING = 'pending', _('Pending')
+        PROCESSING = 'processing', _('Processing')
+        COMPLETE = 'complete', _('Complete')
+        FAILED = 'failed', _('Failed')
+
+    action = models.CharField(max_length=16, choices=Actions.choices)
+    profile = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name='screening_batches')
+    new_song_ids = models.JSONField(default=list)
+    options = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=16, choices=Statuses.choices, default=Statuses.PENDING)
+    results = models.JSONField(default=list, blank=True)
+    create_date = models.DateTimeField(default=timezone.now)
+    complete_date = models.DateTimeField(null=True, blank=True)
+
+    def is_finished(self):
+        return self.status in (self.Statuses.COMPLETE, self.Statuses.FAILED)
+
+class ChunkedUpload(models.Model):
+    """An upload sent as a series of chunks, so an interrupted upload can resume from the last
+    chunk received. offset is the number of bytes received so far. Once every byte has arrived
+    the upload is finalized into an UploadJob."""
+    class Meta:
+        db_table = 'uploads_chunked_upload'
+
+    uploader_profile = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name='chunked_uploads')
+    uploader_ip_address = models.CharField(max_length=32, default='0.0.0.0')
+    is_by_uploader = models.BooleanField()
+    filename = models.CharField(max_length=255)
+    file_path = models.CharField(max_length=500)
+    size = models.BigIntegerField()
+    offset = models.BigIntegerField(default=0)
+    job = models.OneToOneField(UploadJob, on_delete=models.SET_NULL, null=True, blank=True, related_name='chunked_upload')
+    create_date = models.DateTimeField(default=timezone.now)
+    update_date = models.DateTimeField(default=timezone.now)
+
+    def is_complete(self):
+        return self.offset == self.size
+
+class ModuleMetadata(models.Model):
+    """modinfo output for a file, keyed on the file's MD5 hash (the same hash as Song.hash,
+    NewSong.hash and RejectedSong.hash). info is null if modinfo did not recognize the file."""
+    class Meta:
+        db_table = 'uploads_module_metadata'
+
+    hash = models.CharField(max_length=33, unique=True)
+    info = models.JSONField(null=True, blank=True)
+    create_date = models.DateTimeField(default=timezone.now)
@@ -0,0 +1,201 @@
+import datetime
+import logging
+import os
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django_q.tasks import async_task
+
+from modarchive import file_repository
+from songs import similarity
+from songs.models import Song
+from uploads import constants, mod_info_cache
+from uploads.duplicates import find_upload_duplicates, record_similar_songs
+from uploads.models import NewSong, ScreeningQueueChange, UploadJob, UploadJobFile
+from uploads.screening_stream import publish_changes
+
+logger = logging.getLogger(__name__)
+
+MEMBER_REJECTION_MESSAGES = {
+    file_repository.MEMBER_DUPLICATE_NAME: constants.UPLOAD_ZIP_DUPLICATE_FILENAME,
+    file_repository.MEMBER_SUSPICIOUS_COMPRESSION: constants.UPLOAD_ZIP_SUSPICIOUS_COMPRESSION,
+    file_repository.MEMBER_UNREADABLE: constants.UPLOAD_ZIP_UNREADABLE,
+}
+
+def get_archive_rejection_message(reason):
+    if reason == file_repository.ARCHIVE_TOO_MANY_FILES:
+        return constants.UPLOAD_ZIP_TOO_MANY_FILES%(settings.UPLOAD_ZIP_MAX_FILES)
+    return constants.UPLOAD_ZIP_TOO_LARGE%(settings.UPLOAD_ZIP_MAX_UNCOMPRESSED_SIZE)
+
+def queue_upload_job(job: UploadJob, file_path):
+    """Records where the job's upload is stored and queues it for a worker to process."""
+    job.file_path = file_path
+    job.save()
+    async_task('modarchive.tasks.process_upload', job.id, timeout=settings.UPLOAD_PROCESSING_TIMEOUT)
+
+def process_upload_job(job: UploadJob):
+    """
+    Extracts, analyzes and checks every module in a stored upload, and records the outcome
+    of each one as an UploadJobFile. Accepted modules become NewSongs awaiting screening.
+    """
+    job.status = UploadJob.Statuses.PROCESSING
+    job.start_date = timezone.now()
+    job.save(update_fields=['status', 'start_date'])
+
+    upload_processor = file_repository.UploadProcessor(job.file_path)
+    try:
+        # Extraction and analysis run concurrently, but results are recorded in upload order
+        try:
+            ingested_files = upload_processor.get_files(max_workers=settings.UPLOAD_ANALYSIS_WORKERS)
+        except file_repository.ArchiveRejected as e:
+            ingested_files = []
+            add_failure(job, job.filename, get_archive_rejection_message(e.reason))
+
+        for name, reason in upload_processor.rejected_members:
+            add_failure(job, name, MEMBER_REJECTION_MESSAGES[reason])
+
+        # Files are hashed during extraction, so duplicates are rejected before they are analyzed
+        rejections = get_rejection_reasons(ingested_files)
+        to_analyze = [ingested_file for ingested_file in ingested_files if ingested_file not in rejections]
+        analyses = dict(zip(to_analyze, analyze_files(to_analyze)))
+
+        for ingested_file in ingested_files:
+            if ingested_file in rejections:
+                add_failure(job, ingested_file.name, rejections[ingested_file])
+                continue
+
+            try:
+                with transaction.atomic():
+                    process_file(job, upload_processor, ingested_file, analyses[ingested_file])
+            except Exception:
+                logger.exception(f"Upload job {job.id} failed to process {ingested_file.name}.")
+                add_failure(job, ingested_file.name, constants.UPLOAD_PROCESSING_FAILED)
+        job.status = UploadJob.Statuses.COMPLETE
+    except Exception:
+        logger.exception(f"Upload job {job.id} failed.")
+        job.status = UploadJob.Statuses.FAILED
+        raise
+    finally:
+        upload_processor.remove_processing_directory()
+        job.complete_date = timezone.now()
+        job.save(update_fields=['status', 'complete_date'])
+
+def get_rejection_reasons(ingested_files):
+    """Returns a dict of the files that can be rejected without analyzing them, mapped to the
+    failure reason: names that are too long, and files that already exist."""
+    rejections = {}
+    seen_hashes = set()
+    duplicates = find_upload_duplicates(ingested_file.md5 for ingested_file in ingested_files)
+    for ingested_file in ingested_files:
+        # Ensure the song's filename length does not exceed the limit
+        if len(ingested_file.name) > settings.MAXIMUM_UPLOAD_FILENAME_LENGTH:
+            rejections[ingested_file] = constants.UPLOAD_FILENAME_TOO_LONG%(settings.MAXIMUM_UPLOAD_FILENAME_LENGTH)
+        elif ingested_file.md5 in seen_hashes:
+            # An identical file earlier in the same upload will be queued first
+            rejections[ingested_file] = constants.UPLOAD_DUPLICATE_SONG_IN_PROCESSING_QUEUE
+        elif ingested_file.md5 in duplicates:
+            rejections[ingested_file] = duplicates[ingested_file.md5]
+        seen_hashes.add(ingested_file.md5)
+
+    return rejections
+
+def analyze_files(ingested_files):
+    """Returns one ModInfoResult per file, in the same order. Files analyzed before, as
+    identified by their hash, are served from the metadata cache."""
+    return mod_info_cache.analyze([(ingested_file.md5, ingested_file.path) for ingested_file in ingested_files])
+
+def process_file(job, upload_processor, ingested_file, analysis):
+    file_name = ingested_file.name
+
+    if analysis.error:
+        raise analysis.error
+
+    modinfo = analysis.info
+    if modinfo is None:
+        return add_failure(job, file_name, constants.UPLOAD_UNRECOGNIZED_FORMAT)
+
+    # Ensure the song is not in an unsupported format
+    mod_format = modinfo.get('format', 'unknown').lower()
+    if mod_format in settings.UNSUPPORTED_FORMATS:
+        return add_failure(job, file_name, constants.UPLOAD_UNSUPPORTED_FORMAT)
+
+    file_name = rename_file(ingested_file, mod_format)
+
+    new_song = NewSong(
+        filename=file_name,
+        filename_unzipped=file_name,
+        title=modinfo.get('name', 'untitled'),
+        format=getattr(Song.Formats, mod_format.upper(), None),
+        file_size=ingested_file.size,
+        channels=int(modinfo.get('channels', '')),
+        instrument_text=modinfo.get('instruments', ''),
+        comment_text=modinfo.get('comment', ''),
+        hash=ingested_file.md5,
+        sha256=ingested_file.sha256,
+        pattern_hash=modinfo.get('pattern_hash', ''),
+        artist_from_file=modinfo.get('artist', ''),
+        uploader_profile_id=job.uploader_profile_id,
+        uploader_ip_address=job.uploader_ip_address,
+        is_by_uploader=job.is_by_uploader
+    )
+    similarity.set_signature(new_song)
+    new_song.save()
+    record_similar_songs(new_song)
+    publish_changes(ScreeningQueueChange.Types.UPLOAD, [new_song])
+
+    upload_processor.move_into_new_songs(ingested_file)
+
+    return UploadJobFile.objects.create(
+        job=job,
+        filename=new_song.filename,
+        status=UploadJobFile.Statuses.SUCCESS,
+        title=new_song.title,
+        format=new_song.format,
+        new_song=new_song
+    )
+
+def rename_file(ingested_file, mod_format):
+    file_name = ingested_file.name
+
+    # Rename the file if the extension does not match the format returned by modinfo
+    file_ext = os.path.splitext(file_name)[1].lstrip('.')
+    if file_ext.lower() != mod_format:
+        file_name = os.path.splitext(file_name)[0] + '.' + mod_format
+
+    # Replace whitespace or consecutive underscores with a single underscore
+    if any(char.isupper() for char in file_name) or ' ' in file_name or '__' in file_name:
+        new_file_name = file_name.lower().replace(' ', '_')
+        while '__' in new_file_name:
+            new_file_name = new_file_name.replace('__', '_')
+        file_name = new_file_name
+
+    if file_name != ingested_file.name:
+        ingested_file.rename(file_name)
+
+    return file_name
+
+def add_failure(job, file_name, reason):
+    return UploadJobFile.objects.create(
+        job=job,
+        filename=file_name,
+        status=UploadJobFile.Statuses.FAILED,
+        reason=reason
+    )
+
+def fail_stale_upload_jobs():
+    """Marks the upload jobs still processing UPLOAD_PROCESSING_STALE_AFTER seconds after they
+    started as failed. Their worker was killed, by the task timeout for instance, before it could
+    record an outcome. Returns the number of jobs marked."""
+    cutoff = timezone.now() - datetime.timedelta(seconds=settings.UPLOAD_PROCESSING_STALE_AFTER)
+    with transaction.atomic():
+        stale_jobs = list(
+            UploadJob.objects.filter(status=UploadJob.Statuses.PROCESSING, start_date__lt=cutoff)
+            .select_for_update(skip_locked=True)
+        )
+        for job in stale_jobs:
+            job.status = UploadJob.Statuses.FAILED
+            job.complete_date = timezone.now()
+            job.save(update_fields=['status', 'complete_date'])
+            add_failure(job, job.filename, constants.UPLOAD_PROCESSING_FAILED)
+    return len(stale_jobs)
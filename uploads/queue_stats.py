@@ -0,0 +1,87 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Min, Q
+
+from uploads import constants
+from uploads.models import NewSong
+
+QUEUE_STATS_KEY = 'screening_queue_stats'
+
+# Conditions of the screening queue filters that are the same for every screener
+SHARED_FILTER_CONDITIONS = {
+    # High priority is any song not uploaded by the placeholder account, which has no user
+    constants.HIGH_PRIORITY_FILTER: Q(uploader_profile__user_id__isnull=False, claimed_by=None, flag=None),
+    constants.LOW_PRIORITY_FILTER: Q(uploader_profile__user_id=None, claimed_by=None, flag=None),
+    constants.BY_UPLOADER_FILTER: Q(is_by_uploader=True, claimed_by=None, flag=None),
+    constants.PRE_SCREENED_FILTER: Q(flag=NewSong.Flags.PRE_SCREENED),
+    constants.PRE_SCREENED_AND_RECOMMENDED_FILTER: Q(flag=NewSong.Flags.PRE_SCREENED_PLUS),
+    constants.NEEDS_SECOND_OPINION_FILTER: Q(flag=NewSong.Flags.NEEDS_SECOND_OPINION),
+    constants.POSSIBLE_DUPLICATE_FILTER: Q(flag=NewSong.Flags.POSSIBLE_DUPLICATE),
+    constants.UNDER_INVESTIGATION_FILTER: Q(flag=NewSong.Flags.UNDER_INVESTIGATION),
+}
+
+def get_filter_condition(filter_option, profile):
+    """Returns the condition on NewSong for a screening queue filter, as seen by profile."""
+    if filter_option == constants.MY_SCREENING_FILTER:
+        return Q(claimed_by=profile)
+    if filter_option == constants.OTHERS_SCREENING_FILTER:
+        return Q(claimed_by__isnull=False) & ~Q(claimed_by=profile)
+    return SHARED_FILTER_CONDITIONS[filter_option]
+
+def compute_queue_stats():
+    """
+    Counts the songs and finds the oldest upload in every shared filter, and for every screener
+    with claims, in a single query grouped by claimant. The screener-specific filters are
+    derived from the per-claimant rows, so the result is the same for everyone and can be cached.
+    """
+    filters = list(SHARED_FILTER_CONDITIONS.items())
+    aggregates = {'claim_count': Count('id'), 'claim_oldest': Min('create_date')}
+    for index, (_, condition) in enumerate(filters):
+        aggregates[f'count_{index}'] = Count('id', filter=condition)
+        aggregates[f'oldest_{index}'] = Min('create_date', filter=condition)
+
+    rows = list(NewSong.objects.values('claimed_by', 'claimed_by__display_name').annotate(**aggregates).order_by())
+
+    filter_stats = {}
+    for index, (filter_option, _) in enumerate(filters):
+        oldest_dates = [row[f'oldest_{index}'] for row in rows if row[f'oldest_{index}']]
+        filter_stats[filter_option] = {
+            'count': sum(row[f'count_{index}'] for row in rows),
+            'oldest': min(oldest_dates, default=None),
+        }
+
+    claims = {
+        row['claimed_by']: {'name': row['claimed_by__display_name'], 'count': row['claim_count'], 'oldest': row['claim_oldest']}
+        for row in rows if row['claimed_by'] is not None
+    }
+    return {'filters': filter_stats, 'claims': claims}
+
+def get_queue_stats(profile):
+    """
+    Returns the number of songs and the date of the oldest upload in each screening queue filter,
+    as seen by profile, and the number of songs claimed by each screener. The counts are cached
+    for SCREENING_QUEUE_STATS_CACHE_TIMEOUT seconds, or until a screening action changes the queue.
+    """
+    stats = cache.get(QUEUE_STATS_KEY)
+    if stats is None:
+        stats = compute_queue_stats()
+        cache.set(QUEUE_STATS_KEY, stats, settings.SCREENING_QUEUE_STATS_CACHE_TIMEOUT)
+
+    mine = stats['claims'].get(profile.id)
+    others = [claim for profile_id, claim in stats['claims'].items() if profile_id != profile.id]
+
+    filters = dict(stats['filters'])
+    filters[constants.MY_SCREENING_FILTER] = {
+        'count': mine['count'] if mine else 0,
+        'oldest': mine['oldest'] if mine else None,
+    }
+    filters[constants.OTHERS_SCREENING_FILTER] = {
+        'count': sum(claim['count'] for claim in others),
+        'oldest': min((claim['oldest'] for claim in others), default=None),
+    }
+
+    claims = sorted(stats['claims'].values(), key=lambda claim: (-claim['count'], claim['name']))
+    return {'filters': filters, 'claims': claims}
+
+def invalidate_queue_stats():
+    cache.delete(QUEUE_STATS_KEY)
@@ -0,0 +1,173 @@
+import os
+import re
+import shutil
+import time
+from datetime import timedelta
+from itertools import chain
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from uploads.bulk_screening import get_rejected_file_path
+from uploads.models import ChunkedUpload, RejectedSong, UploadJob
+
+REJECTED_FILE_DATE = re.compile(r'^(\d{8})-')
+
+class RetentionReport:
+    """What a retention run removed, or would remove in a dry run."""
+    def __init__(self, dry_run=False):
+        self.dry_run = dry_run
+        self.rejections_purged = 0
+        self.files_removed = 0
+        self.chunked_uploads_removed = 0
+        self.directories_removed = 0
+        self.bytes_reclaimed = 0
+        # So a path is counted once in a dry run, where nothing actually disappears
+        self.removed_paths = set()
+
+    def __str__(self):
+        verb = 'Would remove' if self.dry_run else 'Removed'
+        return (f'{verb} {self.rejections_purged} temporary rejections, {self.files_removed} rejected files, '
+                f'{self.chunked_uploads_removed} abandoned chunked uploads and {self.directories_removed} processing directories, '
+                f'reclaiming {self.bytes_reclaimed} bytes.')
+
+def get_size(path):
+    """Returns the size of a file, or of everything in a directory, in bytes."""
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path) for name in names
+    )
+
+def get_last_modified(path):
+    """Returns the most recent modification time of a directory or anything in it."""
+    return max(
+        chain([os.path.getmtime(path)], (
+            os.path.getmtime(os.path.join(root, name))
+            for root, dirs, names in os.walk(path) for name in chain(dirs, names)
+        ))
+    )
+
+def remove_path(path, report):
+    """Removes a file or directory, adding its size to the report. A path already removed, by
+    another run for instance, is skipped."""
+    try:
+        size = get_size(path)
+        if not report.dry_run:
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+    except FileNotFoundError:
+        return False
+    report.bytes_reclaimed += size
+    report.removed_paths.add(os.path.normpath(path))
+    return True
+
+def purge_temporary_rejections(report):
+    """
+    Deletes the temporary rejections made more than REJECTED_TEMPORARY_RETENTION_DAYS ago and
+    their files, RETENTION_BATCH_SIZE at a time. Each batch is locked and deleted in its own
+    transaction, skipping rows another run has locked, and the files are only removed once the
+    deletion is committed.
+    """
+    cutoff = timezone.now() - timedelta(days=settings.REJECTED_TEMPORARY_RETENTION_DAYS)
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            batch = list(
+                RejectedSong.objects.filter(is_temporary=True, rejected_date__lt=cutoff, pk__gt=last_id)
+                .select_for_update(skip_locked=True)
+                .only('id', 'filename', 'rejected_date')
+                .order_by('id')[:settings.RETENTION_BATCH_SIZE]
+            )
+            if not batch:
+                return
+            if not report.dry_run:
+                RejectedSong.objects.filter(pk__in=[rejected.id for rejected in batch]).delete()
+
+        last_id = batch[-1].id
+        report.rejections_purged += len(batch)
+        for rejected in batch:
+            path = get_rejected_file_path(rejected.filename, timezone.localdate(rejected.rejected_date))
+            if remove_path(path, report):
+                report.files_removed += 1
+
+def remove_expired_rejected_files(report):
+    """Removes the files of rejections dated more than REJECTED_FILE_RETENTION_DAYS ago, going by
+    the date their name starts with. The rejections themselves are kept, since uploads are checked
+    against them. Does nothing if REJECTED_FILE_RETENTION_DAYS is None."""
+    if settings.REJECTED_FILE_RETENTION_DAYS is None:
+        return
+
+    cutoff = (timezone.localdate() - timedelta(days=settings.REJECTED_FILE_RETENTION_DAYS)).strftime('%Y%m%d')
+    with os.scandir(settings.REJECTED_FILE_DIR) as entries:
+        expired = [
+            entry.path for entry in entries
+            if entry.is_file() and (match := REJECTED_FILE_DATE.match(entry.name)) and match.group(1) < cutoff
+        ]
+    for path in expired:
+        if remove_path(path, report):
+            report.files_removed += 1
+
+def get_chunked_upload_cutoff():
+    return timezone.now() - timedelta(hours=settings.CHUNKED_UPLOAD_EXPIRY_HOURS)
+
+def remove_abandoned_chunked_uploads(report):
+    """Deletes the chunked uploads that were never finalized and have not received a chunk within
+    CHUNKED_UPLOAD_EXPIRY_HOURS, and removes their directories."""
+    abandoned = list(
+        ChunkedUpload.objects.filter(job__isnull=True, update_date__lt=get_chunked_upload_cutoff()).only('id', 'file_path')
+    )
+    for upload in abandoned:
+        if not report.dry_run:
+            upload.delete()
+        report.chunked_uploads_removed += 1
+        if remove_path(os.path.dirname(upload.file_path), report):
+            report.directories_removed += 1
+
+def get_active_processing_directories():
+    """Returns the processing directories of uploads that are still being sent or processed."""
+    active_statuses = [UploadJob.Statuses.PENDING, UploadJob.Statuses.PROCESSING]
+    file_paths = chain(
+        UploadJob.objects.filter(status__in=active_statuses).values_list('file_path', flat=True),
+        ChunkedUpload.objects.filter(
+            Q(job__isnull=True, update_date__gte=get_chunked_upload_cutoff()) | Q(job__status__in=active_statuses)
+        ).values_list('file_path', flat=True),
+    )
+    return {os.path.normpath(os.path.dirname(path)) for path in file_paths if path}
+
+def sweep_processing_directories(report):
+    """
+    Removes the directories in TEMP_UPLOAD_DIR that nothing has been written to for
+    TEMP_UPLOAD_RETENTION_HOURS and that no pending upload uses. An upload's directory is
+    created before its job records it, so only the age protects a directory that new.
+    """
+    cutoff = time.time() - settings.TEMP_UPLOAD_RETENTION_HOURS * 60 * 60
+    with os.scandir(settings.TEMP_UPLOAD_DIR) as entries:
+        candidates = [os.path.normpath(entry.path) for entry in entries if entry.is_dir(follow_symlinks=False)]
+
+    # Uploads are looked up after listing, so a directory recorded in between is still seen
+    active = get_active_processing_directories()
+    for path in candidates:
+        try:
+            if path in active or path in report.removed_paths or get_last_modified(path) >= cutoff:
+                continue
+        except FileNotFoundError:
+            continue
+        if remove_path(path, report):
+            report.directories_removed += 1
+
+def apply_retention_policies(dry_run=False):
+    """Purges expired temporary rejections, expired rejected files, abandoned chunked uploads and
+    abandoned processing directories. Returns a RetentionReport of what was removed, or only
+    counted if dry_run is set."""
+    report = RetentionReport(dry_run)
+    purge_temporary_rejections(report)
+    remove_expired_rejected_files(report)
+    remove_abandoned_chunked_uploads(report)
+    sweep_processing_directories(report)
+    return report
@@ -0,0 +1,81 @@
+import asyncio
+import json
+import time
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+from uploads.models import ScreeningQueueChange
+
+# Idle streams send a comment this often, so proxies do not close them
+KEEPALIVE_SECONDS = 15
+# Most changes sent per poll; a stream that falls behind catches up over several polls
+MAX_CHANGES_PER_POLL = 200
+
+def publish_changes(change_type, new_songs, profile=None):
+    """Records a change of the given type, made by profile, to each of the new songs for the
+    screening pages that are open. The songs are recorded as they are after the change."""
+    ScreeningQueueChange.objects.bulk_create([
+        ScreeningQueueChange(
+            new_song_id=new_song.id,
+            type=change_type,
+            filename=new_song.filename,
+            flag=new_song.flag,
+            profile=profile,
+            screener_name=profile.display_name if profile else '',
+        )
+        for new_song in new_songs
+    ])
+
+def get_last_change_id():
+    return ScreeningQueueChange.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+def get_changes_after(change_id):
+    return list(ScreeningQueueChange.objects.filter(pk__gt=change_id).order_by('id')[:MAX_CHANGES_PER_POLL])
+
+def format_event(change, profile_id):
+    data = {
+        'new_song_id': change.new_song_id,
+        'filename': change.filename,
+        'flag': change.flag,
+        'screener': change.screener_name,
+        'mine': profile_id is not None and change.profile_id == profile_id,
+    }
+    return f'id: {change.id}\nevent: {change.type}\ndata: {json.dumps(data)}\n\n'
+
+async def stream_changes(last_change_id, profile_id):
+    """
+    Yields the changes to the screening queue after last_change_id as server-sent events. The
+    change table is polled every SCREENING_STREAM_POLL_INTERVAL seconds, which is a range scan
+    of its primary key, and the stream ends after SCREENING_STREAM_MAX_DURATION seconds. The
+    browser then reconnects from the last event it received.
+    """
+    get_changes = sync_to_async(get_changes_after)
+    started = last_sent = time.monotonic()
+
+    yield f'retry: {settings.SCREENING_STREAM_RETRY_MILLISECONDS}\n\n'
+    while True:
+        changes = await get_changes(last_change_id)
+        for change in changes:
+            last_change_id = change.id
+            yield format_event(change, profile_id)
+
+        now = time.monotonic()
+        if changes:
+            last_sent = now
+        elif now - last_sent >= KEEPALIVE_SECONDS:
+            last_sent = now
+            yield ': keepalive\n\n'
+
+        if now - started >= settings.SCREENING_STREAM_MAX_DURATION:
+            return
+        await asyncio.sleep(settings.SCREENING_STREAM_POLL_INTERVAL)
+
+def prune_queue_changes():
+    """Deletes the queue changes older than SCREENING_QUEUE_CHANGE_RETENTION_HOURS, which no open
+    page still needs. Returns the number of changes deleted."""
+    cutoff = timezone.now() - timedelta(hours=settings.SCREENING_QUEUE_CHANGE_RETENTION_HOURS)
+    deleted, _ = ScreeningQueueChange.objects.filter(create_date__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,47 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from homepage.tests import factories
+from uploads import factories as upload_factories
+from uploads.claims import expire_stale_claims
+from uploads.models import NewSong, ScreeningEvent
+
+class ExpireStaleClaimsTests(TestCase):
+    def test_releases_claims_older_than_expiry_window(self):
+        # Arrange
+        screener = factories.UserFactory()
+        stale_song = upload_factories.NewSongFactory(claimed_by=screener.profile, claim_date=timezone.now() - timedelta(hours=49))
+        recent_song = upload_factories.NewSongFactory(claimed_by=screener.profile, claim_date=timezone.now() - timedelta(hours=47))
+        unclaimed_song = upload_factories.NewSongFactory()
+
+        # Act
+        expired_count = expire_stale_claims()
+
+        # Assert
+        self.assertEqual(1, expired_count)
+        stale_song.refresh_from_db()
+        self.assertIsNone(stale_song.claimed_by)
+        self.assertIsNone(stale_song.claim_date)
+        recent_song.refresh_from_db()
+        self.assertEqual(screener.profile, recent_song.claimed_by)
+
+        event = ScreeningEvent.objects.get()
+        self.assertEqual(stale_song.id, event.new_song_id)
+        self.assertIsNone(event.profile)
+        self.assertEqual(ScreeningEvent.Types.UNCLAIM, event.type)
+        self.assertEqual(f'Claim by {screener.profile.display_name} expired after 48 hours', event.content)
+        self.assertFalse(ScreeningEvent.objects.filter(new_song=unclaimed_song).exists())
+
+    @override_settings(SCREENING_CLAIM_EXPIRY_HOURS=2)
+    def test_expiry_window_is_configurable(self):
+        # Arrange
+        song = upload_factories.NewSongFactory(claimed_by=factories.UserFactory().profile, claim_date=timezone.now() - timedelta(hours=3))
+
+        # Act
+        expired_count = expire_stale_claims()
+
+        # Assert
+        self.assertEqual(1, expired_count)
+        self.assertIsNone(NewSong.objects.get(pk=song.pk).claimed_by)
@@ -0,0 +1,222 @@
+from django.test import TestCase, override_settings
+
+from songs import similarity
+from songs.factories import SongFactory
+from songs.models import Song
+from uploads import constants
+from uploads.duplicates import DuplicateChecker, HashBloomFilter, find_duplicates, find_similar_songs, record_similar_songs
+from uploads.models import DuplicateCandidate, NewSong, ScreeningEvent
+from uploads.factories import NewSongFactory, RejectedSongFactory
+
+class FindDuplicatesTests(TestCase):
+    def test_resolves_all_hashes_in_one_query(self):
+        # Arrange
+        SongFactory(hash='in-archive')
+        NewSongFactory(hash='in-queue')
+        RejectedSongFactory(hash='rejected', is_temporary=False)
+        RejectedSongFactory(hash='temporarily-rejected', is_temporary=True)
+
+        # Act
+        with self.assertNumQueries(1):
+            duplicates = find_duplicates(['in-archive', 'in-queue', 'rejected', 'temporarily-rejected', 'new'])
+
+        # Assert
+        self.assertEqual({
+            'in-archive': constants.UPLOAD_DUPLICATE_SONG_IN_ARCHIVE,
+            'in-queue': constants.UPLOAD_DUPLICATE_SONG_IN_PROCESSING_QUEUE,
+            'rejected': constants.UPLOAD_SONG_PREVIOUSLY_REJECTED,
+        }, duplicates)
+
+    def test_archive_takes_precedence_over_queue(self):
+        # Arrange
+        SongFactory(hash='both')
+        NewSongFactory(hash='both')
+
+        # Act
+        duplicates = find_duplicates(['both'])
+
+        # Assert
+        self.assertEqual({'both': constants.UPLOAD_DUPLICATE_SONG_IN_ARCHIVE}, duplicates)
+
+class DuplicateCheckerTests(TestCase):
+    def test_bloom_filter_contains_added_values(self):
+        # Arrange
+        bloom_filter = HashBloomFilter(capacity=100)
+
+        # Act
+        for i in range(100):
+            bloom_filter.add(f'hash-{i}')
+
+        # Assert
+        self.assertTrue(all(f'hash-{i}' in bloom_filter for i in range(100)))
+        self.assertLess(sum(f'other-{i}' in bloom_filter for i in range(1000)), 100)
+
+    def test_skips_query_for_definitely_new_hashes(self):
+        # Arrange
+        SongFactory(hash='in-archive')
+        checker = DuplicateChecker(capacity=100)
+        checker.refresh()
+
+        # Act
+        duplicates = checker.find_duplicates(['definitely-new'])
+
+        # Assert
+        self.assertEqual({}, duplicates)
+
+    def test_finds_rows_added_after_the_filter_was_built(self):
+        # Arrange
+        checker = DuplicateChecker(capacity=100)
+        checker.find_duplicates(['anything'])
+        NewSongFactory(hash='added-later')
+
+        # Act
+        duplicates = checker.find_duplicates(['added-later'])
+
+        # Assert
+        self.assertEqual({'added-later': constants.UPLOAD_DUPLICATE_SONG_IN_PROCESSING_QUEUE}, duplicates)
+
+    def test_finds_rows_committed_after_rows_with_higher_ids(self):
+        # Arrange
+        first_id = NewSongFactory().id
+        NewSongFactory(id=first_id + 1000)
+        checker = DuplicateChecker(capacity=100)
+        checker.refresh()
+        # Stands in for a row whose id was assigned before the refresh but that committed after it
+        NewSongFactory(id=first_id + 1, hash='committed-late')
+
+        # Act
+        duplicates = checker.find_duplicates(['committed-late'])
+
+        # Assert
+        self.assertEqual({'committed-late': constants.UPLOAD_DUPLICATE_SONG_IN_PROCESSING_QUEUE}, duplicates)
+
+    @override_settings(UPLOAD_DUPLICATE_BLOOM_FILTER_REFRESH_OVERLAP=0)
+    def test_rows_seen_longer_ago_than_the_overlap_are_not_read_again(self):
+        # Arrange
+        song = SongFactory()
+        checker = DuplicateChecker(capacity=100)
+
+        # Act
+        checker.refresh()
+        checker.refresh()
+
+        # Assert
+        self.assertEqual(song.id, checker.settled_ids[Song])
+
+    @override_settings(UPLOAD_DUPLICATE_BLOOM_FILTER_CAPACITY=1)
+    def test_rebuilds_filter_when_over_capacity(self):
+        # Arrange
+        SongFactory(hash='first')
+        SongFactory(hash='second')
+        checker = DuplicateChecker()
+
+        # Act
+        checker.refresh()
+
+        # Assert
+        self.assertGreaterEqual(checker.capacity, 2)
+        self.assertIn('first', checker.bloom_filter)
+        self.assertIn('second', checker.bloom_filter)
+
+INSTRUMENTS = '\n'.join([
+    'composed by someone in 1994', 'bassdrum', 'snare 808', 'hihat closed', 'hihat open',
+    'strings slow attack', 'lead synth square', 'pad warm', 'greetings to everyone on the board',
+])
+
+class SimilarSongsTests(TestCase):
+    def make_new_song(self, title='Space Trip', instrument_text=INSTRUMENTS, pattern_hash=''):
+        new_song = NewSongFactory.build(title=title, instrument_text=instrument_text, pattern_hash=pattern_hash)
+        similarity.set_signature(new_song)
+        new_song.save()
+        return new_song
+
+    def make_song(self, factory, title='Space Trip', instrument_text=INSTRUMENTS, pattern_hash='', **kwargs):
+        song = factory(title=title, instrument_text=instrument_text, pattern_hash=pattern_hash, **kwargs)
+        similarity.set_signature(song)
+        song.save()
+        return song
+
+    def test_similar_text_gives_high_estimate(self):
+        # Arrange
+        minhash, _ = similarity.get_signature('Space Trip', INSTRUMENTS)
+        edited, _ = similarity.get_signature('Space Trip (remix)', INSTRUMENTS.replace('1994', '1995'))
+        unrelated, _ = similarity.get_signature('Chip Tune', 'kick\nsnare\nbass\nthanks for listening to this little chiptune')
+
+        # Act
+        similar_estimate = similarity.estimate_similarity(minhash, edited)
+        unrelated_estimate = similarity.estimate_similarity(minhash, unrelated)
+
+        # Assert
+        self.assertGreater(similar_estimate, 0.7)
+        self.assertLess(unrelated_estimate, 0.2)
+
+    def test_songs_with_too_little_text_have_no_signature(self):
+        # Act
+        signature = similarity.get_signature('abc', '')
+
+        # Assert
+        self.assertEqual((None, None), signature)
+
+    def test_finds_matches_in_archive_queue_and_rejections_in_one_query(self):
+        # Arrange
+        song = self.make_song(SongFactory)
+        queued_song = self.make_new_song(instrument_text=INSTRUMENTS + '\nextra sample')
+        rejected_song = self.make_song(RejectedSongFactory, title='Unrelated', instrument_text='nothing alike at all here', pattern_hash='0123456789abcdef')
+        self.make_song(SongFactory, title='Chip Tune', instrument_text='kick\nsnare\nbass\nthanks for listening to this little chiptune')
+        new_song = self.make_new_song(pattern_hash='0123456789abcdef')
+
+        # Act
+        with self.assertNumQueries(1):
+            candidates = find_similar_songs(new_song)
+
+        # Assert
+        self.assertEqual(
+            [(None, None, rejected_song.id), (song.id, None, None), (None, queued_song.id, None)],
+            [(candidate.song_id, candidate.queued_song_id, candidate.rejected_song_id) for candidate in candidates]
+        )
+        self.assertEqual(DuplicateCandidate.MatchTypes.PATTERN_HASH, candidates[0].match_type)
+        self.assertEqual(DuplicateCandidate.MatchTypes.SIMILAR_TEXT, candidates[1].match_type)
+
+    @override_settings(UPLOAD_SIMILARITY_MAX_MATCHES=1)
+    def test_pattern_hash_match_is_not_crowded_out_by_newer_similar_songs(self):
+        # Arrange
+        pattern_hash_match = self.make_song(SongFactory, title='Unrelated', instrument_text='nothing alike at all here', pattern_hash='0123456789abcdef')
+        for _ in range(11):
+            self.make_song(SongFactory)
+        new_song = self.make_new_song(pattern_hash='0123456789abcdef')
+
+        # Act
+        candidates = find_similar_songs(new_song)
+
+        # Assert
+        self.assertEqual([pattern_hash_match.id], [candidate.song_id for candidate in candidates])
+        self.assertEqual(DuplicateCandidate.MatchTypes.PATTERN_HASH, candidates[0].match_type)
+
+    def test_close_match_flags_song_as_possible_duplicate(self):
+        # Arrange
+        self.make_song(SongFactory)
+        new_song = self.make_new_song()
+
+        # Act
+        record_similar_songs(new_song)
+
+        # Assert
+        new_song.refresh_from_db()
+        self.assertEqual(NewSong.Flags.POSSIBLE_DUPLICATE, new_song.flag)
+        self.assertEqual(1.0, new_song.duplicate_score)
+        self.assertEqual(1, new_song.duplicate_candidates.count())
+        self.assertTrue(new_song.screening_events.filter(type=ScreeningEvent.Types.APPLY_FLAG).exists())
+
+    @override_settings(UPLOAD_DUPLICATE_FLAG_THRESHOLD=1.1)
+    def test_match_below_flag_threshold_is_only_ranked(self):
+        # Arrange
+        self.make_song(SongFactory)
+        new_song = self.make_new_song()
+
+        # Act
+        record_similar_songs(new_song)
+
+        # Assert
+        new_song.refresh_from_db()
+        self.assertIsNone(new_song.flag)
+        self.assertEqual(1.0, new_song.duplicate_score)
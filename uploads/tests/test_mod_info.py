@@ -0,0 +1,108 @@
+import subprocess
+from unittest.mock import patch
+
+from django.test import TestCase
+
+from uploads import mod_info_cache
+from uploads.mod_info import ModInfoThreadPool, ModInfoResult
+from uploads.models import ModuleMetadata
+
+class ModInfoThreadPoolTests(TestCase):
+    def setUp(self):
+        self.thread_pool = ModInfoThreadPool(max_workers=2, timeout=5)
+
+    def tearDown(self):
+        self.thread_pool.close()
+
+    @patch('uploads.mod_info.subprocess.run')
+    def test_returns_results_in_input_order(self, mock_run):
+        # Arrange
+        def run(command, **kwargs):
+            if command[-1] == 'bad.txt':
+                raise subprocess.CalledProcessError(1, command)
+            return subprocess.CompletedProcess(command, 0, stdout=f'{{"name": "{command[-1]}"}}'.encode())
+
+        mock_run.side_effect = run
+
+        # Act
+        results = self.thread_pool.analyze(['a.mod', 'bad.txt', 'c.it'])
+
+        # Assert
+        self.assertEqual(['a.mod', 'bad.txt', 'c.it'], [result.file for result in results])
+        self.assertEqual({'name': 'a.mod'}, results[0].info)
+        self.assertFalse(results[1].is_module)
+        self.assertIsNone(results[1].error)
+        self.assertEqual({'name': 'c.it'}, results[2].info)
+
+    @patch('uploads.mod_info.subprocess.run')
+    def test_timeout_is_reported_without_failing_the_batch(self, mock_run):
+        # Arrange
+        def run(command, **kwargs):
+            if command[-1] == 'slow.xm':
+                raise subprocess.TimeoutExpired(command, kwargs['timeout'])
+            return subprocess.CompletedProcess(command, 0, stdout=b'{"name": "fast"}')
+
+        mock_run.side_effect = run
+
+        # Act
+        results = self.thread_pool.analyze(['slow.xm', 'fast.mod'])
+
+        # Assert
+        self.assertIsInstance(results[0].error, subprocess.TimeoutExpired)
+        self.assertEqual({'name': 'fast'}, results[1].info)
+
+    @patch('uploads.mod_info.subprocess.run')
+    def test_analyzes_bytes_through_a_temporary_file(self, mock_run):
+        # Arrange
+        contents = []
+        def run(command, **kwargs):
+            with open(command[-1], 'rb') as f:
+                contents.append(f.read())
+            return subprocess.CompletedProcess(command, 0, stdout=b'{"name": "from bytes"}')
+
+        mock_run.side_effect = run
+
+        # Act
+        results = self.thread_pool.analyze([b'M.K.'])
+
+        # Assert
+        self.assertEqual([b'M.K.'], contents)
+        self.assertEqual({'name': 'from bytes'}, results[0].info)
+
+class ModInfoCacheTests(TestCase):
+    def create_analyzer(self, analyzed):
+        class Analyzer:
+            def analyze(self, files):
+                analyzed.extend(files)
+                return [ModInfoResult(file, info={'name': file}) for file in files]
+        return Analyzer()
+
+    def test_only_analyzes_each_unknown_hash_once(self):
+        # Arrange
+        ModuleMetadata.objects.create(hash='known', info={'name': 'cached'})
+        analyzed = []
+
+        # Act
+        results = mod_info_cache.analyze(
+            [('known', 'a.mod'), ('new', 'b.mod'), ('new', 'c.mod')],
+            analyzer=self.create_analyzer(analyzed)
+        )
+
+        # Assert
+        self.assertEqual(['b.mod'], analyzed)
+        self.assertEqual([{'name': 'cached'}, {'name': 'b.mod'}, {'name': 'b.mod'}], [result.info for result in results])
+        self.assertEqual([True, False, False], [result.cached for result in results])
+        self.assertEqual({'name': 'b.mod'}, ModuleMetadata.objects.get(hash='new').info)
+
+    def test_does_not_cache_analyzer_errors(self):
+        # Arrange
+        class Analyzer:
+            def analyze(self, files):
+                return [ModInfoResult(file, error=subprocess.TimeoutExpired('modinfo', 5)) for file in files]
+
+        # Act
+        results = mod_info_cache.analyze([('slow', 'slow.xm')], analyzer=Analyzer())
+
+        # Assert
+        self.assertIsNotNone(results[0].error)
+        self.assertFalse(ModuleMetadata.objects.filter(hash='slow').exists())
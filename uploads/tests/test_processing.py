@@ -0,0 +1,40 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from homepage.tests import factories
+from uploads import constants
+from uploads.models import UploadJob
+from uploads.processing import fail_stale_upload_jobs
+
+@override_settings(UPLOAD_PROCESSING_STALE_AFTER=60 * 60)
+class FailStaleUploadJobsTests(TestCase):
+    def create_job(self, status, started_minutes_ago):
+        return UploadJob.objects.create(
+            uploader_profile=factories.UserFactory().profile,
+            is_by_uploader=False,
+            filename='upload.zip',
+            status=status,
+            start_date=timezone.now() - timedelta(minutes=started_minutes_ago),
+        )
+
+    def test_marks_jobs_processing_past_the_cutoff_as_failed(self):
+        # Arrange
+        stale_job = self.create_job(UploadJob.Statuses.PROCESSING, 61)
+        running_job = self.create_job(UploadJob.Statuses.PROCESSING, 59)
+        complete_job = self.create_job(UploadJob.Statuses.COMPLETE, 120)
+
+        # Act
+        failed_count = fail_stale_upload_jobs()
+
+        # Assert
+        self.assertEqual(1, failed_count)
+        stale_job.refresh_from_db()
+        self.assertEqual(UploadJob.Statuses.FAILED, stale_job.status)
+        self.assertIsNotNone(stale_job.complete_date)
+        self.assertEqual([constants.UPLOAD_PROCESSING_FAILED], list(stale_job.files.values_list('reason', flat=True)))
+        running_job.refresh_from_db()
+        self.assertEqual(UploadJob.Statuses.PROCESSING, running_job.status)
+        complete_job.refresh_from_db()
+        self.assertEqual(UploadJob.Statuses.COMPLETE, complete_job.status)
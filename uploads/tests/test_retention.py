@@ -0,0 +1,161 @@
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from homepage.tests import factories
+from uploads import factories as upload_factories
+from uploads.bulk_screening import get_rejected_file_path
+from uploads.models import ChunkedUpload, RejectedSong, UploadJob
+from uploads.retention import apply_retention_policies
+
+def write_file(path, content=b'data'):
+    with open(path, 'wb') as file:
+        file.write(content)
+    return path
+
+def age(path, days):
+    timestamp = time.time() - days * 24 * 60 * 60
+    os.utime(path, (timestamp, timestamp))
+
+class RetentionTests(TestCase):
+    def setUp(self):
+        self.rejected_file_dir = tempfile.mkdtemp(prefix='rejected_files_')
+        self.temp_upload_dir = tempfile.mkdtemp(prefix='temp_uploads_')
+        self.addCleanup(shutil.rmtree, self.rejected_file_dir, True)
+        self.addCleanup(shutil.rmtree, self.temp_upload_dir, True)
+        directories = override_settings(REJECTED_FILE_DIR=self.rejected_file_dir, TEMP_UPLOAD_DIR=self.temp_upload_dir)
+        directories.enable()
+        self.addCleanup(directories.disable)
+
+    def make_rejection(self, is_temporary, days_ago):
+        rejected_date = timezone.now() - timedelta(days=days_ago)
+        rejected = upload_factories.RejectedSongFactory(
+            filename=f'song_{RejectedSong.objects.count()}.mod', is_temporary=is_temporary, rejected_date=rejected_date, hash='abc'
+        )
+        write_file(get_rejected_file_path(rejected.filename, timezone.localdate(rejected_date)))
+        return rejected
+
+    def make_processing_directory(self, days_ago):
+        path = tempfile.mkdtemp(dir=self.temp_upload_dir)
+        age(write_file(os.path.join(path, 'upload.zip')), days_ago)
+        age(path, days_ago)
+        return path
+
+    @override_settings(RETENTION_BATCH_SIZE=1)
+    def test_expired_temporary_rejections_are_purged_with_their_files(self):
+        # Arrange
+        expired = [self.make_rejection(True, 31), self.make_rejection(True, 40)]
+        recent = self.make_rejection(True, 5)
+        permanent = self.make_rejection(False, 40)
+
+        # Act
+        report = apply_retention_policies()
+
+        # Assert
+        self.assertEqual(2, report.rejections_purged)
+        self.assertEqual(2, report.files_removed)
+        self.assertEqual(8, report.bytes_reclaimed)
+        self.assertEqual({recent.id, permanent.id}, set(RejectedSong.objects.values_list('id', flat=True)))
+        for rejected in expired:
+            self.assertFalse(os.path.exists(get_rejected_file_path(rejected.filename, timezone.localdate(rejected.rejected_date))))
+        self.assertEqual(2, len(os.listdir(self.rejected_file_dir)))
+
+    @override_settings(REJECTED_FILE_RETENTION_DAYS=90)
+    def test_rejected_files_past_retention_are_removed_and_rejections_kept(self):
+        # Arrange
+        old = self.make_rejection(False, 100)
+        recent = self.make_rejection(False, 10)
+
+        # Act
+        report = apply_retention_policies()
+
+        # Assert
+        self.assertEqual(1, report.files_removed)
+        self.assertEqual(2, RejectedSong.objects.count())
+        self.assertFalse(os.path.exists(get_rejected_file_path(old.filename, timezone.localdate(old.rejected_date))))
+        self.assertTrue(os.path.exists(get_rejected_file_path(recent.filename, timezone.localdate(recent.rejected_date))))
+
+    def test_only_abandoned_processing_directories_are_swept(self):
+        # Arrange
+        abandoned = self.make_processing_directory(2)
+        pending = self.make_processing_directory(2)
+        UploadJob.objects.create(
+            uploader_profile=factories.UserFactory().profile,
+            is_by_uploader=False,
+            filename='upload.zip',
+            file_path=os.path.join(pending, 'upload.zip'),
+        )
+        recent = self.make_processing_directory(0)
+
+        # Act
+        report = apply_retention_policies()
+
+        # Assert
+        self.assertEqual(1, report.directories_removed)
+        self.assertEqual(4, report.bytes_reclaimed)
+        self.assertFalse(os.path.exists(abandoned))
+        self.assertTrue(os.path.exists(pending))
+        self.assertTrue(os.path.exists(recent))
+
+    def make_chunked_upload(self, hours_since_last_chunk):
+        path = self.make_processing_directory(0)
+        return ChunkedUpload.objects.create(
+            uploader_profile=factories.UserFactory().profile,
+            is_by_uploader=False,
+            filename='upload.zip',
+            file_path=os.path.join(path, 'upload.zip'),
+            size=100,
+            update_date=timezone.now() - timedelta(hours=hours_since_last_chunk),
+        )
+
+    def test_abandoned_chunked_uploads_are_removed_with_their_directories(self):
+        # Arrange
+        abandoned = self.make_chunked_upload(25)
+        active = self.make_chunked_upload(1)
+
+        # Act
+        report = apply_retention_policies()
+
+        # Assert
+        self.assertEqual(1, report.chunked_uploads_removed)
+        self.assertEqual(1, report.directories_removed)
+        self.assertEqual([active.id], list(ChunkedUpload.objects.values_list('id', flat=True)))
+        self.assertFalse(os.path.exists(os.path.dirname(abandoned.file_path)))
+        self.assertTrue(os.path.exists(active.file_path))
+
+    def test_dry_run_counts_abandoned_chunked_upload_directory_once(self):
+        # Arrange
+        abandoned = self.make_chunked_upload(25)
+        age(abandoned.file_path, 2)
+        age(os.path.dirname(abandoned.file_path), 2)
+
+        # Act
+        report = apply_retention_policies(dry_run=True)
+
+        # Assert
+        self.assertEqual(1, report.chunked_uploads_removed)
+        self.assertEqual(1, report.directories_removed)
+        self.assertEqual(4, report.bytes_reclaimed)
+        self.assertTrue(ChunkedUpload.objects.filter(pk=abandoned.pk).exists())
+        self.assertTrue(os.path.exists(abandoned.file_path))
+
+    def test_dry_run_removes_nothing(self):
+        # Arrange
+        self.make_rejection(True, 40)
+        abandoned = self.make_processing_directory(2)
+
+        # Act
+        report = apply_retention_policies(dry_run=True)
+
+        # Assert
+        self.assertEqual(1, report.rejections_purged)
+        self.assertEqual(1, report.directories_removed)
+        self.assertEqual(8, report.bytes_reclaimed)
+        self.assertEqual(1, RejectedSong.objects.count())
+        self.assertEqual(1, len(os.listdir(self.rejected_file_dir)))
+        self.assertTrue(os.path.exists(abandoned))
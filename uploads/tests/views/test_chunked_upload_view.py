@@ -0,0 +1,202 @@
+import datetime
+import hashlib
+import os
+import shutil
+
+from unittest.mock import patch
+from django.conf import settings
+from django.contrib.auth.models import Permission
+from django.test import TestCase, override_settings
+from django.urls.base import reverse
+from django.utils import timezone
+
+from homepage.tests import factories
+from uploads import constants
+from uploads.models import ChunkedUpload, NewSong, UploadJob
+
+OCTET_STREAM = 'application/octet-stream'
+SONG_TITLE = 'Test Song'
+TEST_MOD_FILENAME = 'test1.mod'
+
+class ChunkedUploadViewTests(TestCase):
+    test_mod_info = {
+        'format': 'MOD',
+        'channels': 4,
+        'name': SONG_TITLE
+    }
+
+    def setUp(self):
+        self.user = factories.UserFactory()
+        permission = Permission.objects.get(codename='can_upload_songs')
+        self.user.user_permissions.add(permission)
+        self.client.force_login(self.user)
+
+        with open(os.path.join(os.path.dirname(__file__), '../../testdata', TEST_MOD_FILENAME), 'rb') as f:
+            self.data = f.read()
+
+    def start_upload(self, size=None, filename=TEST_MOD_FILENAME):
+        response = self.client.post(reverse('chunked_upload_start'), {
+            'written_by_me': 'yes',
+            'filename': filename,
+            'size': len(self.data) if size is None else size
+        })
+        if response.status_code == 201:
+            upload = ChunkedUpload.objects.get(pk=response.json()['id'])
+            self.addCleanup(shutil.rmtree, os.path.dirname(upload.file_path), True)
+        return response
+
+    def put_chunk(self, upload_id, offset, chunk, checksum=None):
+        return self.client.put(
+            reverse('chunked_upload', kwargs={'pk': upload_id}),
+            data=chunk,
+            content_type=OCTET_STREAM,
+            headers={
+                'Upload-Offset': str(offset),
+                'Upload-Checksum': f'sha256 {checksum or hashlib.sha256(chunk).hexdigest()}',
+            }
+        )
+
+    @patch('uploads.mod_info.get_mod_info')
+    def test_chunks_are_assembled_and_processed_on_finalize(self, mock_mod_info):
+        # Arrange
+        mock_mod_info.return_value = self.test_mod_info
+        upload_id = self.start_upload().json()['id']
+        middle = len(self.data) // 2
+
+        # Act
+        self.put_chunk(upload_id, 0, self.data[:middle])
+        self.put_chunk(upload_id, middle, self.data[middle:])
+        response = self.client.post(reverse('chunked_upload_finalize', kwargs={'pk': upload_id}))
+
+        # Assert
+        self.assertEqual(200, response.status_code)
+        job = UploadJob.objects.get(uploader_profile=self.user.profile)
+        self.assertEqual(reverse('upload_report', kwargs={'pk': job.id}), response.json()['report_url'])
+        self.assertEqual(UploadJob.Statuses.COMPLETE, job.status)
+        new_song = NewSong.objects.get(filename=TEST_MOD_FILENAME)
+        self.assertEqual(hashlib.md5(self.data).hexdigest(), new_song.hash)
+        self.assertTrue(new_song.is_by_uploader)
+        os.remove(os.path.join(settings.NEW_FILE_DIR, f'{TEST_MOD_FILENAME}.zip'))
+
+    def test_status_reports_offset_to_resume_from(self):
+        # Arrange
+        upload_id = self.start_upload().json()['id']
+        self.put_chunk(upload_id, 0, self.data[:100])
+
+        # Act
+        response = self.client.get(reverse('chunked_upload', kwargs={'pk': upload_id}))
+
+        # Assert
+        self.assertEqual(100, response.json()['offset'])
+        self.assertEqual(len(self.data), response.json()['size'])
+
+    def test_chunk_at_wrong_offset_is_rejected_with_current_offset(self):
+        # Arrange
+        upload_id = self.start_upload().json()['id']
+        self.put_chunk(upload_id, 0, self.data[:100])
+
+        # Act
+        response = self.put_chunk(upload_id, 50, self.data[50:150])
+
+        # Assert
+        self.assertEqual(409, response.status_code)
+        self.assertEqual(constants.CHUNKED_UPLOAD_OFFSET_MISMATCH, response.json()['error'])
+        self.assertEqual(100, response.json()['offset'])
+
+    def test_chunk_with_bad_checksum_is_discarded(self):
+        # Arrange
+        upload_id = self.start_upload().json()['id']
+        self.put_chunk(upload_id, 0, self.data[:100])
+
+        # Act
+        response = self.put_chunk(upload_id, 100, self.data[100:200], checksum='0' * 64)
+
+        # Assert
+        self.assertEqual(400, response.status_code)
+        self.assertEqual(constants.CHUNKED_UPLOAD_CHECKSUM_MISMATCH, response.json()['error'])
+        upload = ChunkedUpload.objects.get(pk=upload_id)
+        self.assertEqual(100, upload.offset)
+        self.assertEqual(100, os.path.getsize(upload.file_path))
+
+    def test_chunk_without_checksum_is_rejected(self):
+        # Arrange
+        upload_id = self.start_upload().json()['id']
+
+        # Act
+        response = self.client.put(
+            reverse('chunked_upload', kwargs={'pk': upload_id}),
+            data=self.data[:100],
+            content_type=OCTET_STREAM,
+            headers={'Upload-Offset': '0'}
+        )
+
+        # Assert
+        self.assertEqual(400, response.status_code)
+        self.assertEqual(constants.CHUNKED_UPLOAD_INVALID_HEADERS, response.json()['error'])
+
+    @override_settings(CHUNKED_UPLOAD_MAX_CHUNK_SIZE=50)
+    def test_chunk_above_maximum_size_is_rejected(self):
+        # Arrange
+        upload_id = self.start_upload().json()['id']
+
+        # Act
+        response = self.put_chunk(upload_id, 0, self.data[:100])
+
+        # Assert
+        self.assertEqual(413, response.status_code)
+        self.assertEqual(0, ChunkedUpload.objects.get(pk=upload_id).offset)
+
+    @override_settings(MAXIMUM_UPLOAD_SIZE=100)
+    def test_upload_above_maximum_size_cannot_be_started(self):
+        # Act
+        response = self.start_upload(size=101)
+
+        # Assert
+        self.assertEqual(413, response.status_code)
+        self.assertEqual(constants.UPLOAD_TOO_LARGE%(100), response.json()['error'])
+        self.assertFalse(ChunkedUpload.objects.exists())
+
+    def test_upload_of_a_directory_name_cannot_be_started(self):
+        for filename in ['.', '..', 'songs/']:
+            with self.subTest(filename=filename):
+                # Act
+                response = self.start_upload(filename=filename)
+
+                # Assert
+                self.assertEqual(400, response.status_code)
+                self.assertEqual([constants.CHUNKED_UPLOAD_INVALID_FILENAME], response.json()['errors']['filename'])
+                self.assertFalse(ChunkedUpload.objects.exists())
+
+    def test_filename_is_stripped_of_its_directories(self):
+        # Act
+        response = self.start_upload(filename=f'../songs/{TEST_MOD_FILENAME}')
+
+        # Assert
+        self.assertEqual(201, response.status_code)
+        self.assertEqual(TEST_MOD_FILENAME, response.json()['filename'])
+
+    def test_incomplete_upload_cannot_be_finalized(self):
+        # Arrange
+        upload_id = self.start_upload().json()['id']
+        self.put_chunk(upload_id, 0, self.data[:100])
+
+        # Act
+        response = self.client.post(reverse('chunked_upload_finalize', kwargs={'pk': upload_id}))
+
+        # Assert
+        self.assertEqual(409, response.status_code)
+        self.assertEqual(constants.CHUNKED_UPLOAD_INCOMPLETE%(100, len(self.data)), response.json()['error'])
+        self.assertFalse(UploadJob.objects.exists())
+
+    def test_another_users_upload_is_not_found(self):
+        # Arrange
+        upload_id = self.start_upload().json()['id']
+        other_user = factories.UserFactory()
+        other_user.user_permissions.add(Permission.objects.get(codename='can_upload_songs'))
+        self.client.force_login(other_user)
+
+        # Act
+        response = self.put_chunk(upload_id, 0, self.data[:100])
+
+        # Assert
+        self.assertEqual(404, response.status_code)
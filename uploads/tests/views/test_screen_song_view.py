@@ -4,7 +4,7 @@ from django.contrib.auth.models import Permission
 
 from uploads import factories as upload_factories
 from uploads import constants
-from uploads.models import NewSong
+from uploads.models import DuplicateCandidate, NewSong, ScreeningEvent
 from homepage.tests import factories
 
 class ScreenSongAuthenticationTests(TestCase):
@@ -94,6 +94,17 @@ class ScreenSongContextDataTests(TestCase):
         self.assertIn(constants.REJECT_ACTION, response.context['actions'])
         self.assertIn(constants.RENAME_ACTION, response.context['actions'])
 
+    def test_actions_do_not_accumulate_across_requests(self):
+        # Arrange
+        song = upload_factories.NewSongFactory(claimed_by=self.user.profile)
+        self.client.get(reverse('screen_song', kwargs = {'pk': song.id}))
+
+        # Act
+        response = self.client.get(reverse('screen_song', kwargs = {'pk': song.id}))
+
+        # Assert
+        self.assertEqual(10, len(response.context['actions']))
+
     def test_song_claimed_by_other_has_correct_context_data(self):
         # Arrange
         other_user = factories.UserFactory()
@@ -233,3 +244,38 @@ class ScreenSongContextDataTests(TestCase):
         self.assertIn(constants.REJECT_ACTION, response.context['actions'])
         self.assertIn(constants.CLEAR_FLAG_ACTION, response.context['actions'])
         self.assertIn(constants.RENAME_ACTION, response.context['actions'])
+
+class ScreenSongQueryTests(TestCase):
+    def setUp(self):
+        self.user = factories.UserFactory()
+        self.user.user_permissions.add(Permission.objects.get(codename='can_approve_songs'))
+        self.client.force_login(self.user)
+
+    def test_page_is_rendered_in_fixed_number_of_queries(self):
+        # Arrange
+        flagger = factories.UserFactory()
+        song = upload_factories.NewSongFactory(
+            claimed_by=self.user.profile,
+            flagged_by=flagger.profile,
+            flag=NewSong.Flags.POSSIBLE_DUPLICATE,
+            uploader_profile=factories.UserFactory().profile
+        )
+        for i in range(20):
+            ScreeningEvent.objects.create(new_song=song, profile=flagger.profile, type=ScreeningEvent.Types.CLAIM, content=f'Event {i}')
+            DuplicateCandidate.objects.create(
+                new_song=song,
+                queued_song=upload_factories.NewSongFactory(),
+                match_type=DuplicateCandidate.MatchTypes.SIMILAR_TEXT,
+                similarity=0.9
+            )
+
+        # Act
+        # Session, user, two permission lookups, the screener's profile, the song with its
+        # profiles, its duplicate candidates and its screening events
+        with self.assertNumQueries(8):
+            response = self.client.get(reverse('screen_song', kwargs={'pk': song.id}))
+
+        # Assert
+        self.assertContains(response, flagger.profile.display_name)
+        self.assertContains(response, song.uploader_profile.display_name)
+        self.assertContains(response, 'Event 19')
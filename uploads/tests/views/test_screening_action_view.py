@@ -1,19 +1,23 @@
 import os
 import shutil
 
+from unittest.mock import patch
 from django.conf import settings
 from django.contrib.auth.models import Permission
 from django.contrib.messages import get_messages
-from django.test import TestCase
+from django.db import DatabaseError, connection
+from django.db.models.signals import post_save
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls.base import reverse
 
 from artists.factories import ArtistFactory
 from homepage.tests import factories
 from songs import factories as song_factories
 from songs.models import Song
-from uploads import constants
+from uploads import bulk_screening, constants
 from uploads import factories as upload_factories
-from uploads.models import NewSong, ScreeningEvent
+from uploads.models import NewSong, ScreeningBatch, ScreeningEvent, ScreeningQueueChange
 
 SONG_1_FILENAME = 'song1.mod'
 SONG_2_FILENAME = 'song2.mod'
@@ -809,6 +813,35 @@ class ApprovalActionTests(TestCase):
         self.assert_song_added_to_archive(song1)
         self.assertRedirects(response, reverse('view_song', kwargs={'pk': Song.objects.get(hash=song1.hash).id}))
     
+    def test_approval_is_published_to_screening_pages(self):
+        # Arrange
+        uploader = factories.UserFactory()
+        song1 = self.make_song(self.user.profile, '0987654321', SONG_1_FILENAME, Song.Formats.MOD, uploader.profile)
+
+        # Act
+        self.client.post(reverse('screening_action'), {'selected_songs': [song1.id], 'action': constants.APPROVE_KEYWORD})
+
+        # Assert
+        change = ScreeningQueueChange.objects.get()
+        self.assertEqual(song1.id, change.new_song_id)
+        self.assertEqual(ScreeningQueueChange.Types.APPROVE, change.type)
+        self.assertEqual(self.user.profile, change.profile)
+
+    def test_screening_history_is_kept_with_the_approved_song(self):
+        # Arrange
+        uploader = factories.UserFactory()
+        song1 = self.make_song(self.user.profile, '0987654321', SONG_1_FILENAME, Song.Formats.MOD, uploader.profile)
+        ScreeningEvent.objects.create(new_song=song1, profile=self.user.profile, type=ScreeningEvent.Types.CLAIM, content='Claimed')
+
+        # Act
+        self.client.post(reverse('screening_action'), {'selected_songs': [song1.id], 'action': constants.APPROVE_KEYWORD})
+
+        # Assert
+        self.assertFalse(ScreeningEvent.objects.exists())
+        history = list(Song.objects.get(hash=song1.hash).screening_history.all())
+        self.assertEqual([ScreeningEvent.Types.CLAIM, ScreeningEvent.Types.APPROVE], [event.type for event in history])
+        self.assertEqual(f'Approved by {self.user.profile.display_name}', history[1].content)
+
     def test_single_song_with_numercal_filename_is_added_to_archive_when_approved(self):
         # Arrange
         uploader = factories.UserFactory()
@@ -970,6 +1003,157 @@ class ApprovalActionTests(TestCase):
         # Assert
         self.assert_song_added_to_archive(song1, featured=False, use_filename_as_title=True)
 
+    def test_song_whose_file_cannot_be_moved_stays_in_queue(self):
+        # Arrange
+        uploader = factories.UserFactory()
+        song1 = self.make_song(self.user.profile, '0987654321', SONG_1_FILENAME, Song.Formats.MOD, uploader.profile, flag=NewSong.Flags.PRE_SCREENED)
+        song2 = self.make_song(self.user.profile, '1234567890', SONG_2_FILENAME, Song.Formats.MOD, uploader.profile, flag=NewSong.Flags.PRE_SCREENED)
+        os.remove(f'{self.new_file_dir}/{song2.filename}.zip')
+
+        # Act
+        response = self.client.post(reverse('screening_action'), {'selected_songs': [song1.id, song2.id], 'action': constants.APPROVE_KEYWORD})
+
+        # Assert
+        self.assert_song_added_to_archive(song1)
+        self.assertEqual([song2.id], list(NewSong.objects.values_list('id', flat=True)))
+        messages = [str(message) for message in get_messages(response.wsgi_request)]
+        self.assertEqual([f'{song2.filename}: {constants.MESSAGE_FILE_MOVE_FAILED}'], messages)
+        self.assertRedirects(response, reverse('view_song', kwargs={'pk': Song.objects.get(hash=song1.hash).id}))
+
+    @patch('uploads.bulk_screening.add_songs_to_uploader_artists', side_effect=DatabaseError)
+    def test_files_are_moved_back_when_database_changes_fail(self, _):
+        # Arrange
+        uploader = factories.UserFactory()
+        song1 = self.make_song(self.user.profile, '0987654321', SONG_1_FILENAME, Song.Formats.MOD, uploader.profile, flag=NewSong.Flags.PRE_SCREENED)
+        song2 = self.make_song(self.user.profile, '1234567890', SONG_2_FILENAME, Song.Formats.MOD, uploader.profile, flag=NewSong.Flags.PRE_SCREENED)
+
+        # Act
+        response = self.client.post(reverse('screening_action'), {'selected_songs': [song1.id, song2.id], 'action': constants.APPROVE_KEYWORD})
+
+        # Assert
+        self.assertEqual(0, Song.objects.count())
+        self.assertEqual(2, NewSong.objects.count())
+        for song in [song1, song2]:
+            self.assertTrue(os.path.isfile(f'{self.new_file_dir}/{song.filename}.zip'))
+        self.assertFalse(os.path.exists(os.path.join(self.main_archive_dir, 'MOD', 'S', SONG_1_FILENAME + '.zip')))
+        self.assertEqual(2, len(list(get_messages(response.wsgi_request))))
+        self.assertRedirects(response, reverse('screening_index'))
+
+    @patch('uploads.bulk_screening.add_songs_to_uploader_artists', side_effect=ValueError)
+    def test_files_are_moved_back_when_saving_songs_raises_any_error(self, _):
+        # Arrange
+        uploader = factories.UserFactory()
+        song1 = self.make_song(self.user.profile, '0987654321', SONG_1_FILENAME, Song.Formats.MOD, uploader.profile, flag=NewSong.Flags.PRE_SCREENED)
+
+        # Act
+        with self.assertRaises(ValueError):
+            bulk_screening.approve_songs([song1.id], self.user.profile)
+
+        # Assert
+        self.assertEqual(0, Song.objects.count())
+        self.assertEqual([song1.id], list(NewSong.objects.values_list('id', flat=True)))
+        self.assertTrue(os.path.isfile(f'{self.new_file_dir}/{song1.filename}.zip'))
+        self.assertFalse(os.path.exists(os.path.join(self.main_archive_dir, 'MOD', 'S', SONG_1_FILENAME + '.zip')))
+
+    def test_signals_stay_connected_while_songs_are_approved(self):
+        # Arrange
+        uploader = factories.UserFactory()
+        song1 = self.make_song(self.user.profile, '0987654321', SONG_1_FILENAME, Song.Formats.MOD, uploader.profile, is_by_uploader=True)
+        add_songs_to_uploader_artists = bulk_screening.add_songs_to_uploader_artists
+        receivers_connected = []
+        def record_receivers(*args):
+            receivers_connected.append(bool(post_save.receivers))
+            return add_songs_to_uploader_artists(*args)
+
+        # Act
+        with patch('uploads.bulk_screening.add_songs_to_uploader_artists', side_effect=record_receivers):
+            self.client.post(reverse('screening_action'), {'selected_songs': [song1.id], 'action': constants.APPROVE_KEYWORD})
+
+        # Assert
+        self.assertEqual([True], receivers_connected)
+        song = Song.objects.get(hash=song1.hash)
+        self.assertIsNotNone(song.title_vector)
+        self.assertEqual(1, song.artist_set.get().total_songs)
+
+    def test_number_of_queries_does_not_grow_with_batch_size(self):
+        # Arrange
+        uploader = factories.UserFactory()
+        ArtistFactory(profile=uploader.profile)
+        def approve(count, offset):
+            songs = [
+                self.make_song(self.user.profile, f'hash{offset + i}', f'song{offset + i}.mod', Song.Formats.MOD, uploader.profile, is_by_uploader=True, flag=NewSong.Flags.PRE_SCREENED)
+                for i in range(count)
+            ]
+            with CaptureQueriesContext(connection) as queries:
+                bulk_screening.approve_songs([song.id for song in songs], self.user.profile)
+            return len(queries)
+
+        # Act
+        small_batch_queries = approve(2, 0)
+        large_batch_queries = approve(6, 10)
+
+        # Assert
+        self.assertEqual(8, Song.objects.count())
+        self.assertEqual(small_batch_queries, large_batch_queries)
+
+    @override_settings(SCREENING_BATCH_ASYNC_THRESHOLD=1)
+    def test_large_batch_is_approved_in_background(self):
+        # Arrange
+        uploader = factories.UserFactory()
+        song1 = self.make_song(self.user.profile, '0987654321', SONG_1_FILENAME, Song.Formats.MOD, uploader.profile, flag=NewSong.Flags.PRE_SCREENED)
+        song2 = self.make_song(self.user.profile, '1234567890', SONG_2_FILENAME, Song.Formats.MOD, uploader.profile, flag=NewSong.Flags.PRE_SCREENED)
+
+        # Act
+        response = self.client.post(reverse('screening_action'), {'selected_songs': [song1.id, song2.id], 'action': constants.APPROVE_KEYWORD})
+
+        # Assert
+        batch = ScreeningBatch.objects.get(profile=self.user.profile)
+        self.assertRedirects(response, reverse('screening_batch', kwargs={'pk': batch.id}))
+        self.assertEqual(ScreeningBatch.Statuses.COMPLETE, batch.status)
+        self.assert_song_added_to_archive(song1)
+        self.assert_song_added_to_archive(song2)
+        self.assertEqual(
+            [Song.objects.get(hash=song1.hash).id, Song.objects.get(hash=song2.hash).id],
+            [result['song_id'] for result in batch.results]
+        )
+
+class ScreeningBatchViewTests(TestCase):
+    def setUp(self):
+        self.user = factories.UserFactory()
+        self.user.user_permissions.add(Permission.objects.get(codename='can_approve_songs'))
+        self.client.force_login(self.user)
+
+    def test_shows_outcome_of_each_song(self):
+        # Arrange
+        batch = ScreeningBatch.objects.create(
+            action=ScreeningBatch.Actions.APPROVE,
+            profile=self.user.profile,
+            new_song_ids=[1, 2],
+            status=ScreeningBatch.Statuses.COMPLETE,
+            results=[
+                {'new_song_id': 1, 'filename': 'approved.mod', 'song_id': None, 'error': None},
+                {'new_song_id': 2, 'filename': 'failed.mod', 'song_id': None, 'error': constants.MESSAGE_FILE_MOVE_FAILED},
+            ]
+        )
+
+        # Act
+        response = self.client.get(reverse('screening_batch', kwargs={'pk': batch.id}))
+
+        # Assert
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(['approved.mod'], [song['filename'] for song in response.context['successful_songs']])
+        self.assertEqual(['failed.mod'], [song['filename'] for song in response.context['failed_songs']])
+
+    def test_another_screeners_batch_is_not_found(self):
+        # Arrange
+        batch = ScreeningBatch.objects.create(action=ScreeningBatch.Actions.APPROVE, profile=factories.UserFactory().profile, new_song_ids=[1])
+
+        # Act
+        response = self.client.get(reverse('screening_batch', kwargs={'pk': batch.id}))
+
+        # Assert
+        self.assertEqual(404, response.status_code)
+
 class RejectActionTests(TestCase):
     def setUp(self) -> None:
         self.user = factories.UserFactory()
@@ -1,5 +1,6 @@
 from datetime import timedelta
 from django.contrib.auth.models import Permission
+from django.core.cache import cache
 from django.test import TestCase
 from django.urls.base import reverse
 from django.utils import timezone
@@ -7,6 +8,7 @@ from django.utils import timezone
 from homepage.tests import factories
 from uploads import factories as upload_factories
 from uploads.models import NewSong
+from uploads.queue_stats import get_queue_stats
 from uploads import constants
 
 class ScreeningIndexAuthTests(TestCase):
@@ -267,22 +269,19 @@ class ScreeningIndexFilteringTests(TestCase):
         self.assertEqual(len(response.context['new_songs']), 1)
         self.assertIn(user_screening_song, response.context['new_songs'])
 
-    def test_claimed_songs_are_released_if_no_action_taken(self):
+    def test_loading_page_does_not_release_claims(self):
         uploading_user = factories.UserFactory()
         other_user = factories.UserFactory()
 
-        # Claimed more than 48 hours ago
-        upload_factories.NewSongFactory(uploader_profile=uploading_user.profile, claimed_by=other_user.profile, claim_date=timezone.now() - timedelta(hours=49))
-        upload_factories.NewSongFactory(uploader_profile=uploading_user.profile)
-        upload_factories.NewSongFactory(uploader_profile=None)
-        upload_factories.NewSongFactory(uploader_profile=None)
-        user_screening_song = upload_factories.NewSongFactory(uploader_profile=None, claimed_by=other_user.profile, claim_date=timezone.now())
+        # Claimed more than 48 hours ago; releasing it is left to the scheduled claim expiry
+        stale_song = upload_factories.NewSongFactory(uploader_profile=uploading_user.profile, claimed_by=other_user.profile, claim_date=timezone.now() - timedelta(hours=49))
 
         response = self.client.get(f"{reverse('screening_index')}?filter={constants.OTHERS_SCREENING_FILTER}")
 
         # Assert
-        self.assertEqual(len(response.context['new_songs']), 1)
-        self.assertIn(user_screening_song, response.context['new_songs'])
+        self.assertIn(stale_song, response.context['new_songs'])
+        stale_song.refresh_from_db()
+        self.assertEqual(other_user.profile, stale_song.claimed_by)
 
     def test_screening_view_shows_prescreened_songs(self):
         uploading_user = factories.UserFactory()
@@ -399,3 +398,105 @@ class ScreeningIndexFilteringTests(TestCase):
         self.assertEqual(len(response.context['new_songs']), 2)
         self.assertIn(under_investigation_song_1, response.context['new_songs'])
         self.assertIn(under_investigation_song_2, response.context['new_songs'])
+
+class ScreeningQueueStatsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = factories.UserFactory()
+        permission = Permission.objects.get(codename='can_approve_songs')
+        self.user.user_permissions.add(permission)
+        self.client.force_login(self.user)
+
+    def create_queue(self):
+        other_user = factories.UserFactory()
+        oldest = upload_factories.NewSongFactory(uploader_profile=self.user.profile, create_date=timezone.now() - timedelta(days=3))
+        upload_factories.NewSongFactory(uploader_profile=self.user.profile)
+        upload_factories.NewSongFactory(uploader_profile=None)
+        upload_factories.NewSongFactory(claimed_by=self.user.profile)
+        upload_factories.NewSongFactory(claimed_by=other_user.profile)
+        upload_factories.NewSongFactory(claimed_by=other_user.profile)
+        upload_factories.NewSongFactory(flag=NewSong.Flags.PRE_SCREENED)
+        return oldest, other_user
+
+    def test_counts_every_filter_in_one_query(self):
+        # Arrange
+        oldest, _ = self.create_queue()
+
+        # Act
+        with self.assertNumQueries(1):
+            queue_stats = get_queue_stats(self.user.profile)
+
+        # Assert
+        filters = queue_stats['filters']
+        self.assertEqual(2, filters[constants.HIGH_PRIORITY_FILTER]['count'])
+        self.assertEqual(oldest.create_date, filters[constants.HIGH_PRIORITY_FILTER]['oldest'])
+        self.assertEqual(1, filters[constants.LOW_PRIORITY_FILTER]['count'])
+        self.assertEqual(1, filters[constants.MY_SCREENING_FILTER]['count'])
+        self.assertEqual(2, filters[constants.OTHERS_SCREENING_FILTER]['count'])
+        self.assertEqual(1, filters[constants.PRE_SCREENED_FILTER]['count'])
+        self.assertEqual(0, filters[constants.UNDER_INVESTIGATION_FILTER]['count'])
+        self.assertIsNone(filters[constants.UNDER_INVESTIGATION_FILTER]['oldest'])
+        self.assertEqual([2, 1], [claim['count'] for claim in queue_stats['claims']])
+
+    def test_counts_are_cached_until_screening_action(self):
+        # Arrange
+        song = upload_factories.NewSongFactory(uploader_profile=self.user.profile)
+        get_queue_stats(self.user.profile)
+
+        # Act
+        with self.assertNumQueries(0):
+            cached_stats = get_queue_stats(self.user.profile)
+        self.client.post(reverse('screening_action'), {'action': constants.CLAIM_KEYWORD, 'selected_songs': [song.id]})
+        updated_stats = get_queue_stats(self.user.profile)
+
+        # Assert
+        self.assertEqual(1, cached_stats['filters'][constants.HIGH_PRIORITY_FILTER]['count'])
+        self.assertEqual(0, updated_stats['filters'][constants.HIGH_PRIORITY_FILTER]['count'])
+        self.assertEqual(1, updated_stats['filters'][constants.MY_SCREENING_FILTER]['count'])
+
+    def test_index_shows_counts_in_filter_options(self):
+        # Arrange
+        self.create_queue()
+
+        # Act
+        response = self.client.get(reverse('screening_index'))
+
+        # Assert
+        self.assertContains(response, f'{constants.HIGH_PRIORITY_FILTER_DESCRIPTION} (2)')
+        self.assertContains(response, f'{constants.OTHERS_SCREENING_FILTER_DESCRIPTION} (2)')
+
+    def test_stats_endpoint_returns_counts_and_ages(self):
+        # Arrange
+        _, other_user = self.create_queue()
+
+        # Act
+        response = self.client.get(reverse('screening_queue_stats'))
+
+        # Assert
+        data = response.json()
+        self.assertEqual(2, data['filters'][constants.HIGH_PRIORITY_FILTER]['count'])
+        self.assertGreaterEqual(data['filters'][constants.HIGH_PRIORITY_FILTER]['oldest_age_seconds'], 3 * 24 * 60 * 60)
+        self.assertIsNone(data['filters'][constants.UNDER_INVESTIGATION_FILTER]['oldest_age_seconds'])
+        self.assertEqual({'screener': other_user.profile.display_name, 'count': 2}, data['claims'][0])
+
+class ScreeningIndexQueryTests(TestCase):
+    def setUp(self):
+        self.user = factories.UserFactory()
+        self.user.user_permissions.add(Permission.objects.get(codename='can_approve_songs'))
+        self.client.force_login(self.user)
+        cache.clear()
+
+    def test_page_is_rendered_in_fixed_number_of_queries(self):
+        # Arrange
+        other_user = factories.UserFactory()
+        for _ in range(30):
+            upload_factories.NewSongFactory(uploader_profile=factories.UserFactory().profile, claimed_by=other_user.profile)
+
+        # Act
+        # Session, user, two permission lookups, the screener's profile, the page count, the
+        # page of songs, the queue stats and the last queue change
+        with self.assertNumQueries(9):
+            response = self.client.get(f"{reverse('screening_index')}?filter={constants.OTHERS_SCREENING_FILTER}")
+
+        # Assert
+        self.assertEqual(25, len(response.context['new_songs']))
@@ -1,7 +1,9 @@
 import os
 from datetime import date
 
-from django.test import TestCase
+from unittest.mock import patch
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
 from django.urls.base import reverse
 from django.contrib.auth.models import Permission
 from django.contrib.messages import get_messages
@@ -10,7 +12,7 @@ from django.conf import settings
 from homepage.tests import factories
 from uploads import factories as upload_factories
 from uploads import constants
-from uploads.models import NewSong, RejectedSong
+from uploads.models import NewSong, RejectedSong, ScreeningBatch, ScreeningEvent
 
 class ScreeningRejectAuthenticationTests(TestCase):
     def test_unauthenticated_user_is_redirected_to_login(self):
@@ -220,6 +222,25 @@ class FinalizeRejectionTests(TestCase):
         self.assertRedirects(response, reverse('screening_index'), target_status_code=200)
         self.assert_song(song, RejectedSong.objects.get(hash=song.hash), RejectedSong.Reasons.ALREADY_EXISTS, False, '')
 
+    def test_screening_history_is_kept_with_the_rejection(self):
+        # Arrange
+        song = self.create_song()
+        ScreeningEvent.objects.create(new_song=song, profile=self.user.profile, type=ScreeningEvent.Types.CLAIM, content='Claimed')
+
+        # Act
+        self.client.post(
+            reverse('screening_reject'),
+            data={'song_ids': song.id, 'is_temporary': False, 'rejection_reason': RejectedSong.Reasons.POOR_QUALITY}
+        )
+
+        # Assert
+        self.assertFalse(ScreeningEvent.objects.exists())
+        history = list(RejectedSong.objects.get(hash=song.hash).screening_history.all())
+        self.assertEqual([ScreeningEvent.Types.CLAIM, ScreeningEvent.Types.REJECT], [event.type for event in history])
+        self.assertEqual('Claimed', history[0].content)
+        self.assertEqual(f'Rejected by {self.user.profile.display_name} (Poor quality)', history[1].content)
+        self.assertEqual(self.user.profile, history[1].profile)
+
     def test_rejecting_multiple_songs_removes_them_from_screening_queue(self):
         # Arrange
         song = self.create_song()
@@ -241,3 +262,61 @@ class FinalizeRejectionTests(TestCase):
         self.assertRedirects(response, reverse('screening_index'), target_status_code=200)
         self.assert_song(song, RejectedSong.objects.get(hash=song.hash), RejectedSong.Reasons.POOR_QUALITY, True, message)
         self.assert_song(song_2, RejectedSong.objects.get(hash=song_2.hash), RejectedSong.Reasons.POOR_QUALITY, True, message)
+
+    def test_song_whose_file_cannot_be_moved_stays_in_queue(self):
+        # Arrange
+        song = self.create_song()
+        song_2 = self.create_song(hash_code='456')
+        os.remove(f'{self.new_file_dir}/{song_2.filename}.zip')
+
+        # Act
+        response = self.client.post(
+            reverse('screening_reject'),
+            data={'song_ids': f"{song.id},{song_2.id}", 'rejection_reason': RejectedSong.Reasons.POOR_QUALITY}
+        )
+
+        # Assert
+        self.assert_song(song, RejectedSong.objects.get(hash=song.hash), RejectedSong.Reasons.POOR_QUALITY, False, '')
+        self.assertTrue(NewSong.objects.filter(id=song_2.id).exists())
+        self.assertFalse(RejectedSong.objects.filter(hash=song_2.hash).exists())
+        messages = [str(message) for message in get_messages(response.wsgi_request)]
+        self.assertEqual([f'{song_2.filename}: {constants.MESSAGE_FILE_MOVE_FAILED}'], messages)
+
+    @patch('uploads.bulk_screening.RejectedSong.objects.bulk_create', side_effect=DatabaseError)
+    def test_files_are_moved_back_when_database_changes_fail(self, _):
+        # Arrange
+        song = self.create_song()
+        song_2 = self.create_song(hash_code='456')
+
+        # Act
+        self.client.post(
+            reverse('screening_reject'),
+            data={'song_ids': f"{song.id},{song_2.id}", 'rejection_reason': RejectedSong.Reasons.POOR_QUALITY}
+        )
+
+        # Assert
+        self.assertEqual(2, NewSong.objects.count())
+        self.assertEqual(0, RejectedSong.objects.count())
+        for new_song in [song, song_2]:
+            self.assertTrue(os.path.exists(f'{self.new_file_dir}/{new_song.filename}.zip'))
+        self.assertEqual([], os.listdir(self.rejected_file_dir))
+
+    @override_settings(SCREENING_BATCH_ASYNC_THRESHOLD=1)
+    def test_large_batch_is_rejected_in_background(self):
+        # Arrange
+        song = self.create_song()
+        song_2 = self.create_song(hash_code='456')
+
+        # Act
+        response = self.client.post(
+            reverse('screening_reject'),
+            data={'song_ids': f"{song.id},{song_2.id}", 'rejection_reason': RejectedSong.Reasons.TEST_UPLOAD, 'message': 'test message'}
+        )
+
+        # Assert
+        batch = ScreeningBatch.objects.get(profile=self.user.profile)
+        self.assertRedirects(response, reverse('screening_batch', kwargs={'pk': batch.id}))
+        self.assertEqual(ScreeningBatch.Statuses.COMPLETE, batch.status)
+        self.assertEqual([None, None], [result['error'] for result in batch.results])
+        self.assert_song(song, RejectedSong.objects.get(hash=song.hash), RejectedSong.Reasons.TEST_UPLOAD, False, 'test message')
+        self.assert_song(song_2, RejectedSong.objects.get(hash=song_2.hash), RejectedSong.Reasons.TEST_UPLOAD, False, 'test message')
@@ -0,0 +1,100 @@
+import json
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import Permission
+from django.test import TestCase, override_settings
+from django.urls.base import reverse
+from django.utils import timezone
+
+from homepage.tests import factories
+from uploads import constants
+from uploads import factories as upload_factories
+from uploads.models import ScreeningQueueChange
+from uploads.screening_stream import prune_queue_changes, publish_changes
+
+def parse_events(content):
+    """Returns (id, type, data) for each event in a server-sent event stream."""
+    events = []
+    for block in content.decode().split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.splitlines() if not line.startswith(':'))
+        if 'event' in fields:
+            events.append((int(fields['id']), fields['event'], json.loads(fields['data'])))
+    return events
+
+@override_settings(SCREENING_STREAM_MAX_DURATION=0)
+class ScreeningStreamViewTests(TestCase):
+    def setUp(self):
+        self.user = factories.UserFactory()
+        self.user.user_permissions.add(Permission.objects.get(codename='can_approve_songs'))
+        self.async_client.force_login(self.user)
+        self.client.force_login(self.user)
+        self.other_screener = factories.UserFactory().profile
+
+    async def get_events(self, **kwargs):
+        response = await self.async_client.get(reverse('screening_stream'), **kwargs)
+        self.assertEqual('text/event-stream', response['Content-Type'])
+        return parse_events(b''.join([chunk async for chunk in response.streaming_content]))
+
+    async def test_changes_after_last_event_id_are_streamed(self):
+        # Arrange
+        seen_change_id = await sync_to_async(self.publish_claim)()
+        await sync_to_async(self.publish_claim)()
+
+        # Act
+        events = await self.get_events(headers={'Last-Event-ID': str(seen_change_id)})
+
+        # Assert
+        self.assertEqual(1, len(events))
+        change_id, change_type, data = events[0]
+        self.assertGreater(change_id, seen_change_id)
+        self.assertEqual(ScreeningQueueChange.Types.CLAIM, change_type)
+        self.assertEqual(self.other_screener.display_name, data['screener'])
+        self.assertFalse(data['mine'])
+
+    async def test_stream_without_starting_point_only_sends_new_changes(self):
+        # Arrange
+        await sync_to_async(self.publish_claim)()
+
+        # Act
+        events = await self.get_events()
+
+        # Assert
+        self.assertEqual([], events)
+
+    def test_stream_is_not_served_over_wsgi(self):
+        # Act
+        response = self.client.get(reverse('screening_stream'))
+
+        # Assert
+        self.assertEqual(204, response.status_code)
+
+    def test_claim_is_published_with_the_screener(self):
+        # Arrange
+        song = upload_factories.NewSongFactory()
+
+        # Act
+        self.client.post(reverse('screening_action'), {'selected_songs': [song.id], 'action': constants.CLAIM_KEYWORD})
+
+        # Assert
+        change = ScreeningQueueChange.objects.get()
+        self.assertEqual(song.id, change.new_song_id)
+        self.assertEqual(ScreeningQueueChange.Types.CLAIM, change.type)
+        self.assertEqual(self.user.profile, change.profile)
+
+    def test_old_changes_are_pruned(self):
+        # Arrange
+        self.publish_claim()
+        ScreeningQueueChange.objects.update(create_date=timezone.now() - timedelta(hours=25))
+        recent_change_id = self.publish_claim()
+
+        # Act
+        pruned_count = prune_queue_changes()
+
+        # Assert
+        self.assertEqual(1, pruned_count)
+        self.assertEqual([recent_change_id], list(ScreeningQueueChange.objects.values_list('id', flat=True)))
+
+    def publish_claim(self):
+        publish_changes(ScreeningQueueChange.Types.CLAIM, [upload_factories.NewSongFactory()], self.other_screener)
+        return ScreeningQueueChange.objects.latest('id').id
@@ -0,0 +1,63 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from homepage.tests import factories
+from uploads.models import UploadJob, UploadJobFile
+
+class UploadReportViewTests(TestCase):
+    def setUp(self):
+        self.user = factories.UserFactory()
+        self.client.force_login(self.user)
+
+    def create_job(self, profile, status=UploadJob.Statuses.COMPLETE):
+        job = UploadJob.objects.create(uploader_profile=profile, is_by_uploader=True, filename='pack.zip', status=status)
+        job.files.create(filename='test1.mod', status=UploadJobFile.Statuses.SUCCESS, title='Test Song', format='mod')
+        job.files.create(filename='test2.it', status=UploadJobFile.Statuses.FAILED, reason='Duplicate')
+        return job
+
+    def test_report_lists_successful_and_failed_files(self):
+        # Arrange
+        job = self.create_job(self.user.profile)
+
+        # Act
+        response = self.client.get(reverse('upload_report', kwargs={'pk': job.id}))
+
+        # Assert
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(['test1.mod'], [file['filename'] for file in response.context['successful_files']])
+        self.assertEqual(['test2.it'], [file['filename'] for file in response.context['failed_files']])
+        self.assertNotContains(response, 'http-equiv="refresh"')
+
+    def test_report_refreshes_while_job_is_pending(self):
+        # Arrange
+        job = self.create_job(self.user.profile, status=UploadJob.Statuses.PENDING)
+
+        # Act
+        response = self.client.get(reverse('upload_report', kwargs={'pk': job.id}))
+
+        # Assert
+        self.assertContains(response, 'http-equiv="refresh"')
+
+    def test_report_of_another_users_job_is_not_found(self):
+        # Arrange
+        job = self.create_job(factories.UserFactory().profile)
+
+        # Act
+        response = self.client.get(reverse('upload_report', kwargs={'pk': job.id}))
+
+        # Assert
+        self.assertEqual(404, response.status_code)
+
+    def test_status_returns_json_results(self):
+        # Arrange
+        job = self.create_job(self.user.profile, status=UploadJob.Statuses.PROCESSING)
+
+        # Act
+        response = self.client.get(reverse('upload_report_status', kwargs={'pk': job.id}))
+
+        # Assert
+        data = response.json()
+        self.assertEqual('processing', data['status'])
+        self.assertFalse(data['is_finished'])
+        self.assertEqual('test1.mod', data['successful_files'][0]['filename'])
+        self.assertEqual('Duplicate', data['failed_files'][0]['reason'])
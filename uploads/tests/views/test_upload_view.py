@@ -1,3 +1,5 @@
+import hashlib
+import io
 import os
 import tempfile
 import zipfile
@@ -12,7 +14,8 @@ from django.urls.base import reverse
 
 from homepage.tests import factories
 from songs.models import Song
-from uploads.models import NewSong
+from modarchive.file_repository import UploadProcessor
+from uploads.models import NewSong, UploadJob
 
 from songs import factories as song_factories
 from uploads import factories as upload_factories
@@ -149,7 +152,7 @@ class UploadViewTests(TestCase):
     def get_file_path(self, filename):
         return os.path.join(os.path.dirname(__file__), '../../testdata', filename)
 
-    @patch('uploads.views.upload_view.get_mod_info')
+    @patch('uploads.mod_info.get_mod_info')
     def test_upload_single_song(self, mock_mod_info):
         # Arrange
         mock_mod_info.return_value = self.test_mod_info
@@ -159,28 +162,30 @@ class UploadViewTests(TestCase):
         response = self.client.post(reverse('upload_songs'), {
             'written_by_me': 'yes',
             'song_file': uploaded_file
-        })
+        }, follow=True)
 
         # Assert
         self.assert_zipped_file(self.new_file_dir, TEST_MOD_ZIP_NAME, TEST_MOD_FILENAME)
         self.assertEqual(os.listdir(self.temp_upload_dir), [])
         self.assert_song_in_database(TEST_MOD_FILENAME, SONG_TITLE, Song.Formats.MOD, 4, self.user.profile, True)
+        self.assertEqual(hashlib.sha256(uploaded_file.file.getvalue()).hexdigest(), NewSong.objects.get(filename=TEST_MOD_FILENAME).sha256)
         self.assert_context_success(response.context, 1, [TEST_MOD_FILENAME], [SONG_TITLE], [Song.Formats.MOD])
 
-    @patch('uploads.views.upload_view.get_mod_info')
+    @patch('uploads.mod_info.get_mod_info')
     def test_upload_multiple_songs(self, mock_mod_info):
         # Arrange
         mod_path = self.get_file_path(TEST_MOD_FILENAME)
         it_path = self.get_file_path(TEST_IT_FILENAME)
         s3m_path = self.get_file_path(TEST_S3M_FILENAME)
 
-        responses = [
-            self.test_mod_info,
-            self.test_it_info,
-            self.test_s3m_info,
-        ]
+        responses = {
+            TEST_MOD_FILENAME: self.test_mod_info,
+            TEST_IT_FILENAME: self.test_it_info,
+            TEST_S3M_FILENAME: self.test_s3m_info,
+        }
 
-        mock_mod_info.side_effect = responses
+        # Files are analyzed concurrently, so responses are matched by filename rather than call order
+        mock_mod_info.side_effect = lambda file, timeout=None: responses[os.path.basename(file)]
 
         with tempfile.TemporaryDirectory() as temp_dir:
             zip_file_path = os.path.join(temp_dir, 'test.zip')
@@ -192,7 +197,7 @@ class UploadViewTests(TestCase):
 
             # Act
             with open(zip_file_path, 'rb') as f:
-                response = self.client.post(reverse('upload_songs'), {'written_by_me': 'no', 'song_file': f})
+                response = self.client.post(reverse('upload_songs'), {'written_by_me': 'no', 'song_file': f}, follow=True)
 
             # Assert
             self.assert_zipped_file(self.new_file_dir, TEST_MOD_ZIP_NAME, TEST_MOD_FILENAME)
@@ -207,7 +212,7 @@ class UploadViewTests(TestCase):
 
             self.assert_context_success(response.context, 3, [TEST_MOD_FILENAME, TEST_IT_FILENAME, TEST_S3M_FILENAME], [SONG_TITLE, IT_TITLE, S3M_TITLE], [Song.Formats.MOD, Song.Formats.IT, Song.Formats.S3M])
 
-    @patch('uploads.views.upload_view.get_mod_info')
+    @patch('uploads.mod_info.get_mod_info')
     def test_reject_files_already_in_screening(self, mock_mod_info):
         # Arrange
         mock_mod_info.return_value = self.test_mod_info
@@ -218,7 +223,7 @@ class UploadViewTests(TestCase):
         response = self.client.post(reverse('upload_songs'), {
             'written_by_me': 'yes',
             'song_file': uploaded_file
-        })
+        }, follow=True)
 
         # Assert
         self.assertFalse(os.path.isfile(os.path.join(self.new_file_dir, TEST_MOD_FILENAME)))
@@ -234,7 +239,7 @@ class UploadViewTests(TestCase):
         self.assertEqual(failed_file['filename'], TEST_MOD_FILENAME)
         self.assertEqual(failed_file['reason'], constants.UPLOAD_DUPLICATE_SONG_IN_PROCESSING_QUEUE)
 
-    @patch('uploads.views.upload_view.get_mod_info')
+    @patch('uploads.mod_info.get_mod_info')
     def test_reject_files_already_in_archive(self, mock_mod_info):
         # Arrange
         mock_mod_info.return_value = self.test_mod_info
@@ -245,7 +250,7 @@ class UploadViewTests(TestCase):
         response = self.client.post(reverse('upload_songs'), {
             'written_by_me': 'yes',
             'song_file': uploaded_file
-        })
+        }, follow=True)
 
         # Assert
         self.assertFalse(os.path.isfile(os.path.join(self.new_file_dir, TEST_MOD_FILENAME)))
@@ -262,7 +267,7 @@ class UploadViewTests(TestCase):
         self.assertEqual(failed_file['reason'], constants.UPLOAD_DUPLICATE_SONG_IN_ARCHIVE)
 
     @override_settings(MAXIMUM_UPLOAD_SIZE=1000)
-    @patch('uploads.views.upload_view.get_mod_info')
+    @patch('uploads.mod_info.get_mod_info')
     def test_reject_files_that_are_too_large(self, mock_mod_info):
         # Arrange
         mock_mod_info.return_value = self.test_mod_info
@@ -272,7 +277,7 @@ class UploadViewTests(TestCase):
         response = self.client.post(reverse('upload_songs'), {
             'written_by_me': 'yes',
             'song_file': uploaded_file
-        })
+        }, follow=True)
 
         # Assert
         self.assertFalse(os.path.isfile(os.path.join(self.new_file_dir, TEST_MOD_FILENAME)))
@@ -289,7 +294,7 @@ class UploadViewTests(TestCase):
         self.assertEqual(failed_file['reason'], constants.UPLOAD_TOO_LARGE%(settings.MAXIMUM_UPLOAD_SIZE))
 
     @override_settings(MAXIMUM_UPLOAD_FILENAME_LENGTH=4)
-    @patch('uploads.views.upload_view.get_mod_info')
+    @patch('uploads.mod_info.get_mod_info')
     def test_reject_file_with_long_filename(self, mock_mod_info):
         # Arrange
         mock_mod_info.return_value = self.test_mod_info
@@ -299,7 +304,7 @@ class UploadViewTests(TestCase):
         response = self.client.post(reverse('upload_songs'), {
             'written_by_me': 'yes',
             'song_file': uploaded_file
-        })
+        }, follow=True)
 
         # Assert
         self.assertFalse(os.path.isfile(os.path.join(self.new_file_dir, TEST_MOD_FILENAME)))
@@ -315,7 +320,7 @@ class UploadViewTests(TestCase):
         self.assertEqual(failed_file['filename'], TEST_MOD_FILENAME)
         self.assertEqual(failed_file['reason'], constants.UPLOAD_FILENAME_TOO_LONG%(settings.MAXIMUM_UPLOAD_FILENAME_LENGTH))
 
-    @patch('uploads.views.upload_view.get_mod_info')
+    @patch('uploads.mod_info.get_mod_info')
     def test_reject_file_when_modinfo_fails(self, mock_mod_info):
         # Arrange
         mock_mod_info.return_value = None
@@ -325,7 +330,7 @@ class UploadViewTests(TestCase):
         response = self.client.post(reverse('upload_songs'), {
             'written_by_me': 'yes',
             'song_file': uploaded_file
-        })
+        }, follow=True)
 
         # Assert
         self.assertFalse(os.path.isfile(os.path.join(self.new_file_dir, NOT_A_MOD_FILENAME)))
@@ -342,7 +347,7 @@ class UploadViewTests(TestCase):
         self.assertEqual(failed_file['reason'], constants.UPLOAD_UNRECOGNIZED_FORMAT)
 
     @override_settings(UNSUPPORTED_FORMATS=['it'])
-    @patch('uploads.views.upload_view.get_mod_info')
+    @patch('uploads.mod_info.get_mod_info')
     def test_reject_file_if_format_not_supported(self, mock_mod_info):
         # Arrange
         mock_mod_info.return_value = self.test_it_info
@@ -352,7 +357,7 @@ class UploadViewTests(TestCase):
         response = self.client.post(reverse('upload_songs'), {
             'written_by_me': 'yes',
             'song_file': uploaded_file
-        })
+        }, follow=True)
 
         # Assert
         self.assertFalse(os.path.isfile(os.path.join(self.new_file_dir, TEST_IT_FILENAME)))
@@ -368,7 +373,7 @@ class UploadViewTests(TestCase):
         self.assertEqual(failed_file['filename'], TEST_IT_FILENAME)
         self.assertEqual(failed_file['reason'], constants.UPLOAD_UNSUPPORTED_FORMAT)
 
-    @patch('uploads.views.upload_view.get_mod_info')
+    @patch('uploads.mod_info.get_mod_info')
     def test_rename_file_extension_when_it_does_not_match_the_format(self, mock_mod_info):
         # Arrange
         mock_mod_info.return_value = self.test_mod_info
@@ -378,7 +383,7 @@ class UploadViewTests(TestCase):
         response = self.client.post(reverse('upload_songs'), {
             'written_by_me': 'yes',
             'song_file': uploaded_file
-        })
+        }, follow=True)
 
         # Assert
         self.assert_zipped_file(self.new_file_dir, TEST_MOD_ZIP_NAME, TEST_MOD_FILENAME)
@@ -386,7 +391,7 @@ class UploadViewTests(TestCase):
         self.assert_song_in_database(TEST_MOD_FILENAME, SONG_TITLE, Song.Formats.MOD, 4, self.user.profile, True)
         self.assert_context_success(response.context, 1, [TEST_MOD_FILENAME], [SONG_TITLE], [Song.Formats.MOD])
 
-    @patch('uploads.views.upload_view.get_mod_info')
+    @patch('uploads.mod_info.get_mod_info')
     def test_rename_file_to_remove_whitespace_and_uppercase_letters(self, mock_mod_info):
         # Arrange
         mock_mod_info.return_value = self.test_mod_info
@@ -396,7 +401,7 @@ class UploadViewTests(TestCase):
         response = self.client.post(reverse('upload_songs'), {
             'written_by_me': 'yes',
             'song_file': uploaded_file
-        })
+        }, follow=True)
 
         # Assert
         underscored_mod_filename = 'test_1.mod'
@@ -405,7 +410,7 @@ class UploadViewTests(TestCase):
         self.assert_song_in_database(underscored_mod_filename, SONG_TITLE, Song.Formats.MOD, 4, self.user.profile, True)
         self.assert_context_success(response.context, 1, [underscored_mod_filename], [SONG_TITLE], [Song.Formats.MOD])
 
-    @patch('uploads.views.upload_view.get_mod_info')
+    @patch('uploads.mod_info.get_mod_info')
     def test_reject_file_if_previously_rejected_by_screeners(self, mock_mod_info):
         # Arrange
         uploaded_file = self.create_file(TEST_MOD_FILENAME)
@@ -416,7 +421,7 @@ class UploadViewTests(TestCase):
         response = self.client.post(reverse('upload_songs'), {
             'written_by_me': 'yes',
             'song_file': uploaded_file
-        })
+        }, follow=True)
 
         # Assert
         self.assertFalse(os.path.isfile(os.path.join(self.new_file_dir, TEST_MOD_FILENAME)))
@@ -432,7 +437,7 @@ class UploadViewTests(TestCase):
         self.assertEqual(failed_file['filename'], TEST_MOD_FILENAME)
         self.assertEqual(failed_file['reason'], constants.UPLOAD_SONG_PREVIOUSLY_REJECTED)
 
-    @patch('uploads.views.upload_view.get_mod_info')
+    @patch('uploads.mod_info.get_mod_info')
     def test_permit_file_temporarily_rejected_by_screeners(self, mock_mod_info):
         # Arrange
         uploaded_file = self.create_file(TEST_MOD_FILENAME)
@@ -443,10 +448,129 @@ class UploadViewTests(TestCase):
         response = self.client.post(reverse('upload_songs'), {
             'written_by_me': 'yes',
             'song_file': uploaded_file
-        })
+        }, follow=True)
 
         # Assert
         self.assert_zipped_file(self.new_file_dir, TEST_MOD_ZIP_NAME, TEST_MOD_FILENAME)
         self.assertEqual(os.listdir(self.temp_upload_dir), [])
         self.assert_song_in_database(TEST_MOD_FILENAME, SONG_TITLE, Song.Formats.MOD, 4, self.user.profile, True)
         self.assert_context_success(response.context, 1, [TEST_MOD_FILENAME], [SONG_TITLE], [Song.Formats.MOD])
+
+    @patch('uploads.mod_info.get_mod_info')
+    def test_upload_with_same_patterns_as_archived_song_is_flagged_as_possible_duplicate(self, mock_mod_info):
+        # Arrange
+        uploaded_file = self.create_file(TEST_MOD_FILENAME)
+        mock_mod_info.return_value = {**self.test_mod_info, 'pattern_hash': '0123456789abcdef'}
+        song = song_factories.SongFactory(pattern_hash='0123456789abcdef')
+
+        # Act
+        self.client.post(reverse('upload_songs'), {
+            'written_by_me': 'yes',
+            'song_file': uploaded_file
+        }, follow=True)
+
+        # Assert
+        new_song = NewSong.objects.get(filename=TEST_MOD_FILENAME)
+        self.assertEqual(NewSong.Flags.POSSIBLE_DUPLICATE, new_song.flag)
+        self.assertEqual(1.0, new_song.duplicate_score)
+        self.assertEqual([song.id], [candidate.song_id for candidate in new_song.duplicate_candidates.all()])
+
+    @patch('uploads.processing.async_task')
+    def test_upload_is_queued_for_processing(self, mock_async_task):
+        # Arrange
+        uploaded_file = self.create_file(TEST_MOD_FILENAME)
+
+        # Act
+        response = self.client.post(reverse('upload_songs'), {
+            'written_by_me': 'yes',
+            'song_file': uploaded_file
+        })
+
+        # Assert
+        job = UploadJob.objects.get(uploader_profile=self.user.profile)
+        self.assertRedirects(response, reverse('upload_report', kwargs={'pk': job.id}))
+        self.assertEqual(UploadJob.Statuses.PENDING, job.status)
+        self.assertTrue(os.path.isfile(job.file_path))
+        mock_async_task.assert_called_once_with('modarchive.tasks.process_upload', job.id, timeout=settings.UPLOAD_PROCESSING_TIMEOUT)
+        UploadProcessor(job.file_path).remove_processing_directory()
+
+    @patch('uploads.mod_info.get_mod_info')
+    def test_failure_analyzing_one_file_does_not_fail_the_others(self, mock_mod_info):
+        # Arrange
+        def get_mod_info(file, timeout=None):
+            if os.path.basename(file) == TEST_IT_FILENAME:
+                raise OSError('modinfo crashed')
+            return self.test_mod_info
+
+        mock_mod_info.side_effect = get_mod_info
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as zip_file:
+            zip_file.write(self.get_file_path(TEST_MOD_FILENAME), arcname=TEST_MOD_FILENAME)
+            zip_file.write(self.get_file_path(TEST_IT_FILENAME), arcname=TEST_IT_FILENAME)
+        uploaded_file = SimpleUploadedFile('test.zip', buffer.getvalue(), content_type=OCTET_STREAM)
+
+        # Act
+        response = self.client.post(reverse('upload_songs'), {
+            'written_by_me': 'yes',
+            'song_file': uploaded_file
+        }, follow=True)
+
+        # Assert
+        self.assert_context_success(response.context, 1, [TEST_MOD_FILENAME], [SONG_TITLE], [Song.Formats.MOD])
+        self.assertEqual([{'filename': TEST_IT_FILENAME, 'title': '', 'format': '', 'reason': constants.UPLOAD_PROCESSING_FAILED}], response.context['failed_files'])
+        self.assertEqual(os.listdir(self.temp_upload_dir), [])
+
+    @patch('uploads.mod_info.get_mod_info')
+    def test_duplicates_are_rejected_without_running_modinfo(self, mock_mod_info):
+        # Arrange
+        song_factories.SongFactory(hash='47c9d81e6c4966913e068a84b1b340f6')
+        uploaded_file = self.create_file(TEST_MOD_FILENAME)
+
+        # Act
+        self.client.post(reverse('upload_songs'), {
+            'written_by_me': 'yes',
+            'song_file': uploaded_file
+        }, follow=True)
+
+        # Assert
+        mock_mod_info.assert_not_called()
+
+    @patch('uploads.mod_info.get_mod_info')
+    def test_resubmitted_file_uses_cached_metadata(self, mock_mod_info):
+        # Arrange
+        mock_mod_info.return_value = None
+
+        # Act
+        for _ in range(2):
+            response = self.client.post(reverse('upload_songs'), {
+                'written_by_me': 'yes',
+                'song_file': self.create_file(NOT_A_MOD_FILENAME)
+            }, follow=True)
+
+        # Assert
+        mock_mod_info.assert_called_once()
+        self.assertEqual(constants.UPLOAD_UNRECOGNIZED_FORMAT, response.context['failed_files'][0]['reason'])
+
+    @override_settings(UPLOAD_ZIP_MAX_FILES=1)
+    @patch('uploads.mod_info.get_mod_info')
+    def test_reject_zip_with_too_many_files(self, mock_mod_info):
+        # Arrange
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as zip_file:
+            zip_file.write(self.get_file_path(TEST_MOD_FILENAME), arcname=TEST_MOD_FILENAME)
+            zip_file.write(self.get_file_path(TEST_IT_FILENAME), arcname=TEST_IT_FILENAME)
+        uploaded_file = SimpleUploadedFile('test.zip', buffer.getvalue(), content_type=OCTET_STREAM)
+
+        # Act
+        response = self.client.post(reverse('upload_songs'), {
+            'written_by_me': 'yes',
+            'song_file': uploaded_file
+        }, follow=True)
+
+        # Assert
+        mock_mod_info.assert_not_called()
+        self.assertEqual(0, len(response.context['successful_files']))
+        failed_file = response.context['failed_files'][0]
+        self.assertEqual('test.zip', failed_file['filename'])
+        self.assertEqual(constants.UPLOAD_ZIP_TOO_MANY_FILES%(1), failed_file['reason'])
+        self.assertEqual(os.listdir(self.temp_upload_dir), [])
@@ -1,21 +1,31 @@
 from django.urls import path
 
 from uploads.views.upload_view import UploadView
-from uploads.views.upload_report_view import UploadReportView
+from uploads.views.chunked_upload_view import ChunkedUploadStartView, ChunkedUploadView, ChunkedUploadFinalizeView
+from uploads.views.upload_report_view import UploadReportView, UploadReportStatusView
 from uploads.views.pending_uploads_view import PendingUploadsView
-from uploads.views.screening_index_view import ScreeningIndexView
+from uploads.views.screening_index_view import ScreeningIndexView, ScreeningQueueStatsView
 from uploads.views.screening_action_view import ScreeningActionView
 from uploads.views.screen_song_view import ScreenSongView
 from uploads.views.screening_download_view import ScreeningDownloadView
 from uploads.views.screening_reject_view import ScreeningRejectView
 from uploads.views.screening_rename_view import ScreeningRenameView
+from uploads.views.screening_batch_view import ScreeningBatchView
+from uploads.views.screening_stream_view import ScreeningStreamView
 
 urlpatterns = [
     path('upload', UploadView.as_view(), name='upload_songs'),
-    path('upload_report', UploadReportView.as_view(), name='upload_report'),
+    path('upload/chunked', ChunkedUploadStartView.as_view(), name='chunked_upload_start'),
+    path('upload/chunked/<int:pk>', ChunkedUploadView.as_view(), name='chunked_upload'),
+    path('upload/chunked/<int:pk>/finalize', ChunkedUploadFinalizeView.as_view(), name='chunked_upload_finalize'),
+    path('upload_report/<int:pk>', UploadReportView.as_view(), name='upload_report'),
+    path('upload_report/<int:pk>/status', UploadReportStatusView.as_view(), name='upload_report_status'),
     path('pending_uploads', PendingUploadsView.as_view(), name='pending_uploads'),
     path('screen_songs', ScreeningIndexView.as_view(), name='screening_index'),
+    path('screen_songs/stats', ScreeningQueueStatsView.as_view(), name='screening_queue_stats'),
+    path('screen_songs/events', ScreeningStreamView.as_view(), name='screening_stream'),
     path('screen_songs/action', ScreeningActionView.as_view(), name='screening_action'),
+    path('screen_songs/batch/<int:pk>', ScreeningBatchView.as_view(), name='screening_batch'),
     path('screen_song/<int:pk>/', ScreenSongView.as_view(), name='screen_song'),
     path('screen_song/<int:pk>/download', ScreeningDownloadView.as_view(), name='screening_download'),
     path('screen_songs/reject', ScreeningRejectView.as_view(), name='screening_reject'),
@@ -0,0 +1,125 @@
+from django.conf import settings
+from django.contrib.auth.mixins import PermissionRequiredMixin
+from django.db import transaction
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils import timezone
+from django.views import View
+
+from modarchive import file_repository
+from uploads import constants, forms, processing
+from uploads.models import ChunkedUpload, UploadJob
+
+def get_upload_status(upload: ChunkedUpload):
+    status = {
+        'id': upload.id,
+        'filename': upload.filename,
+        'size': upload.size,
+        'offset': upload.offset,
+        'max_chunk_size': settings.CHUNKED_UPLOAD_MAX_CHUNK_SIZE,
+        'upload_url': reverse('chunked_upload', kwargs={'pk': upload.id}),
+        'finalize_url': reverse('chunked_upload_finalize', kwargs={'pk': upload.id}),
+        'job_id': upload.job_id,
+    }
+    if upload.job_id:
+        status['report_url'] = reverse('upload_report', kwargs={'pk': upload.job_id})
+    return status
+
+def error_response(upload, message, status):
+    response = {'error': message}
+    if upload is not None:
+        response.update(get_upload_status(upload))
+    return JsonResponse(response, status=status)
+
+class ChunkedUploadMixin(PermissionRequiredMixin):
+    permission_required = 'uploads.can_upload_songs'
+
+    def get_upload(self, for_update=False):
+        uploads = ChunkedUpload.objects.filter(uploader_profile=self.request.user.profile)
+        if for_update:
+            uploads = uploads.select_for_update()
+        return get_object_or_404(uploads, pk=self.kwargs['pk'])
+
+class ChunkedUploadStartView(ChunkedUploadMixin, View):
+    """Starts a chunked upload of a file of the given size, returning where to send its chunks."""
+    def post(self, request, *args, **kwargs):
+        form = forms.ChunkedUploadForm(request.POST)
+        if not form.is_valid():
+            return JsonResponse({'errors': form.errors}, status=400)
+
+        if form.cleaned_data['size'] > settings.MAXIMUM_UPLOAD_SIZE:
+            return error_response(None, constants.UPLOAD_TOO_LARGE%(settings.MAXIMUM_UPLOAD_SIZE), 413)
+
+        file_path = file_repository.new_processing_path(form.cleaned_data['filename'])
+        open(file_path, 'wb').close()
+
+        upload = ChunkedUpload.objects.create(
+            uploader_profile=request.user.profile,
+            uploader_ip_address=request.META.get('REMOTE_ADDR'),
+            is_by_uploader=form.cleaned_data['written_by_me'] == 'yes',
+            filename=form.cleaned_data['filename'],
+            file_path=file_path,
+            size=form.cleaned_data['size']
+        )
+        return JsonResponse(get_upload_status(upload), status=201)
+
+class ChunkedUploadView(ChunkedUploadMixin, View):
+    """
+    GET returns how much of the upload has been received, so an interrupted client knows where
+    to resume. PUT appends the request body at the offset in the Upload-Offset header, which
+    must be where the data received so far ends, after checking it against the Upload-Checksum
+    header ("sha256 <hex digest>"). The body is streamed straight to disk.
+    """
+    def get(self, request, *args, **kwargs):
+        return JsonResponse(get_upload_status(self.get_upload()))
+
+    @transaction.atomic
+    def put(self, request, *args, **kwargs):
+        # The row lock keeps a retried chunk from being written while the first attempt still is
+        upload = self.get_upload(for_update=True)
+        if upload.job_id:
+            return error_response(upload, constants.CHUNKED_UPLOAD_ALREADY_FINALIZED, 409)
+
+        try:
+            length = int(request.headers['Content-Length'])
+            offset = int(request.headers['Upload-Offset'])
+            algorithm, checksum = request.headers['Upload-Checksum'].split(' ', 1)
+        except (KeyError, ValueError):
+            return error_response(upload, constants.CHUNKED_UPLOAD_INVALID_HEADERS, 400)
+        if algorithm.lower() != 'sha256' or length < 1:
+            return error_response(upload, constants.CHUNKED_UPLOAD_INVALID_HEADERS, 400)
+
+        if offset != upload.offset:
+            return error_response(upload, constants.CHUNKED_UPLOAD_OFFSET_MISMATCH, 409)
+        if length > settings.CHUNKED_UPLOAD_MAX_CHUNK_SIZE or offset + length > upload.size:
+            return error_response(upload, constants.CHUNKED_UPLOAD_CHUNK_TOO_LARGE%(settings.CHUNKED_UPLOAD_MAX_CHUNK_SIZE), 413)
+
+        if not file_repository.write_chunk(upload.file_path, offset, request, length, checksum.strip()):
+            return error_response(upload, constants.CHUNKED_UPLOAD_CHECKSUM_MISMATCH, 400)
+
+        upload.offset += length
+        upload.update_date = timezone.now()
+        upload.save(update_fields=['offset', 'update_date'])
+        return JsonResponse(get_upload_status(upload))
+
+class ChunkedUploadFinalizeView(ChunkedUploadMixin, View):
+    """Hands a fully received upload to the upload processing pipeline, returning the job's report URL."""
+    def post(self, request, *args, **kwargs):
+        with transaction.atomic():
+            upload = self.get_upload(for_update=True)
+            if upload.job_id:
+                return error_response(upload, constants.CHUNKED_UPLOAD_ALREADY_FINALIZED, 409)
+            if not upload.is_complete():
+                return error_response(upload, constants.CHUNKED_UPLOAD_INCOMPLETE%(upload.offset, upload.size), 409)
+
+            upload.job = UploadJob.objects.create(
+                uploader_profile=upload.uploader_profile,
+                uploader_ip_address=upload.uploader_ip_address,
+                is_by_uploader=upload.is_by_uploader,
+                filename=upload.filename
+            )
+            upload.save(update_fields=['job'])
+
+        processing.queue_upload_job(upload.job, upload.file_path)
+        return JsonResponse(get_upload_status(upload))
@@ -76,24 +76,31 @@ class ScreenSongView(PermissionRequiredMixin, DetailView):
         NewSong.Flags.PRE_SCREENED_PLUS: constants.FLAG_MESSAGE_PRE_SCREENED_AND_RECOMMENDED
     }
 
+    def get_queryset(self):
+        # Every profile the page shows is fetched with the song
+        return super().get_queryset().select_related('uploader_profile', 'claimed_by', 'flagged_by')
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['claimed_by_me'] = self.request.user.profile == self.object.claimed_by
-        context['claimed_by_other_user'] = self.object.claimed_by is not None and self.request.user.profile != self.object.claimed_by
+        profile = self.request.user.profile
+        context['claimed_by_me'] = self.object.claimed_by_id == profile.id
+        context['claimed_by_other_user'] = self.object.claimed_by_id is not None and self.object.claimed_by_id != profile.id
         context['flag_message'] = self.flag_messages_mapping.get(self.object.flag, None)
         context['flag_message_class'] = 'success' if self.object.flag in [NewSong.Flags.PRE_SCREENED, NewSong.Flags.PRE_SCREENED_PLUS] else 'warning'
         context['screening_events'] = self.object.screening_events.all()
-        if self.object.claimed_by is None:
+        context['duplicate_candidates'] = self.object.duplicate_candidates.select_related('song', 'queued_song', 'rejected_song')
+        if self.object.claimed_by_id is None:
             context['actions'] = [
                 constants.CLAIM_ACTION
             ]
-        elif self.object.claimed_by == self.request.user.profile:
-            if self.object.flagged_by == self.request.user.profile and self.object.flag in [NewSong.Flags.NEEDS_SECOND_OPINION]:
+        elif context['claimed_by_me']:
+            if self.object.flagged_by_id == profile.id and self.object.flag in [NewSong.Flags.NEEDS_SECOND_OPINION]:
                 context['actions'] = [constants.CLEAR_FLAG_ACTION, constants.RENAME_ACTION]
             else:
-                context['actions'] = self.flag_actions_mapping.get(self.object.flag, self.claimed_and_no_flag_actions)
+                # Copied, so that adding the unclaim action does not change the shared lists
+                context['actions'] = list(self.flag_actions_mapping.get(self.object.flag, self.claimed_and_no_flag_actions))
             context['actions'].append(constants.UNCLAIM_ACTION)
-        elif self.object.claimed_by != self.request.user.profile:
+        else:
             context['actions'] = []
 
         return context
@@ -1,19 +1,20 @@
-import os
 from urllib.parse import urlencode
 
 from django.conf import settings
 from django.contrib import messages
-from django.db import transaction, Error
 from django.shortcuts import redirect
 from django.views import View
 from django.contrib.auth.mixins import PermissionRequiredMixin
 from django.utils import timezone
+from django_q.tasks import async_task
 from django.urls.base import reverse
 
 from songs.models import Song
-from uploads.models import NewSong, ScreeningEvent
+from uploads import bulk_screening
+from uploads.models import NewSong, ScreeningBatch, ScreeningEvent, ScreeningQueueChange
+from uploads.queue_stats import invalidate_queue_stats
+from uploads.screening_stream import publish_changes
 from uploads import constants
-from artists.models import Artist
 
 class ScreeningActionView(PermissionRequiredMixin, View):
     template_name = 'screening_action_result.html'
@@ -33,6 +34,12 @@ class ScreeningActionView(PermissionRequiredMixin, View):
         CLEAR_FLAG = constants.CLEAR_FLAG_KEYWORD
         RENAME = constants.RENAME_KEYWORD
 
+    def dispatch(self, request, *args, **kwargs):
+        response = super().dispatch(request, *args, **kwargs)
+        # Every action can move songs between the queue filters
+        invalidate_queue_stats()
+        return response
+
     def post(self, request, *args, **kwargs):
         # Determine action from request, reject if not a valid action
         action = getattr(self.ScreeningAction, request.POST.get('action', '').upper(), None)
@@ -107,6 +114,7 @@ class ScreeningActionView(PermissionRequiredMixin, View):
             for song in songs_to_update
         ]
         ScreeningEvent.objects.bulk_create(screening_events)
+        publish_changes(ScreeningQueueChange.Types.CLAIM, songs_to_update, request.user.profile)
         return redirect(f'{reverse("screening_index")}?filter={constants.MY_SCREENING_FILTER}')
 
     def unclaim(self, queryset, request):
@@ -127,6 +135,7 @@ class ScreeningActionView(PermissionRequiredMixin, View):
             for song in songs_to_update
         ]
         ScreeningEvent.objects.bulk_create(screening_events)
+        publish_changes(ScreeningQueueChange.Types.UNCLAIM, songs_to_update, request.user.profile)
 
         return redirect('screening_index')
 
@@ -153,6 +162,9 @@ class ScreeningActionView(PermissionRequiredMixin, View):
             for song in songs_to_update
         ]
         ScreeningEvent.objects.bulk_create(screening_events)
+        for song in songs_to_update:
+            song.flag = flag
+        publish_changes(ScreeningQueueChange.Types.APPLY_FLAG, songs_to_update, request.user.profile)
 
         return redirect(f'{reverse("screening_index")}?filter={return_filter}')
 
@@ -179,6 +191,9 @@ class ScreeningActionView(PermissionRequiredMixin, View):
             for song in songs_to_update
         ]
         ScreeningEvent.objects.bulk_create(screening_events)
+        for song in songs_to_update:
+            song.flag = None
+        publish_changes(ScreeningQueueChange.Types.CLEAR_FLAG, songs_to_update, request.user.profile)
         return redirect('screening_index')
 
     def approve_songs(self, songs, request, feature=False):
@@ -192,83 +207,29 @@ class ScreeningActionView(PermissionRequiredMixin, View):
         if len(songs) == 1 and not self.validate_single_approval(songs, request):
             return redirect('screen_song', pk=songs[0].id)
 
-        pks = []
-        for approved_song in songs:
-            pk = self.finalize_approval(approved_song, feature, request.user.profile)
-            if pk:
-                pks.append(pk)
+        if len(songs) > settings.SCREENING_BATCH_ASYNC_THRESHOLD:
+            # Large batches run in a worker, and the screener is shown their progress
+            batch = ScreeningBatch.objects.create(
+                action=ScreeningBatch.Actions.APPROVE,
+                profile=request.user.profile,
+                new_song_ids=[song.id for song in songs],
+                options={'feature': feature}
+            )
+            async_task('modarchive.tasks.run_screening_batch', batch.id)
+            return redirect('screening_batch', pk=batch.id)
+
+        outcomes = bulk_screening.approve_songs([song.id for song in songs], request.user.profile, feature)
+        for outcome in outcomes:
+            if outcome.error:
+                messages.error(request, f'{outcome.filename}: {outcome.error}')
 
+        pks = [outcome.song_id for outcome in outcomes if outcome.song_id]
         if len(pks) > 1:
             messages.success(request, constants.MESSAGE_SONGS_APPROVED.format(len(pks)))
             return redirect('screening_index')
         elif len(pks) == 1:
             return redirect('view_song', pk=pks[0])
-
-    @transaction.atomic
-    def finalize_approval(self, approved_song: NewSong, feature=False, approver=None):
-        # Folder is the capitalized first character of the filename. If it's a number, use '1_9'
-        if approved_song.filename[0].isdigit():
-            folder = '0_9'
-        else:
-            folder = approved_song.filename[0].upper()
-
-        if approved_song.title.strip():
-            title = approved_song.title
-        else:
-            title = approved_song.filename
-
-        song = Song(
-            filename=approved_song.filename,
-            filename_unzipped=approved_song.filename_unzipped,
-            title=title,
-            title_from_file=approved_song.title,
-            format=approved_song.format.upper(),
-            file_size=approved_song.file_size,
-            channels=approved_song.channels,
-            instrument_text=approved_song.instrument_text,
-            comment_text=approved_song.comment_text,
-            hash=approved_song.hash,
-            pattern_hash=approved_song.pattern_hash,
-            folder=folder,
-            uploaded_by=approved_song.uploader_profile,
-            featured_by=approver if feature else None,
-            featured_date=timezone.now() if feature else None,
-        )
-
-        # Move file into the new directory
-        current_location = os.path.join(settings.NEW_FILE_DIR, f'{approved_song.filename}.zip')
-        new_location = song.get_archive_path()
-        try:
-            os.rename(current_location, new_location)
-        except OSError:
-            return None
-
-        try:
-            song.save()
-
-            # If uploaded by artist, add to artist's list of songs
-            if approved_song.is_by_uploader:
-                # Determine if the uploader profile has an artist
-                if not Artist.objects.filter(profile=approved_song.uploader_profile).exists():
-                    # If not, create a new artist
-                    artist = Artist.objects.create(
-                        user=approved_song.uploader_profile.user,
-                        profile=approved_song.uploader_profile,
-                        name=approved_song.uploader_profile.user.username
-                    )
-                else:
-                    # If so, use the existing one
-                    artist = approved_song.uploader_profile.artist
-
-                artist.songs.add(song)
-
-            # Delete the NewSong record
-            approved_song.delete()
-            return song.pk
-        except Error:
-            os.rename(new_location, current_location)
-            transaction.set_rollback(True)
-            return None
+        return redirect('screening_index')
 
     def validate_bulk_approval(self, songs, request) -> bool:
         if songs.exclude(flag=NewSong.Flags.PRE_SCREENED).exclude(flag=NewSong.Flags.PRE_SCREENED_PLUS).exists():
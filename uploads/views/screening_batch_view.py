@@ -0,0 +1,20 @@
+from django.contrib.auth.mixins import PermissionRequiredMixin
+from django.views.generic import DetailView
+
+from uploads.models import ScreeningBatch
+
+class ScreeningBatchView(PermissionRequiredMixin, DetailView):
+    """Shows the progress of a bulk screening action running in a worker, then its outcome for each song."""
+    template_name = "screening_batch.html"
+    permission_required = 'uploads.can_approve_songs'
+    model = ScreeningBatch
+    context_object_name = 'batch'
+
+    def get_queryset(self):
+        return ScreeningBatch.objects.filter(profile=self.request.user.profile)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['successful_songs'] = [result for result in self.object.results if not result['error']]
+        context['failed_songs'] = [result for result in self.object.results if result['error']]
+        return context
@@ -1,12 +1,16 @@
-from datetime import timedelta
 from typing import Any
 from django.contrib.auth.mixins import PermissionRequiredMixin
+from django.db.models import F
 from django.db.models.query import QuerySet
+from django.http import JsonResponse
 from django.utils import timezone
+from django.views import View
 
 from homepage.views.common_views import PageNavigationListView
 from uploads.forms import ScreeningQueueFilterForm
 from uploads.models import NewSong
+from uploads.queue_stats import get_filter_condition, get_queue_stats
+from uploads.screening_stream import get_last_change_id
 from uploads import constants
 
 class ScreeningIndexView(PermissionRequiredMixin, PageNavigationListView):
@@ -62,7 +66,12 @@ class ScreeningIndexView(PermissionRequiredMixin, PageNavigationListView):
         elif context['filter'] == constants.PRE_SCREENED_AND_RECOMMENDED_FILTER:
             context['actions'] = [constants.APPROVE_ACTION, constants.APPROVE_AND_FEATURE_ACTION, constants.REJECT_ACTION, constants.CLEAR_FLAG_ACTION]
 
-        context['form'] = ScreeningQueueFilterForm(initial={'filter': context['filter']})
+        queue_stats = get_queue_stats(self.request.user.profile)
+        context['queue_stats'] = queue_stats
+        context['filter_stats'] = queue_stats['filters'].get(context['filter'])
+        context['form'] = ScreeningQueueFilterForm(initial={'filter': context['filter']}, filter_stats=queue_stats['filters'])
+        # The page streams the queue changes made after it was rendered
+        context['last_change_id'] = get_last_change_id()
 
         return context
 
@@ -75,30 +84,31 @@ class ScreeningIndexView(PermissionRequiredMixin, PageNavigationListView):
         if filter_option not in self.filter_options:
             filter_option = constants.HIGH_PRIORITY_FILTER
 
-        # Before doing anything, clear any song claims that are older than 48 hours
-        NewSong.objects.filter(claim_date__lte=timezone.now() - timedelta(hours=48)).update(claimed_by=None, claim_date=None)
-
-        # High priority is defined as any song where it's not uploaded by the placeholder account (id of 1)
-        match filter_option:
-            case constants.HIGH_PRIORITY_FILTER:
-                queryset = queryset.filter(uploader_profile__user_id__isnull=False).filter(claimed_by=None).filter(flag=None)
-            case constants.LOW_PRIORITY_FILTER:
-                queryset = queryset.filter(uploader_profile__user_id=None).filter(claimed_by=None).filter(flag=None)
-            case constants.BY_UPLOADER_FILTER:
-                queryset = queryset.filter(is_by_uploader=True).filter(claimed_by=None).filter(flag=None)
-            case constants.MY_SCREENING_FILTER:
-                queryset = queryset.filter(claimed_by=self.request.user.profile)
-            case constants.OTHERS_SCREENING_FILTER:
-                queryset = queryset.exclude(claimed_by=None).exclude(claimed_by=self.request.user.profile)
-            case constants.PRE_SCREENED_FILTER:
-                queryset = queryset.filter(flag=NewSong.Flags.PRE_SCREENED)
-            case constants.PRE_SCREENED_AND_RECOMMENDED_FILTER:
-                queryset = queryset.filter(flag=NewSong.Flags.PRE_SCREENED_PLUS)
-            case constants.NEEDS_SECOND_OPINION_FILTER:
-                queryset = queryset.filter(flag=NewSong.Flags.NEEDS_SECOND_OPINION)
-            case constants.POSSIBLE_DUPLICATE_FILTER:
-                queryset = queryset.filter(flag=NewSong.Flags.POSSIBLE_DUPLICATE)
-            case constants.UNDER_INVESTIGATION_FILTER:
-                queryset = queryset.filter(flag=NewSong.Flags.UNDER_INVESTIGATION)
+        queryset = queryset.filter(get_filter_condition(filter_option, self.request.user.profile))
+        # The list only shows a few columns, so the texts and signatures are left in the database
+        queryset = queryset.defer('instrument_text', 'comment_text', 'similarity_signature', 'similarity_bands')
 
+        # Likely duplicates are ranked by how close their closest match is
+        if filter_option == constants.POSSIBLE_DUPLICATE_FILTER:
+            return queryset.order_by(F('duplicate_score').desc(nulls_last=True), '-create_date')
         return queryset.order_by('-create_date')
+
+class ScreeningQueueStatsView(PermissionRequiredMixin, View):
+    """Returns the song count and oldest upload of each screening queue filter, and the number of
+    songs claimed by each screener, as JSON."""
+    permission_required = 'uploads.can_approve_songs'
+
+    def get(self, request, *args, **kwargs):
+        now = timezone.now()
+        queue_stats = get_queue_stats(request.user.profile)
+        return JsonResponse({
+            'filters': {
+                filter_option: {
+                    'count': stats['count'],
+                    'oldest': stats['oldest'],
+                    'oldest_age_seconds': int((now - stats['oldest']).total_seconds()) if stats['oldest'] else None,
+                }
+                for filter_option, stats in queue_stats['filters'].items()
+            },
+            'claims': [{'screener': claim['name'], 'count': claim['count']} for claim in queue_stats['claims']],
+        })
@@ -1,10 +1,7 @@
-import os
 import re
 from typing import Any
-from datetime import date
 
 from django.conf import settings
-from django.db import transaction, Error
 from django.contrib.auth.mixins import PermissionRequiredMixin
 from django.http import HttpRequest, HttpResponse
 from django.views.generic import FormView
@@ -12,10 +9,11 @@ from django.shortcuts import render, redirect
 from django.contrib import messages
 from django.forms import CharField, HiddenInput
 from django.urls import reverse_lazy
-from django.utils import timezone
+from django_q.tasks import async_task
 
-from uploads import forms, constants
-from uploads.models import NewSong, RejectedSong
+from uploads import bulk_screening, forms, constants
+from uploads.models import NewSong, ScreeningBatch
+from uploads.queue_stats import invalidate_queue_stats
 
 class ScreeningRejectView(PermissionRequiredMixin, FormView):
     template_name="screening_reject.html"
@@ -24,52 +22,32 @@ class ScreeningRejectView(PermissionRequiredMixin, FormView):
     success_url = reverse_lazy('screening_index')
 
     def form_valid(self, form):
-        song_ids = self.extra_context.get('song_ids', [])
+        song_ids = list(self.extra_context.get('song_ids', []))
+        options = {
+            'reason': form.cleaned_data['rejection_reason'],
+            'message': form.cleaned_data['message'],
+            'is_temporary': form.cleaned_data['is_temporary'],
+        }
+
+        if len(song_ids) > settings.SCREENING_BATCH_ASYNC_THRESHOLD:
+            # Large batches run in a worker, and the screener is shown their progress
+            batch = ScreeningBatch.objects.create(
+                action=ScreeningBatch.Actions.REJECT,
+                profile=self.request.user.profile,
+                new_song_ids=song_ids,
+                options=options
+            )
+            async_task('modarchive.tasks.run_screening_batch', batch.id)
+            return redirect('screening_batch', pk=batch.id)
 
-        for song_id in song_ids:
-            self.finalize_rejection(song_id, form)
+        outcomes = bulk_screening.reject_songs(song_ids, self.request.user.profile, **options)
+        for outcome in outcomes:
+            if outcome.error:
+                messages.error(self.request, f'{outcome.filename}: {outcome.error}')
+        invalidate_queue_stats()
 
         return super().form_valid(form)
 
-    @transaction.atomic
-    def finalize_rejection(self, song_id, form):
-        new_song = NewSong.objects.get(pk=song_id)
-
-        previous_dir = os.path.join(settings.NEW_FILE_DIR, f'{new_song.filename}.zip')
-        new_dir = os.path.join(settings.REJECTED_FILE_DIR, f'{date.today().strftime("%Y%m%d")}-{new_song.filename}.zip')
-        try:
-            os.rename(previous_dir, new_dir)
-        except OSError:
-            return
-
-        try:
-            RejectedSong.objects.create(
-                reason=form.cleaned_data['rejection_reason'],
-                message=form.cleaned_data['message'],
-                is_temporary=form.cleaned_data['is_temporary'],
-                rejected_by=self.request.user.profile,
-                rejected_date=timezone.now(),
-                filename=new_song.filename,
-                filename_unzipped=new_song.filename_unzipped,
-                title=new_song.title,
-                format=new_song.format,
-                file_size=new_song.file_size,
-                channels=new_song.channels,
-                instrument_text=new_song.instrument_text,
-                comment_text=new_song.comment_text,
-                hash=new_song.hash,
-                pattern_hash=new_song.pattern_hash,
-                artist_from_file=new_song.artist_from_file,
-                uploader_profile=new_song.uploader_profile,
-                uploader_ip_address=new_song.uploader_ip_address,
-                is_by_uploader=new_song.is_by_uploader,
-            )
-
-            new_song.delete()
-        except Error:
-            os.rename(new_dir, previous_dir)
-            transaction.set_rollback(True)
-
     def validate_song_ids(self, raw_song_ids, request):
         if not (raw_song_ids and re.match(r'^(\d+,)*\d+$', raw_song_ids)):
             messages.error(request, constants.REJECTION_REQUIRES_IDS)
@@ -1,6 +1,5 @@
 import os
 import zipfile
-import tempfile
 from django.views.generic import FormView
 from django.contrib.auth.mixins import PermissionRequiredMixin
 from django.contrib import messages
@@ -8,8 +7,10 @@ from django.shortcuts import redirect, render
 from django.urls import reverse_lazy
 from django.conf import settings
 
+from modarchive import file_repository
 from uploads import forms
-from uploads.models import NewSong, ScreeningEvent
+from uploads.models import NewSong, ScreeningEvent, ScreeningQueueChange
+from uploads.screening_stream import publish_changes
 from uploads import constants
 
 
@@ -43,6 +44,7 @@ class ScreeningRenameView(PermissionRequiredMixin, FormView):
                 type=ScreeningEvent.Types.RENAME,
                 content=f'Filename changed by {profile.display_name} from {old_filename} to {new_filename})'
             )
+            publish_changes(ScreeningQueueChange.Types.RENAME, [song], profile)
         else:
             # This will only happen if there is a technical issue during the rename.
             messages.error(self.request, constants.RENAME_FAILED)
@@ -88,18 +90,9 @@ class ScreeningRenameView(PermissionRequiredMixin, FormView):
         old_zip_file_path = os.path.join(settings.NEW_FILE_DIR, f'{old_filename}.zip')
         new_zip_file_path = os.path.join(settings.NEW_FILE_DIR, f'{new_filename}.zip')
 
-        with zipfile.ZipFile(old_zip_file_path, 'r') as zip_file:
-            with tempfile.TemporaryDirectory() as temp_dir:
-                try:
-                    zip_file.extractall(temp_dir)
-                    original_filename = zip_file.namelist()[0]
-                    original_file_path = os.path.join(temp_dir, original_filename)
-                    new_file_path = os.path.join(temp_dir, new_filename)
-                    os.rename(original_file_path, new_file_path)
-
-                    with zipfile.ZipFile(new_zip_file_path, 'w') as new_zip_file:
-                        new_zip_file.write(new_file_path, f'{new_filename}')
-                except OSError:
-                    return False
+        try:
+            file_repository.rename_zip_member(old_zip_file_path, new_zip_file_path, new_filename)
+        except (OSError, ValueError, zipfile.BadZipFile):
+            return False
 
         return True
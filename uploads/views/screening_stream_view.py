@@ -0,0 +1,35 @@
+from django.contrib.auth.mixins import PermissionRequiredMixin
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
+from django.views import View
+
+from uploads.screening_stream import get_last_change_id, stream_changes
+
+class ScreeningStreamView(PermissionRequiredMixin, View):
+    """
+    Streams changes to the screening queue to an open screening page as server-sent events,
+    starting after the Last-Event-ID the browser sends when it reconnects, or else after the
+    'after' parameter the page was rendered with. The stream holds its connection open, so it is
+    only served over ASGI; under WSGI it answers 204, which tells the browser not to reconnect.
+    """
+    permission_required = 'uploads.can_approve_songs'
+
+    def get(self, request, *args, **kwargs):
+        if not isinstance(request, ASGIRequest):
+            return HttpResponse(status=204)
+
+        last_change_id = self.get_last_change_id(request)
+        response = StreamingHttpResponse(
+            stream_changes(last_change_id, request.user.profile.id),
+            content_type='text/event-stream'
+        )
+        response['Cache-Control'] = 'no-cache'
+        # Stops nginx from buffering the events
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    def get_last_change_id(self, request):
+        for value in (request.headers.get('Last-Event-ID'), request.GET.get('after')):
+            if value and value.isdigit():
+                return int(value)
+        return get_last_change_id()
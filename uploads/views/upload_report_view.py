@@ -1,5 +1,32 @@
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.views.generic import TemplateView
+from django.http import JsonResponse
+from django.views.generic import DetailView
 
-class UploadReportView(LoginRequiredMixin, TemplateView):
-    template_name="upload_report.html"
\ No newline at end of file
+from uploads.models import UploadJob, UploadJobFile
+
+REPORT_FIELDS = ('filename', 'title', 'format', 'reason')
+
+class UploadReportView(LoginRequiredMixin, DetailView):
+    template_name="upload_report.html"
+    model = UploadJob
+    context_object_name = 'job'
+
+    def get_queryset(self):
+        return UploadJob.objects.filter(uploader_profile=self.request.user.profile)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        files = self.object.files.all()
+        context['successful_files'] = list(files.filter(status=UploadJobFile.Statuses.SUCCESS).values(*REPORT_FIELDS))
+        context['failed_files'] = list(files.filter(status=UploadJobFile.Statuses.FAILED).values(*REPORT_FIELDS))
+        return context
+
+class UploadReportStatusView(UploadReportView):
+    """Returns the job's status and per-file results as JSON, for clients polling a running job."""
+    def render_to_response(self, context, **response_kwargs):
+        return JsonResponse({
+            'status': self.object.status,
+            'is_finished': self.object.is_finished(),
+            'successful_files': context['successful_files'],
+            'failed_files': context['failed_files'],
+        })